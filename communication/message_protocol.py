@@ -11,6 +11,20 @@ from datetime import datetime
 import uuid
 import json
 
+try:
+    import orjson  # 可选依赖，安装后用于加速消息序列化
+except ImportError:
+    orjson = None
+
+
+def _json_default(obj: Any) -> Any:
+    """消息数据中datetime等非JSON原生类型的序列化"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 
 class MessageType(Enum):
     """消息类型枚举"""
@@ -149,7 +163,13 @@ class Message:
     
     def to_json(self) -> str:
         """转换为JSON字符串"""
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if orjson is not None:
+            return orjson.dumps(
+                self.to_dict(),
+                default=_json_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2, default=_json_default)
 
 
 class MessageBuilder:
@@ -9,7 +9,7 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
-from system_orchestrator import SystemOrchestrator, ProjectConfig
+from system_orchestrator import SystemOrchestrator, ProjectConfig, run_event_loop
 from config_manager import get_config_manager
 from communication import MessageBus
 from roles.master_controller import MasterController
@@ -345,6 +345,8 @@ def create_requirements_file():
     """创建requirements.txt文件"""
     requirements = [
         "aiosqlite>=0.19.0",
+        "orjson>=3.8.0",
+        'uvloop>=0.19.0; sys_platform != "win32"',
         "asyncio",
         "dataclasses",
         "pathlib",
@@ -393,10 +395,10 @@ if __name__ == "__main__":
             print("项目设置完成")
             
         elif command == "test":
-            asyncio.run(quick_system_test())
+            run_event_loop(quick_system_test())
             
         elif command == "full":
-            asyncio.run(run_example_project())
+            run_event_loop(run_example_project())
             
         else:
             print("可用命令:")
@@ -405,4 +407,4 @@ if __name__ == "__main__":
             print("  full  - 运行完整示例项目")
     else:
         # 默认运行完整示例
-        asyncio.run(run_example_project())
\ No newline at end of file
+        run_event_loop(run_example_project())
\ No newline at end of file
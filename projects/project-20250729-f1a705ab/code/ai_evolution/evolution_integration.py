@@ -11,9 +11,6 @@ import logging
 from pathlib import Path
 
 # 导入现有系统组件
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
-
 from ai_evolution.experience_system import ExperienceKnowledgeBase, AdaptiveLearningEngine
 from qa_engine.answer_generator import AnswerGenerator, QuestionContext, AnswerResult
 from knowledge_base.vector_store import VectorStore, SearchResult
@@ -6,11 +6,8 @@
 
 from typing import Dict, List, Any, Optional
 import re
-from pathlib import Path
 
 # 本地模块
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
 from domain_adapters.base_adapter import DomainAdapter, DomainKnowledge
 
 class MedicalAdapter(DomainAdapter):
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+智能行业知识问答系统 - FAISS向量检索
+使用FAISS IVF量化索引(SQ8/PQ)加速大规模知识库的语义检索，ChromaDB继续保存知识块内容和元数据
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+import numpy as np
+import faiss
+
+from knowledge_base.vector_store import VectorStore, SearchQuery, SearchResult, KnowledgeChunk
+from knowledge_ingestion.document_parser import DocumentParseResult
+
+class FaissVectorStore(VectorStore):
+    """
+    基于FAISS IVF量化索引的向量数据库管理器
+    
+    - 向量检索走FAISS索引（IVF倒排分桶 + SQ8标量量化或PQ乘积量化压缩）
+    - 知识块内容、元数据仍由ChromaDB保存，检索命中后按ID批量取回
+    - 向量数量不足以训练索引前，检索回退到ChromaDB
+    - FAISS索引不支持并发读写，索引和ID映射的修改与检索由同一把锁串行化
+    - 多个worker进程共享持久化目录时，检索前按共享数据版本号判断其他进程是否写入过，
+      是则重新加载（已持久化的索引版本一致时）或重建索引；落后于共享数据的索引不会被持久化
+    """
+    
+    INDEX_FILE = "faiss_ivf.index"
+    # 已持久化的索引对应的数据版本号
+    INDEX_VERSION_FILE = "faiss_ivf.version"
+    
+    # 支持的量化方式（都支持按ID删除；PQ FastScan不支持remove_ids，未提供）
+    QUANTIZERS = ("sq8", "pq")
+    
+    def __init__(self,
+                 persist_directory: str = "knowledge_db",
+                 collection_name: str = "knowledge_base",
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 nlist: int = 1024,
+                 quantizer: str = "sq8",
+                 pq_m: int = 32,
+                 nprobe: int = 16,
+                 overfetch: int = 4,
+                 save_every: int = 10000):
+        """
+        初始化FAISS向量数据库
+        
+        Args:
+            persist_directory: 数据持久化目录
+            collection_name: 集合名称
+            embedding_model: 嵌入模型名称
+            nlist: IVF分桶数量
+            quantizer: 量化方式，sq8为int8标量量化（每维1字节），pq为乘积量化
+            pq_m: PQ子向量数量（需整除向量维度，仅quantizer=pq时使用）
+            nprobe: 检索时访问的分桶数量
+            overfetch: 带过滤条件检索时的超额召回倍数
+            save_every: 累计多少个向量变更后持久化一次索引（关闭时总会持久化）
+        """
+        if quantizer not in self.QUANTIZERS:
+            raise ValueError(f"不支持的量化方式: {quantizer}")
+            
+        self.nlist = nlist
+        self.quantizer = quantizer
+        self.pq_m = pq_m
+        self.nprobe = nprobe
+        self.overfetch = overfetch
+        self.save_every = save_every
+        
+        # FAISS整数ID -> 知识块ID
+        self._faiss_ids: Dict[int, str] = {}
+        self.faiss_index: Optional[faiss.Index] = None
+        # 保护 faiss_index / _faiss_ids：修改、检索和持久化都在锁内进行
+        self._index_lock = threading.RLock()
+        # 上次持久化后累计的向量变更数
+        self._unsaved_changes = 0
+        # 索引对应的共享数据版本号（与 VectorStore 的文档索引使用同一版本号）
+        self._index_version = -1
+        # 合并并发检索触发的索引同步
+        self._index_sync_lock = asyncio.Lock()
+        # 本进程进行中的写入数
+        self._local_writes = 0
+        
+        super().__init__(persist_directory, collection_name, embedding_model)
+        
+        self._index_path = self.persist_directory / self.INDEX_FILE
+        self._index_version_path = self.persist_directory / self.INDEX_VERSION_FILE
+        
+        # faiss-cpu 会按CPU能力自动加载AVX2/AVX512编译的扩展
+        self.logger.info(f"FAISS编译选项: {faiss.get_compile_options()}, 索引类型: {self.index_factory_string}")
+        self._load_or_build_index()
+    
+    @property
+    def index_factory_string(self) -> str:
+        """FAISS index_factory 描述串"""
+        if self.quantizer == "sq8":
+            return f"IVF{self.nlist},SQ8"
+        return f"IVF{self.nlist},PQ{self.pq_m}"
+        
+    @property
+    def min_train_size(self) -> int:
+        """训练IVF索引所需的最少向量数"""
+        return 30 * self.nlist
+    
+    @staticmethod
+    def _to_faiss_id(chunk_id: str) -> int:
+        """知识块ID(md5十六进制)映射为FAISS使用的int64 ID"""
+        return int(chunk_id[:15], 16)
+    
+    def _load_or_build_index(self):
+        """加载已持久化的索引，版本号或向量数与知识库不一致时重建（可在线程中执行）"""
+        with self._index_lock:
+            # 在写锁内读取版本号和索引文件，得到同一时刻的快照
+            index = None
+            with self._write_lock():
+                version = self._read_data_version()
+                if self._index_path.exists() and self._read_index_version() == version:
+                    index = faiss.read_index(str(self._index_path))
+            
+            # 之后的读取若包含其他进程的新写入，版本号已变化，下次检索前会再次同步
+            chunk_ids = self._all_chunk_ids()
+            self._faiss_ids = {self._to_faiss_id(chunk_id): chunk_id for chunk_id in chunk_ids}
+            self._index_version = version
+            self._unsaved_changes = 0
+            
+            if index is not None:
+                if index.ntotal == len(chunk_ids) and self._matches_quantizer(index):
+                    index.nprobe = self.nprobe
+                    self.faiss_index = index
+                    self.logger.info(f"加载FAISS索引: {self._index_path}, 向量数: {index.ntotal}")
+                    return
+                self.logger.warning("FAISS索引与知识库不一致，重新构建")
+            
+            self._build_index()
+    
+    def _read_index_version(self) -> int:
+        """读取已持久化的索引对应的数据版本号"""
+        try:
+            return int(self._index_version_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return -1
+    
+    def _matches_quantizer(self, index: faiss.Index) -> bool:
+        """已持久化的索引是否与当前量化方式一致"""
+        # extract_index_ivf 返回IndexIVF基类，需要向下转型后才能判断具体的量化方式
+        ivf = faiss.downcast_index(faiss.extract_index_ivf(index))
+        if self.quantizer == "sq8":
+            return isinstance(ivf, faiss.IndexIVFScalarQuantizer)
+        return isinstance(ivf, faiss.IndexIVFPQ)
+        
+    def _all_chunk_ids(self, page_size: int = 10000) -> List[str]:
+        """分页读取全部知识块ID"""
+        chunk_ids = []
+        offset = 0
+        while True:
+            page = self.collection.get(include=[], limit=page_size, offset=offset)
+            chunk_ids.extend(page['ids'])
+            if len(page['ids']) < page_size:
+                return chunk_ids
+            offset += page_size
+    
+    def _build_index(self, page_size: int = 10000):
+        """从ChromaDB中的全部向量训练并构建索引"""
+        self.faiss_index = None
+        if self.collection.count() < self.min_train_size:
+            self.logger.info(f"向量数不足 {self.min_train_size}，暂不构建FAISS索引，检索使用ChromaDB")
+            return
+        
+        ids, vectors = [], []
+        offset = 0
+        while True:
+            page = self.collection.get(include=['embeddings'], limit=page_size, offset=offset)
+            ids.extend(self._to_faiss_id(chunk_id) for chunk_id in page['ids'])
+            vectors.extend(page['embeddings'])
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+        
+        vectors = np.asarray(vectors, dtype=np.float32)
+        index = faiss.index_factory(vectors.shape[1], self.index_factory_string)
+        index.train(vectors)
+        index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+        index.nprobe = self.nprobe
+        self.faiss_index = index
+        
+        self._save_index()
+        self.logger.info(f"FAISS索引构建完成，向量数: {index.ntotal}")
+    
+    def _save_index(self):
+        """持久化索引；索引落后于共享数据时不写入，避免覆盖其他进程的变更"""
+        with self._index_lock:
+            if self.faiss_index is not None:
+                with self._write_lock():
+                    if self._read_data_version() == self._index_version:
+                        faiss.write_index(self.faiss_index, str(self._index_path))
+                        self._index_version_path.write_text(str(self._index_version))
+            self._unsaved_changes = 0
+    
+    def _mark_changed(self, count: int):
+        """记录向量变更，累计达到 save_every 时持久化（调用方持有 _index_lock）"""
+        self._unsaved_changes += count
+        if self._unsaved_changes >= self.save_every:
+            self._save_index()
+    
+    def _add_vectors(self, chunk_ids: List[str], embeddings: List[List[float]]):
+        """将新增知识块的向量加入索引（已在索引中的知识块跳过）"""
+        with self._index_lock:
+            new_rows = [
+                (self._to_faiss_id(chunk_id), chunk_id, embedding)
+                for chunk_id, embedding in zip(chunk_ids, embeddings)
+                if self._to_faiss_id(chunk_id) not in self._faiss_ids
+            ]
+            if not new_rows:
+                return
+            self._faiss_ids.update((faiss_id, chunk_id) for faiss_id, chunk_id, _ in new_rows)
+            
+            if self.faiss_index is None:
+                # 积累到可训练的数量后一次性构建
+                if len(self._faiss_ids) >= self.min_train_size:
+                    self._build_index()
+                return
+            
+            self.faiss_index.add_with_ids(
+                np.asarray([embedding for _, _, embedding in new_rows], dtype=np.float32),
+                np.asarray([faiss_id for faiss_id, _, _ in new_rows], dtype=np.int64)
+            )
+            self._mark_changed(len(new_rows))
+    
+    def _remove_vectors(self, chunk_ids: List[str]):
+        """从索引中移除知识块的向量"""
+        faiss_ids = [self._to_faiss_id(chunk_id) for chunk_id in chunk_ids]
+        with self._index_lock:
+            for faiss_id in faiss_ids:
+                self._faiss_ids.pop(faiss_id, None)
+            
+            if self.faiss_index is not None:
+                self.faiss_index.remove_ids(np.asarray(faiss_ids, dtype=np.int64))
+                self._mark_changed(len(faiss_ids))
+    
+    def _replace_vectors(self, chunk_ids: List[str], embeddings: List[List[float]]):
+        """替换知识块的向量（移除和重新加入在同一次持锁内完成，检索不会漏掉这些知识块）"""
+        with self._index_lock:
+            self._remove_vectors(chunk_ids)
+            self._add_vectors(chunk_ids, embeddings)
+    
+    def _apply_local_write(self, version: int, func: Optional[Callable] = None, *args):
+        """
+        把本进程的写入同步到索引（可在线程中执行）
+        
+        Args:
+            version: 写入前读取的共享数据版本号
+            func: 修改索引的方法（_add_vectors等），写入不涉及向量时为None
+        """
+        with self._index_lock:
+            # 期间只有本进程写入（版本号恰好加一）时索引仍与共享数据一致；
+            # 否则照常修改，但保持旧版本号，下次检索前重新同步
+            if version == self._index_version and self._read_data_version() == version + 1:
+                self._index_version = version + 1
+            if func is not None:
+                func(*args)
+    
+    @contextmanager
+    def _local_write(self):
+        """标记本进程的写入进行中"""
+        self._local_writes += 1
+        try:
+            yield
+        finally:
+            self._local_writes -= 1
+    
+    async def _sync_index(self):
+        """其他worker进程写入过数据时（共享版本号变化），在线程中重新加载或重建索引"""
+        # 本进程写入ChromaDB后、同步到索引前版本号已经变化，不据此重建；
+        # 期间若有其他进程写入，_apply_local_write 会保留旧版本号，写入完成后的检索再同步
+        if self._local_writes or self._current_data_version() == self._index_version:
+            return
+        async with self._index_sync_lock:
+            if self._current_data_version() != self._index_version:
+                self.logger.info("知识库已被其他进程修改，同步FAISS索引")
+                await asyncio.to_thread(self._load_or_build_index)
+    
+    def _search_index(self, embeddings: List[List[float]], k: int) -> Tuple[Any, List[List[Optional[str]]]]:
+        """在锁内检索FAISS索引，并把结果中的FAISS ID转换为知识块ID"""
+        with self._index_lock:
+            if self.faiss_index is None:
+                return None, []
+            distances, faiss_ids = self.faiss_index.search(np.asarray(embeddings, dtype=np.float32), k)
+            faiss_to_chunk = self._faiss_ids.get
+            return distances, [[faiss_to_chunk(int(faiss_id)) for faiss_id in row] for row in faiss_ids]
+    
+    async def add_document(self, parse_result: DocumentParseResult) -> int:
+        """添加文档到向量数据库，并同步更新FAISS索引"""
+        with self._local_write():
+            version = self._current_data_version()
+            added = await super().add_document(parse_result)
+            if added:
+                results = await asyncio.to_thread(
+                    self.collection.get,
+                    where={"document_id": parse_result.document_id},
+                    include=['embeddings']
+                )
+                
+                # 同一文档重复入库时，已在索引中的知识块不重复添加（在 _add_vectors 的锁内判断）
+                await asyncio.to_thread(
+                    self._apply_local_write, version, self._add_vectors, results['ids'], results['embeddings']
+                )
+        
+        return added
+    
+    async def update_chunk(self, chunk_id: str, content: str = None, metadata: Dict[str, Any] = None) -> bool:
+        """更新知识块，并同步更新FAISS中的向量"""
+        with self._local_write():
+            version = self._current_data_version()
+            updated = await super().update_chunk(chunk_id, content, metadata)
+            if updated:
+                if content is None:
+                    await asyncio.to_thread(self._apply_local_write, version)
+                else:
+                    results = await asyncio.to_thread(self.collection.get, ids=[chunk_id], include=['embeddings'])
+                    await asyncio.to_thread(
+                        self._apply_local_write, version, self._replace_vectors, [chunk_id], results['embeddings']
+                    )
+        return updated
+    
+    async def delete_document(self, document_id: str) -> int:
+        """删除文档，并从FAISS索引中移除其向量"""
+        results = await asyncio.to_thread(
+            self.collection.get,
+            where={"document_id": document_id},
+            include=[]
+        )
+        
+        with self._local_write():
+            version = self._current_data_version()
+            deleted = await super().delete_document(document_id)
+            if deleted and results['ids']:
+                await asyncio.to_thread(self._apply_local_write, version, self._remove_vectors, results['ids'])
+        
+        return deleted
+    
+    async def reset_database(self) -> bool:
+        """重置数据库（危险操作），同时清空FAISS索引"""
+        reset = await super().reset_database()
+        if reset:
+            with self._index_lock:
+                self.faiss_index = None
+                self._faiss_ids = {}
+                self._unsaved_changes = 0
+                # 下次检索前按重置后的知识库重新同步
+                self._index_version = -1
+                self._index_path.unlink(missing_ok=True)
+                self._index_version_path.unlink(missing_ok=True)
+        return reset
+    
+    async def close(self):
+        """关闭前持久化尚未保存的索引变更"""
+        if self._unsaved_changes:
+            await asyncio.to_thread(self._save_index)
+        await super().close()
+    
+    async def search_batch(self, queries: List[SearchQuery]) -> List[List[SearchResult]]:
+        """
+        批量语义搜索：FAISS检索候选，再从ChromaDB批量取回内容和元数据
+        
+        Args:
+            queries: 搜索查询列表
+        
+        Returns:
+            List[List[SearchResult]]: 与queries一一对应的搜索结果列表
+        """
+        await self._sync_index()
+        if self.faiss_index is None:
+            return await super().search_batch(queries)
+        
+        where_list = [self._build_where_conditions(query) for query in queries]
+        
+        # FAISS只支持等值过滤的后处理，含操作符的条件交给ChromaDB
+        if any(self._has_operators(where) for where in where_list):
+            return await super().search_batch(queries)
+        
+        self.stats["total_queries"] += len(queries)
+        
+        embeddings = await self.embed_batcher.embed_many([query.query_text for query in queries])
+        k = max(
+            query.top_k * (self.overfetch if where else 1)
+            for query, where in zip(queries, where_list)
+        )
+        
+        distances, chunk_id_rows = await asyncio.to_thread(self._search_index, embeddings, k)
+        if distances is None:
+            # 检索期间索引被重置
+            return await super().search_batch(queries)
+        
+        # 一次性取回所有候选知识块
+        candidate_ids = list(dict.fromkeys(
+            chunk_id for row in chunk_id_rows for chunk_id in row if chunk_id is not None
+        ))
+        chunks: Dict[str, Any] = {}
+        if candidate_ids:
+            fetched = await asyncio.to_thread(
+                self.collection.get, ids=candidate_ids, include=['documents', 'metadatas']
+            )
+            chunks = {
+                chunk_id: (document, metadata)
+                for chunk_id, document, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas'])
+            }
+        
+        batch_results = []
+        for query, where, row_distances, row_ids in zip(queries, where_list, distances, chunk_id_rows):
+            search_results = []
+            for distance, chunk_id in zip(row_distances, row_ids):
+                if chunk_id not in chunks:
+                    continue
+                document, metadata = chunks[chunk_id]
+                if any(metadata.get(key) != value for key, value in where.items()):
+                    continue
+                
+                # 与ChromaDB检索一致：平方欧氏距离转换为0-1相似度
+                similarity_score = 1.0 / (1.0 + max(float(distance), 0.0))
+                if similarity_score < query.similarity_threshold:
+                    continue
+                
+                search_results.append(SearchResult(
+                    chunk=KnowledgeChunk(chunk_id=chunk_id, content=document, metadata=metadata),
+                    similarity_score=similarity_score,
+                    rank=len(search_results) + 1
+                ))
+                if len(search_results) >= query.top_k:
+                    break
+            
+            batch_results.append(search_results)
+        
+        return batch_results
+    
+    @staticmethod
+    def _has_operators(where: Dict[str, Any]) -> bool:
+        """过滤条件是否包含ChromaDB操作符($and/$in等)"""
+        return any(key.startswith("$") or isinstance(value, dict) for key, value in where.items())
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息（含FAISS索引状态）"""
+        stats = super().get_statistics()
+        stats["vector_backend"] = "faiss"
+        stats["faiss_index_type"] = self.index_factory_string
+        with self._index_lock:
+            stats["faiss_indexed_vectors"] = self.faiss_index.ntotal if self.faiss_index is not None else 0
+        return stats
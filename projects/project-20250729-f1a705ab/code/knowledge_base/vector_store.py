@@ -13,8 +13,15 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
 import hashlib
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows 下无 fcntl，退化为不加跨进程锁
+    fcntl = None
+
 # 向量数据库和嵌入
 import chromadb
 from chromadb.config import Settings
@@ -22,8 +29,6 @@ from chromadb.utils import embedding_functions
 from sentence_transformers import SentenceTransformer
 
 # 本地模块
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
 from knowledge_ingestion.document_parser import ExtractedContent, DocumentParseResult
 
 @dataclass
@@ -61,6 +66,123 @@ class SearchQuery:
         if self.filters is None:
             self.filters = {}
 
+# 已加载的嵌入模型（进程内共享；gunicorn --preload 时在fork前加载，各worker写时复制共享）
+_EMBEDDING_MODELS: Dict[str, SentenceTransformer] = {}
+
+def load_embedding_model(model_name: str) -> SentenceTransformer:
+    """加载嵌入模型，同名模型只加载一次"""
+    model = _EMBEDDING_MODELS.get(model_name)
+    if model is None:
+        logging.getLogger(__name__).info(f"加载嵌入模型: {model_name}")
+        model = _EMBEDDING_MODELS[model_name] = SentenceTransformer(model_name)
+    return model
+
+class SharedEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    """复用已加载嵌入模型的ChromaDB嵌入函数，避免ChromaDB再加载一份模型"""
+    
+    def __init__(self, model: SentenceTransformer):
+        self._model = model
+        
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self._model.encode(list(input), convert_to_numpy=True).tolist()
+
+class EmbedBatcher:
+    """查询嵌入微批处理器：合并短时间窗口内并发到达的查询文本，一次前向计算完成嵌入"""
+    
+    def __init__(self,
+                 model: SentenceTransformer,
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5):
+        """
+        初始化嵌入批处理器
+        
+        Args:
+            model: 嵌入模型
+            max_batch_size: 单批最大文本数
+            max_wait_ms: 收到首个文本后等待合并的时间窗口(毫秒)
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        
+        self.logger = logging.getLogger(__name__)
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        
+    def start(self):
+        """启动后台合批任务"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+            
+    async def stop(self):
+        """停止后台合批任务，尚未计算的文本以异常结束，调用方不会一直等待"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._fail_batch(pending, RuntimeError("嵌入批处理器已停止"))
+            
+    async def embed(self, text: str) -> List[float]:
+        """计算单条文本的嵌入向量"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+        
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """计算多条文本的嵌入向量（与其他并发请求一起合批）"""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+        
+    async def _run(self):
+        """收集文本并按批次计算嵌入"""
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await self._embed_batch(batch)
+            except asyncio.CancelledError:
+                # 停止时正在合并或计算中的批次同样以异常结束
+                self._fail_batch(batch, RuntimeError("嵌入批处理器已停止"))
+                raise
+                
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """合并时间窗口内到达的文本并计算一批嵌入"""
+        if self.max_wait > 0:
+            await asyncio.sleep(self.max_wait)
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+            
+        # 嵌入计算在线程中执行；期间到达的文本进入下一批
+        try:
+            embeddings = await asyncio.to_thread(
+                self.model.encode,
+                [text for text, _ in batch],
+                batch_size=self.max_batch_size,
+                convert_to_numpy=True
+            )
+        except Exception as e:
+            self.logger.error(f"批量计算嵌入失败: {e}")
+            self._fail_batch(batch, e)
+            return
+            
+        for (_, future), embedding in zip(batch, embeddings.tolist()):
+            if not future.done():
+                future.set_result(embedding)
+                
+    def _fail_batch(self, batch: List[Tuple[str, asyncio.Future]], error: Exception):
+        """以异常结束批次中尚未完成的请求"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
 class VectorStore:
     """向量数据库管理器"""
     
@@ -79,6 +201,11 @@ class VectorStore:
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
+        # 多个服务进程共享同一持久化目录时，写操作通过文件锁串行化
+        self._lock_path = self.persist_directory / ".write.lock"
+        # 共享的数据版本号：每次写入递增，其他进程据此判断本地文档索引是否过期
+        self._version_path = self.persist_directory / ".data.version"
+        
         self.collection_name = collection_name
         self.embedding_model_name = embedding_model
         
@@ -91,9 +218,25 @@ class VectorStore:
             "last_updated": datetime.now().isoformat()
         }
         
+        # 文档索引: document_id -> 文档信息及知识块数量
+        self._doc_index: Dict[str, Dict[str, Any]] = {}
+        # 文档索引对应的数据版本号
+        self._doc_index_version = -1
+        # 合并并发的文档索引重建
+        self._doc_index_lock = asyncio.Lock()
+        # 版本文件的 (inode, 修改时间, 大小) 及对应的版本号，文件未变化时不重复读取
+        self._version_file_key: Optional[Tuple[int, int, int]] = None
+        self._version_cached = 0
+        
         # 初始化嵌入模型
-        self.logger.info(f"加载嵌入模型: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        self.embedding_model = load_embedding_model(embedding_model)
+        
+        # 并发查询的嵌入合批
+        self.embed_batcher = EmbedBatcher(
+            self.embedding_model,
+            max_batch_size=int(os.getenv("EMBED_BATCH", "32")),
+            max_wait_ms=float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+        )
         
         # 初始化ChromaDB客户端
         self._init_chromadb()
@@ -114,14 +257,15 @@ class VectorStore:
             self.collection = self.chroma_client.get_or_create_collection(
                 name=self.collection_name,
                 metadata={"description": "智能知识问答系统知识库"},
-                embedding_function=embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name=self.embedding_model_name
-                )
+                embedding_function=SharedEmbeddingFunction(self.embedding_model)
             )
             
             # 更新统计信息
             self.stats["total_chunks"] = self.collection.count()
             
+            # 从已有数据构建文档索引
+            self._build_document_index()
+            
             self.logger.info(f"ChromaDB初始化完成，集合: {self.collection_name}, 文档数: {self.stats['total_chunks']}")
             
         except Exception as e:
@@ -150,7 +294,10 @@ class VectorStore:
             documents = [chunk.content for chunk in chunks]
             metadatas = [chunk.metadata for chunk in chunks]
             
-            self.collection.add(
+            # 等待跨进程写锁和计算嵌入都在线程中进行，不阻塞事件循环
+            version = await asyncio.to_thread(
+                self._locked,
+                self.collection.add,
                 ids=chunk_ids,
                 documents=documents,
                 metadatas=metadatas
@@ -160,6 +307,10 @@ class VectorStore:
             self.stats["total_chunks"] += len(chunks)
             self.stats["last_updated"] = datetime.now().isoformat()
             
+            # 更新文档索引
+            self._index_chunks(metadatas)
+            self._doc_index_applied(version)
+                
             self.logger.info(f"成功添加文档: {parse_result.document_id}, 知识块数: {len(chunks)}")
             return len(chunks)
             
@@ -222,64 +373,7 @@ class VectorStore:
             List[SearchResult]: 搜索结果列表
         """
         try:
-            self.stats["total_queries"] += 1
-            
-            # 准备查询参数
-            where_conditions = {}
-            
-            # 添加领域过滤 - 修复ChromaDB查询语法
-            if query.domain:
-                # ChromaDB不支持$contains，改用$eq或直接匹配
-                where_conditions["topics"] = query.domain
-                
-            # 添加自定义过滤条件
-            if query.filters:
-                where_conditions.update(query.filters)
-                
-            # 执行向量搜索
-            results = self.collection.query(
-                query_texts=[query.query_text],
-                n_results=query.top_k,
-                where=where_conditions if where_conditions else None
-            )
-            
-            # 解析搜索结果
-            search_results = []
-            
-            if results['ids'] and results['ids'][0]:
-                for i, (chunk_id, document, metadata, distance) in enumerate(zip(
-                    results['ids'][0],
-                    results['documents'][0], 
-                    results['metadatas'][0],
-                    results['distances'][0]
-                )):
-                    # 修复相似度计算 - ChromaDB使用的是欧几里得距离
-                    # 对于欧几里得距离，我们需要将其转换为相似度分数
-                    # 使用倒数关系，距离越小相似度越高
-                    if distance == 0:
-                        similarity_score = 1.0
-                    else:
-                        # 使用指数衰减函数，确保相似度在0-1之间
-                        similarity_score = 1.0 / (1.0 + distance)
-                    
-                    # 应用相似度阈值
-                    if similarity_score < query.similarity_threshold:
-                        continue
-                        
-                    chunk = KnowledgeChunk(
-                        chunk_id=chunk_id,
-                        content=document,
-                        metadata=metadata
-                    )
-                    
-                    result = SearchResult(
-                        chunk=chunk,
-                        similarity_score=similarity_score,
-                        rank=i + 1
-                    )
-                    
-                    search_results.append(result)
-                    
+            search_results = (await self.search_batch([query]))[0]
             self.logger.info(f"搜索完成: {query.query_text}, 结果数: {len(search_results)}")
             return search_results
             
@@ -287,6 +381,100 @@ class VectorStore:
             self.logger.error(f"搜索失败: {query.query_text}, 错误: {e}")
             raise
             
+    async def search_batch(self, queries: List[SearchQuery]) -> List[List[SearchResult]]:
+        """
+        批量语义搜索，过滤条件和返回数量相同的查询合并为一次向量查询
+        
+        Args:
+            queries: 搜索查询列表
+            
+        Returns:
+            List[List[SearchResult]]: 与queries一一对应的搜索结果列表
+        """
+        self.stats["total_queries"] += len(queries)
+        
+        # 查询嵌入与其他并发请求合批计算
+        embeddings = await self.embed_batcher.embed_many([query.query_text for query in queries])
+        
+        # 按查询条件分组
+        groups: Dict[Tuple[str, int], List[int]] = {}
+        for i, query in enumerate(queries):
+            where_key = json.dumps(self._build_where_conditions(query), sort_keys=True)
+            groups.setdefault((where_key, query.top_k), []).append(i)
+            
+        batch_results: List[List[SearchResult]] = [[] for _ in queries]
+        for (where_key, top_k), indices in groups.items():
+            where_conditions = json.loads(where_key)
+            
+            # 执行向量搜索（一次调用完成整组查询的检索）
+            results = await asyncio.to_thread(
+                self.collection.query,
+                query_embeddings=[embeddings[i] for i in indices],
+                n_results=top_k,
+                where=where_conditions if where_conditions else None
+            )
+            
+            for row, i in enumerate(indices):
+                batch_results[i] = self._parse_query_results(results, row, queries[i].similarity_threshold)
+                
+        return batch_results
+        
+    def _build_where_conditions(self, query: SearchQuery) -> Dict[str, Any]:
+        """构建查询过滤条件"""
+        where_conditions = {}
+        
+        # 添加领域过滤 - 修复ChromaDB查询语法
+        if query.domain:
+            # ChromaDB不支持$contains，改用$eq或直接匹配
+            where_conditions["topics"] = query.domain
+            
+        # 添加自定义过滤条件
+        if query.filters:
+            where_conditions.update(query.filters)
+            
+        return where_conditions
+        
+    def _parse_query_results(self, results: Dict[str, Any], row: int,
+                             similarity_threshold: float) -> List[SearchResult]:
+        """解析一条查询的搜索结果"""
+        search_results = []
+        
+        if results['ids'] and results['ids'][row]:
+            for i, (chunk_id, document, metadata, distance) in enumerate(zip(
+                results['ids'][row],
+                results['documents'][row], 
+                results['metadatas'][row],
+                results['distances'][row]
+            )):
+                # 修复相似度计算 - ChromaDB使用的是欧几里得距离
+                # 对于欧几里得距离，我们需要将其转换为相似度分数
+                # 使用倒数关系，距离越小相似度越高
+                if distance == 0:
+                    similarity_score = 1.0
+                else:
+                    # 使用指数衰减函数，确保相似度在0-1之间
+                    similarity_score = 1.0 / (1.0 + distance)
+                
+                # 应用相似度阈值
+                if similarity_score < similarity_threshold:
+                    continue
+                    
+                chunk = KnowledgeChunk(
+                    chunk_id=chunk_id,
+                    content=document,
+                    metadata=metadata
+                )
+                
+                result = SearchResult(
+                    chunk=chunk,
+                    similarity_score=similarity_score,
+                    rank=i + 1
+                )
+                
+                search_results.append(result)
+                
+        return search_results
+            
     async def get_similar_chunks(self, chunk_id: str, top_k: int = 5) -> List[SearchResult]:
         """
         获取相似的知识块
@@ -339,7 +527,11 @@ class VectorStore:
         """
         try:
             # 获取现有数据
-            existing = self.collection.get(ids=[chunk_id], include=['documents', 'metadatas'])
+            existing = await asyncio.to_thread(
+                self.collection.get,
+                ids=[chunk_id],
+                include=['documents', 'metadatas']
+            )
             
             if not existing['ids']:
                 self.logger.warning(f"找不到知识块: {chunk_id}")
@@ -354,11 +546,11 @@ class VectorStore:
                 
             new_metadata['updated_at'] = datetime.now().isoformat()
             
-            # 删除旧数据
-            self.collection.delete(ids=[chunk_id])
-            
-            # 添加新数据
-            self.collection.add(
+            # 单次upsert原地替换，并发读取不会看到知识块被删除的中间状态；
+            # 元数据可能影响文档信息，递增版本号后本地文档索引也在下次读取时重建
+            await asyncio.to_thread(
+                self._locked,
+                self.collection.upsert,
                 ids=[chunk_id],
                 documents=[new_content],
                 metadatas=[new_metadata]
@@ -382,9 +574,11 @@ class VectorStore:
             int: 删除的知识块数量
         """
         try:
-            # 查找文档的所有知识块
-            results = self.collection.get(
-                where={"document_id": document_id}
+            # 查找文档的所有知识块（只需要ID），阻塞调用放到线程中执行
+            results = await asyncio.to_thread(
+                self.collection.get,
+                where={"document_id": document_id},
+                include=[]
             )
             
             if not results['ids']:
@@ -394,12 +588,16 @@ class VectorStore:
             chunk_ids = results['ids']
             
             # 批量删除
-            self.collection.delete(ids=chunk_ids)
+            version = await asyncio.to_thread(self._locked, self.collection.delete, ids=chunk_ids)
             
             # 更新统计信息
             self.stats["total_chunks"] -= len(chunk_ids)
             self.stats["last_updated"] = datetime.now().isoformat()
             
+            # 更新文档索引
+            self._doc_index.pop(document_id, None)
+            self._doc_index_applied(version)
+            
             self.logger.info(f"成功删除文档: {document_id}, 知识块数: {len(chunk_ids)}")
             return len(chunk_ids)
             
@@ -465,6 +663,94 @@ class VectorStore:
             self.logger.error(f"获取领域文档失败: {domain}, 错误: {e}")
             return []
             
+    async def list_documents(self) -> List[Dict[str, Any]]:
+        """
+        获取已入库的文档列表
+        
+        Returns:
+            List[Dict[str, Any]]: 文档信息列表（含知识块数量）
+        """
+        # 其他worker进程写入过数据时（共享版本号变化），在线程中从ChromaDB重建文档索引
+        if self._current_data_version() != self._doc_index_version:
+            async with self._doc_index_lock:
+                if self._current_data_version() != self._doc_index_version:
+                    await asyncio.to_thread(self._build_document_index)
+        return [dict(info) for info in self._doc_index.values()]
+        
+    def _index_chunks(self, metadatas: List[Dict[str, Any]], doc_index: Dict[str, Dict[str, Any]] = None):
+        """将一批知识块计入文档索引（默认为当前索引）"""
+        doc_ids = [metadata.get('document_id') for metadata in metadatas]
+        counts = Counter(doc_id for doc_id in doc_ids if doc_id)
+        
+        # 每个文档只用首个知识块的元数据建立基础记录
+        if doc_index is None:
+            doc_index = self._doc_index
+        for doc_id, metadata in zip(doc_ids, metadatas):
+            if doc_id and doc_id not in doc_index:
+                doc_index[doc_id] = {
+                    'document_id': doc_id,
+                    'source_file': metadata.get('source_file', 'Unknown'),
+                    'file_type': metadata.get('file_type', 'Unknown'),
+                    'document_title': metadata.get('document_title', ''),
+                    'created_at': metadata.get('created_at', ''),
+                    'keywords': metadata.get('keywords', ''),
+                    'topics': metadata.get('topics', ''),
+                    'chunk_count': 0
+                }
+                
+        for doc_id, count in counts.items():
+            doc_index[doc_id]['chunk_count'] += count
+        
+    def _build_document_index(self, page_size: int = 10000):
+        """分页读取元数据构建文档索引（不读取文档内容，可在线程中执行）"""
+        # 先读取版本号：构建期间若有其他进程写入，下次读取时会再次重建
+        version = self._read_data_version()
+        # 构建完成后整体替换，读取方不会看到构建到一半的索引
+        doc_index: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=['metadatas'], limit=page_size, offset=offset)
+            metadatas = page['metadatas']
+            self._index_chunks(metadatas, doc_index)
+            if len(metadatas) < page_size:
+                break
+            offset += page_size
+        self._doc_index = doc_index
+        self._doc_index_version = version
+        
+    def _current_data_version(self) -> int:
+        """共享的数据版本号；版本文件未被替换时返回缓存值，不读取文件"""
+        try:
+            st = os.stat(self._version_path)
+        except FileNotFoundError:
+            return 0
+        # 每次写入都通过 os.replace 生成新文件，inode或修改时间随之变化
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._version_file_key:
+            self._version_cached = self._read_data_version()
+            self._version_file_key = key
+        return self._version_cached
+        
+    def _read_data_version(self) -> int:
+        """读取共享的数据版本号"""
+        try:
+            return int(self._version_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+            
+    def _bump_data_version(self) -> int:
+        """递增共享的数据版本号（调用方持有写锁），返回递增前的版本号"""
+        version = self._read_data_version()
+        tmp_path = self._version_path.with_suffix(".tmp")
+        tmp_path.write_text(str(version + 1))
+        os.replace(tmp_path, self._version_path)
+        return version
+        
+    def _doc_index_applied(self, version: int):
+        """本进程已把版本号 version 之后的写入同步到文档索引；索引此前为最新时仍记为最新"""
+        if version == self._doc_index_version:
+            self._doc_index_version = version + 1
+            
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
         try:
@@ -530,6 +816,26 @@ class VectorStore:
             self.logger.error(f"数据库备份失败: {e}")
             return False
             
+    @contextmanager
+    def _write_lock(self):
+        """跨进程写锁（多worker部署时保护ChromaDB持久化目录）"""
+        if fcntl is None:
+            yield
+            return
+            
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                
+    def _locked(self, func, *args, **kwargs) -> int:
+        """在写锁内执行阻塞的写操作并递增数据版本号，返回写入前的版本号（供 asyncio.to_thread 使用）"""
+        with self._write_lock():
+            func(*args, **kwargs)
+            return self._bump_data_version()
+            
     def _generate_chunk_id(self, document_id: str, chunk_index: int) -> str:
         """生成知识块ID"""
         content = f"{document_id}_{chunk_index}_{datetime.now().isoformat()}"
@@ -538,7 +844,7 @@ class VectorStore:
     async def reset_database(self) -> bool:
         """重置数据库（危险操作）"""
         try:
-            self.chroma_client.reset()
+            await asyncio.to_thread(self._locked, self.chroma_client.reset)
             self._init_chromadb()
             
             self.stats = {
@@ -553,6 +859,10 @@ class VectorStore:
         except Exception as e:
             self.logger.error(f"数据库重置失败: {e}")
             return False
+            
+    async def close(self):
+        """关闭向量数据库（停止后台合批任务）"""
+        await self.embed_batcher.stop()
 
 # 使用示例
 async def main():
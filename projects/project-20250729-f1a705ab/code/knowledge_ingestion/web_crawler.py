@@ -49,8 +49,6 @@ except ImportError:
     NLP_AVAILABLE = False
 
 # 本地模块
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
 from knowledge_ingestion.document_parser import ExtractedContent, DocumentParseResult, DocumentMetadata
 
 @dataclass
@@ -367,18 +365,21 @@ class WebCrawler:
         to_visit = [(base_url, 0)]  # (url, depth)
         visited = set()
         
-        while to_visit and len(discovered_urls) < self.config.max_pages:
-            current_url, depth = to_visit.pop(0)
-            
-            if current_url in visited or depth > max_depth:
-                continue
+        # 整个发现过程复用同一个会话，保持连接池和keep-alive
+        async with aiohttp.ClientSession(
+            headers={"User-Agent": self.config.user_agent},
+            timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds)
+        ) as session:
+            while to_visit and len(discovered_urls) < self.config.max_pages:
+                current_url, depth = to_visit.pop(0)
                 
-            visited.add(current_url)
-            
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(current_url, 
-                                         timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds)) as response:
+                if current_url in visited or depth > max_depth:
+                    continue
+                    
+                visited.add(current_url)
+                
+                try:
+                    async with session.get(current_url) as response:
                         if response.status == 200:
                             html = await response.text()
                             soup = BeautifulSoup(html, 'html.parser')
@@ -395,12 +396,12 @@ class WebCrawler:
                                     if depth < max_depth:
                                         to_visit.append((absolute_url, depth + 1))
                                         
-            except Exception as e:
-                self.logger.error(f"URL发现失败: {current_url}, 错误: {e}")
+                except Exception as e:
+                    self.logger.error(f"URL发现失败: {current_url}, 错误: {e}")
+                    
+                # 添加延迟
+                await asyncio.sleep(self.config.delay_seconds)
                 
-            # 添加延迟
-            await asyncio.sleep(self.config.delay_seconds)
-            
         return list(discovered_urls)
         
     async def create_crawl_task(self, 
@@ -7,7 +7,7 @@
 import os
 import json
 import asyncio
-import aiohttp
+import httpx
 from typing import Dict, List, Any, Optional, Union, AsyncGenerator
 from dataclasses import dataclass, asdict
 from datetime import datetime
@@ -97,11 +97,19 @@ class DeepSeekClient:
         if not self.api_key:
             raise ValueError("DeepSeek API密钥未设置，请设置DEEPSEEK_API_KEY环境变量或传入api_key参数")
             
+        # 进程内复用的HTTP连接池（HTTP/2多路复用，保持长连接避免重复TLS握手）
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+        
         # 配置OpenAI客户端以兼容DeepSeek API
         self.client = openai.AsyncOpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
-            timeout=self.timeout
+            timeout=self.timeout,
+            http_client=self._http
         )
         
         self.logger = logging.getLogger(__name__)
@@ -112,6 +120,10 @@ class DeepSeekClient:
         # 请求历史（用于调试和监控）
         self.request_history: List[Dict[str, Any]] = []
         
+    async def close(self):
+        """关闭HTTP连接池"""
+        await self._http.aclose()
+        
     async def chat_completion(self,
                             messages: List[ChatMessage],
                             config: GenerationConfig = None) -> ChatResponse:
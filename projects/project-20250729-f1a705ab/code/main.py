@@ -19,7 +19,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "code"))
 
 # 导入各个模块
-from web_interface.api_server import app, initialize_system
+from web_interface.api_server import app
 from knowledge_ingestion.document_parser import DocumentParser
 from knowledge_ingestion.web_crawler import WebCrawler, CrawlConfig
 from knowledge_base.vector_store import VectorStore
@@ -99,7 +99,9 @@ class KnowledgeQASystem:
             "server": {
                 "host": "0.0.0.0",
                 "port": 8000,
-                "workers": 1
+                "workers": 1,
+                "loop": "uvloop",
+                "http": "httptools"
             },
             "deepseek": {
                 "timeout": 60,
@@ -213,8 +215,14 @@ class KnowledgeQASystem:
             self.logger.error(f"系统组件初始化失败: {e}")
             raise
             
-    async def start_api_server(self):
-        """启动API服务器"""
+    def start_api_server(self):
+        """
+        启动API服务器
+        
+        组件由应用的startup事件在每个worker进程内初始化。
+        生产环境也可以使用gunicorn部署:
+            PRELOAD_SHARED=true gunicorn web_interface.api_server:app -k uvicorn.workers.UvicornWorker -w N --preload
+        """
         try:
             import uvicorn
             
@@ -223,9 +231,6 @@ class KnowledgeQASystem:
             self.logger.info(f"启动API服务器...")
             self.logger.info(f"地址: http://{server_config.get('host', '0.0.0.0')}:{server_config.get('port', 8000)}")
             
-            # 初始化FastAPI应用的组件
-            await initialize_system()
-            
             # 启动服务器
             uvicorn.run(
                 "web_interface.api_server:app",
@@ -233,6 +238,8 @@ class KnowledgeQASystem:
                 port=server_config.get("port", 8000),
                 reload=server_config.get("reload", False),
                 workers=server_config.get("workers", 1),
+                loop=server_config.get("loop", "uvloop"),
+                http=server_config.get("http", "httptools"),
                 log_level=self.config.get("system", {}).get("log_level", "INFO").lower()
             )
             
@@ -426,6 +433,7 @@ def main():
     parser.add_argument("--document-dir", "-d", default=None, help="文档目录 (process模式)")
     parser.add_argument("--port", "-p", type=int, default=None, help="服务器端口")
     parser.add_argument("--host", default=None, help="服务器地址")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="服务器worker进程数")
     
     args = parser.parse_args()
     
@@ -441,10 +449,12 @@ def main():
         system.config.setdefault("server", {})["port"] = args.port
     if args.host:
         system.config.setdefault("server", {})["host"] = args.host
+    if args.workers:
+        system.config.setdefault("server", {})["workers"] = args.workers
         
     try:
         if args.mode == "server":
-            asyncio.run(system.start_api_server())
+            system.start_api_server()
         elif args.mode == "interactive":
             asyncio.run(system.run_interactive_mode())
         elif args.mode == "process":
@@ -10,11 +10,8 @@ from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
-from pathlib import Path
 
 # 本地模块
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
 from llm_integration.deepseek_client import DeepSeekClient, ChatMessage, MessageRole, GenerationConfig
 from knowledge_base.vector_store import VectorStore, SearchQuery, SearchResult
 from domain_adapters.base_adapter import DomainAdapter
@@ -120,79 +117,146 @@ class AnswerGenerator:
             # 1. 知识检索
             relevant_knowledge = await self._retrieve_knowledge(context)
             
-            # 2. 构建上下文
-            generation_context = await self._build_generation_context(
-                context, relevant_knowledge
-            )
-            
-            # 3. 生成答案
-            answer_result = await self._generate_with_llm(
-                context, generation_context, relevant_knowledge
-            )
-            
-            # 4. 后处理和验证
-            answer_result = await self._post_process_answer(
-                answer_result, context, relevant_knowledge
-            )
-            
-            # 5. 缓存结果
-            self.answer_cache[cache_key] = answer_result
-            
-            # 6. 记录历史
-            self._record_qa_history(context, answer_result)
-            
-            self.logger.info(f"答案生成完成，置信度: {answer_result.confidence:.3f}")
-            return answer_result
+            # 2-6. 生成、后处理、缓存并记录
+            return await self._complete_answer(context, relevant_knowledge)
             
         except Exception as e:
             self.logger.error(f"答案生成失败: {e}")
+            return self._error_answer()
             
-            # 返回错误答案
-            return AnswerResult(
-                answer="抱歉，我无法生成答案，请稍后重试。",
-                confidence=0.0,
-                sources=[],
-                reasoning_steps=["答案生成过程中出现错误"]
-            )
+    async def generate_answers_batch(self,
+                                     contexts: List[QuestionContext],
+                                     llm_semaphore: Optional[asyncio.Semaphore] = None) -> List[AnswerResult]:
+        """
+        批量生成答案：知识检索合并为批量向量查询，大模型调用并发执行
+        
+        Args:
+            contexts: 问题上下文列表
+            llm_semaphore: 限制同时进行的大模型调用数（每个问题占用一个名额）
+            
+        Returns:
+            List[AnswerResult]: 与contexts一一对应的答案结果
+        """
+        results: List[Optional[AnswerResult]] = [None] * len(contexts)
+        
+        # 检查缓存
+        pending = []
+        for i, context in enumerate(contexts):
+            cached_answer = self.answer_cache.get(self._generate_cache_key(context))
+            if cached_answer:
+                results[i] = cached_answer
+            else:
+                pending.append(i)
+                
+        if pending:
+            self.logger.info(f"批量生成答案: {len(pending)} 个问题")
+            knowledge_batch = await self._retrieve_knowledge_batch([contexts[i] for i in pending])
+            
+            async def complete(context: QuestionContext, knowledge: List[SearchResult]) -> AnswerResult:
+                try:
+                    if llm_semaphore is None:
+                        return await self._complete_answer(context, knowledge)
+                    async with llm_semaphore:
+                        return await self._complete_answer(context, knowledge)
+                except Exception as e:
+                    self.logger.error(f"答案生成失败: {e}")
+                    return self._error_answer()
+                    
+            answers = await asyncio.gather(*(
+                complete(contexts[i], knowledge)
+                for i, knowledge in zip(pending, knowledge_batch)
+            ))
+            for i, answer in zip(pending, answers):
+                results[i] = answer
+                
+        return results
+        
+    async def _complete_answer(self,
+                               context: QuestionContext,
+                               relevant_knowledge: List[SearchResult]) -> AnswerResult:
+        """基于检索到的知识完成答案生成"""
+        # 2. 构建上下文
+        generation_context = await self._build_generation_context(
+            context, relevant_knowledge
+        )
+        
+        # 3. 生成答案
+        answer_result = await self._generate_with_llm(
+            context, generation_context, relevant_knowledge
+        )
+        
+        # 4. 后处理和验证
+        answer_result = await self._post_process_answer(
+            answer_result, context, relevant_knowledge
+        )
+        
+        # 5. 缓存结果
+        self.answer_cache[self._generate_cache_key(context)] = answer_result
+        
+        # 6. 记录历史
+        self._record_qa_history(context, answer_result)
+        
+        self.logger.info(f"答案生成完成，置信度: {answer_result.confidence:.3f}")
+        return answer_result
+        
+    def _error_answer(self) -> AnswerResult:
+        """生成失败时返回的答案"""
+        return AnswerResult(
+            answer="抱歉，我无法生成答案，请稍后重试。",
+            confidence=0.0,
+            sources=[],
+            reasoning_steps=["答案生成过程中出现错误"]
+        )
             
     async def _retrieve_knowledge(self, context: QuestionContext) -> List[SearchResult]:
         """检索相关知识"""
+        return (await self._retrieve_knowledge_batch([context]))[0]
+        
+    async def _retrieve_knowledge_batch(self, contexts: List[QuestionContext]) -> List[List[SearchResult]]:
+        """批量检索相关知识"""
         try:
             # 构建搜索查询
-            search_query = SearchQuery(
-                query_text=context.question,
-                top_k=self.config.top_k_results,
-                similarity_threshold=self.config.similarity_threshold,
-                domain=context.domain
-            )
+            search_queries = [
+                SearchQuery(
+                    query_text=context.question,
+                    top_k=self.config.top_k_results,
+                    similarity_threshold=self.config.similarity_threshold,
+                    domain=context.domain
+                )
+                for context in contexts
+            ]
             
             # 执行搜索
-            search_results = await self.vector_store.search(search_query)
+            batch_results = await self.vector_store.search_batch(search_queries)
             
             # 如果结果不足且启用了通用回退，进行通用搜索
-            if (len(search_results) < 2 and 
-                self.config.fallback_to_general and 
-                context.domain):
-                
-                general_query = SearchQuery(
-                    query_text=context.question,
-                    top_k=self.config.top_k_results,
-                    similarity_threshold=self.config.similarity_threshold * 0.8,
-                    domain=""  # 不限制领域
-                )
+            fallback_indices = [
+                i for i, (context, search_results) in enumerate(zip(contexts, batch_results))
+                if len(search_results) < 2 and self.config.fallback_to_general and context.domain
+            ]
+            if fallback_indices:
+                general_queries = [
+                    SearchQuery(
+                        query_text=contexts[i].question,
+                        top_k=self.config.top_k_results,
+                        similarity_threshold=self.config.similarity_threshold * 0.8,
+                        domain=""  # 不限制领域
+                    )
+                    for i in fallback_indices
+                ]
                 
-                general_results = await self.vector_store.search(general_query)
+                general_batch = await self.vector_store.search_batch(general_queries)
                 
                 # 合并结果，优先领域相关的
-                search_results.extend(general_results)
-                search_results = search_results[:self.config.top_k_results]
-                
-            self.logger.info(f"检索到 {len(search_results)} 个相关知识块")
-            return search_results
+                for i, general_results in zip(fallback_indices, general_batch):
+                    batch_results[i] = (batch_results[i] + general_results)[:self.config.top_k_results]
+                    
+            self.logger.info(f"检索到 {sum(len(r) for r in batch_results)} 个相关知识块 ({len(contexts)} 个问题)")
+            return batch_results
             
         except Exception as e:
             self.logger.error(f"知识检索失败: {e}")
-            return []
+            return [[] for _ in contexts]
             
     async def _build_generation_context(self, 
                                       context: QuestionContext,
@@ -542,6 +606,112 @@ class AnswerGenerator:
         self.answer_cache.clear()
         self.logger.info("答案缓存已清理")
 
+class BatchedAnswerRunner:
+    """问答微批处理器：在短时间窗口内合并并发的问答请求，批量检索知识"""
+    
+    def __init__(self,
+                 answer_generator: AnswerGenerator,
+                 max_batch_size: int = 16,
+                 max_wait_ms: float = 10,
+                 llm_semaphore: Optional[asyncio.Semaphore] = None):
+        """
+        初始化微批处理器
+        
+        Args:
+            answer_generator: 答案生成器
+            max_batch_size: 单批最大请求数
+            max_wait_ms: 收到首个请求后等待合并的时间窗口(毫秒)
+            llm_semaphore: 限制同时进行的大模型调用数（在批内逐个问题获取，不限制排队的请求数）
+        """
+        self.answer_generator = answer_generator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.llm_semaphore = llm_semaphore
+        
+        self.logger = logging.getLogger(__name__)
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        
+    def start(self):
+        """启动后台合批任务"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+            
+    async def stop(self):
+        """停止后台合批任务：已分发的批次处理完成，尚未分发的请求以异常结束"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._fail_batch(pending, RuntimeError("问答批处理器已停止"))
+            
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+            
+    async def submit(self, context: QuestionContext) -> AnswerResult:
+        """
+        提交问题并等待答案
+        
+        Args:
+            context: 问题上下文
+            
+        Returns:
+            AnswerResult: 答案结果
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((context, future))
+        return await future
+        
+    async def _run(self):
+        """收集请求并按批次分发"""
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                if self.max_wait > 0:
+                    await asyncio.sleep(self.max_wait)
+            except asyncio.CancelledError:
+                # 停止时正在合并的批次同样以异常结束
+                self._fail_batch(batch, RuntimeError("问答批处理器已停止"))
+                raise
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                
+            # 批次在独立任务中处理，不阻塞下一批的收集
+            task = asyncio.create_task(self._process_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            
+    async def _process_batch(self, batch: List[Tuple[QuestionContext, asyncio.Future]]):
+        """处理一个批次"""
+        contexts = [context for context, _ in batch]
+        try:
+            results = await self.answer_generator.generate_answers_batch(contexts, self.llm_semaphore)
+        except Exception as e:
+            self.logger.error(f"批量问答失败: {e}")
+            self._fail_batch(batch, e)
+            return
+            
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+                
+    def _fail_batch(self, batch: List[Tuple[QuestionContext, asyncio.Future]], error: Exception):
+        """以异常结束批次中尚未完成的请求"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
 # 使用示例
 async def main():
     """测试答案生成器"""
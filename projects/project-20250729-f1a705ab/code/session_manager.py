@@ -5,61 +5,146 @@
 """
 
 import json
+import re
 import time
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from collections import OrderedDict, defaultdict, deque
+from itertools import islice
+from types import MappingProxyType
+from typing import Deque, Dict, List, Any, Optional, Set
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from pathlib import Path
 import logging
-import uuid
+import secrets
+import sqlite3
+import threading
 
-@dataclass
+# 问题中的指代词 / 延续词
+# 单字指代词按字符集合判断（"这个"、"那些"等多字词已被单字覆盖）
+_REFERENCE_CHARS = frozenset("它这那")
+_REFERENCE_RE = re.compile(r"刚才|上面|前面")
+_CONTINUATION_RE = re.compile(r"继续|详细|更多|进一步|具体|比如|例如")
+
+# 无元数据消息共享的只读空映射
+_EMPTY_METADATA = MappingProxyType({})
+
+# 会话持久化存储结构
+_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_active REAL NOT NULL,
+    context TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_active ON sessions (last_active);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON messages (session_id, ts);
+"""
+
+@dataclass(slots=True)
 class Message:
     """消息"""
     role: str  # 'user' 或 'assistant'
     content: str
-    timestamp: str = ""
+    timestamp: float = 0.0  # time.time() 时间戳
     metadata: Dict[str, Any] = None
     
     def __post_init__(self):
         if not self.timestamp:
-            self.timestamp = datetime.now().isoformat()
+            self.timestamp = time.time()
         if self.metadata is None:
             self.metadata = {}
+            
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化消息（时间戳格式化为ISO字符串）"""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            "metadata": dict(self.metadata)
+        }
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     """会话"""
     session_id: str
     user_id: str
-    created_at: str
-    last_active: str
-    messages: List[Message]
+    created_at: float  # time.time() 时间戳
+    last_active: float
+    messages: Deque[Message]
     context: Dict[str, Any] = None
     
     def __post_init__(self):
         if not self.created_at:
-            self.created_at = datetime.now().isoformat()
+            self.created_at = time.time()
         if not self.last_active:
             self.last_active = self.created_at
         if self.context is None:
             self.context = {}
+            
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化会话（时间字段格式化为ISO字符串）"""
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
+            "last_active": datetime.fromtimestamp(self.last_active).isoformat(),
+            "messages": [message.to_dict() for message in self.messages],
+            "context": dict(self.context)
+        }
 
 class SessionManager:
     """会话管理器"""
     
-    def __init__(self, max_sessions: int = 1000, session_timeout_hours: int = 24):
+    def __init__(self, max_sessions: int = 1000, session_timeout_hours: int = 24,
+                 max_history: int = 200, persist_path: Optional[str] = None):
         """
         初始化会话管理器
         
         Args:
-            max_sessions: 最大会话数量
+            max_sessions: 最大会话数量（启用持久化时为内存中热会话的数量）
             session_timeout_hours: 会话超时时间(小时)
+            max_history: 每个会话保留的最大消息数量
+            persist_path: 可选的SQLite数据库路径，提供时会话和消息持久化到磁盘，
+                内存中只缓存最近活跃的会话
         """
         self.max_sessions = max_sessions
-        self.session_timeout = timedelta(hours=session_timeout_hours)
-        self.sessions: Dict[str, Session] = {}
+        self.max_history = max_history
+        self.session_timeout = timedelta(hours=session_timeout_hours).total_seconds()
+        # 按最后活跃时间排序（LRU），最久未活跃的会话在最前
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        # 用户ID -> 会话ID集合的二级索引
+        self._user_index: Dict[str, Set[str]] = defaultdict(set)
+        # 增量维护的统计计数
+        self._total_messages = 0
+        # LRU顺序、用户索引和统计计数在所有会话间共享，统一由一把锁保护；
+        # 临界区均为O(1)/O(k)操作，持锁时间很短
+        self._lock = threading.RLock()
         self.logger = logging.getLogger(__name__)
         
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            self._db = self._open_store(persist_path)
+            
+    @staticmethod
+    def _open_store(persist_path: str) -> sqlite3.Connection:
+        """打开会话持久化存储"""
+        Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+        # 所有访问都在 self._lock 内进行，可跨线程共享连接
+        db = sqlite3.connect(persist_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_STORE_SCHEMA)
+        return db
+        
     def create_session(self, user_id: str, session_id: str = None) -> str:
         """
         创建新会话
@@ -72,22 +157,35 @@ class SessionManager:
             str: 会话ID
         """
         if not session_id:
-            session_id = str(uuid.uuid4())
+            # 会话ID会返回给客户端用于访问历史，需保持不可预测
+            session_id = secrets.token_hex(16)
             
+        now = time.time()
         session = Session(
             session_id=session_id,
             user_id=user_id,
-            created_at=datetime.now().isoformat(),
-            last_active=datetime.now().isoformat(),
-            messages=[]
+            created_at=now,
+            last_active=now,
+            messages=deque(maxlen=self.max_history)
         )
         
-        self.sessions[session_id] = session
-        self.logger.info(f"创建新会话: {session_id} (用户: {user_id})")
-        
-        # 清理过期会话
-        self._cleanup_expired_sessions()
-        
+        with self._lock:
+            if session_id in self.sessions:
+                self._remove_session(session_id)
+            if self._db:
+                with self._db:
+                    self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, '{}')",
+                        (session_id, user_id, now, now)
+                    )
+            self.sessions[session_id] = session
+            self._user_index[user_id].add(session_id)
+            
+            # 清理过期会话
+            self._cleanup_expired_sessions()
+            
+        self.logger.info("创建新会话: %s (用户: %s)", session_id, user_id)
         return session_id
         
     def get_session(self, session_id: str) -> Optional[Session]:
@@ -100,20 +198,32 @@ class SessionManager:
         Returns:
             Optional[Session]: 会话对象，如果不存在则返回None
         """
-        session = self.sessions.get(session_id)
-        
-        if session:
-            # 检查是否过期
-            last_active = datetime.fromisoformat(session.last_active)
-            if datetime.now() - last_active > self.session_timeout:
-                self.logger.info(f"会话已过期: {session_id}")
-                del self.sessions[session_id]
+        with self._lock:
+            session = self.sessions.get(session_id)
+            cached = session is not None
+            if not cached and self._db:
+                # 冷会话：从持久化存储加载
+                session = self._load_session(session_id)
+            if session is None:
+                return None
+                
+            # 检查是否过期（冷会话在放入内存缓存前检查，过期时只需删除磁盘记录）
+            now = time.time()
+            if now - session.last_active > self.session_timeout:
+                self.logger.info("会话已过期: %s", session_id)
+                if cached:
+                    self._remove_session(session_id)
+                self._delete_persisted(session_id)
                 return None
                 
             # 更新最后活跃时间
-            session.last_active = datetime.now().isoformat()
+            session.last_active = now
+            if cached:
+                self.sessions.move_to_end(session_id)
+            else:
+                self._cache_session(session)
             
-        return session
+            return session
         
     def add_message(self, session_id: str, role: str, content: str, metadata: Dict[str, Any] = None) -> bool:
         """
@@ -128,23 +238,44 @@ class SessionManager:
         Returns:
             bool: 是否成功添加
         """
-        session = self.get_session(session_id)
-        if not session:
-            self.logger.warning(f"会话不存在: {session_id}")
-            return False
-            
-        message = Message(
-            role=role,
-            content=content,
-            metadata=metadata or {}
-        )
+        message = self._make_message(role, content, metadata)
         
-        session.messages.append(message)
-        session.last_active = datetime.now().isoformat()
-        
-        self.logger.debug(f"添加消息到会话 {session_id}: {role}")
+        with self._lock:
+            session = self.get_session(session_id)
+            if not session:
+                self.logger.warning("会话不存在: %s", session_id)
+                return False
+                
+            # 历史已满时，deque会自动丢弃最旧的消息
+            if len(session.messages) < self.max_history:
+                self._total_messages += 1
+            session.messages.append(message)
+            
+            if self._db:
+                with self._db:
+                    self._db.execute(
+                        "INSERT INTO messages VALUES (?, ?, ?, ?, ?)",
+                        (session_id, message.timestamp, role, content,
+                         json.dumps(metadata or {}, ensure_ascii=False, default=str))
+                    )
+                    self._db.execute(
+                        "UPDATE sessions SET last_active = ? WHERE session_id = ?",
+                        (session.last_active, session_id)
+                    )
+            
+        self.logger.debug("添加消息到会话 %s: %s", session_id, role)
         return True
         
+    @staticmethod
+    def _make_message(role: str, content: str, metadata: Optional[Dict[str, Any]]) -> Message:
+        """热路径上构造消息，跳过dataclass的__init__/__post_init__"""
+        message = object.__new__(Message)
+        message.role = role
+        message.content = content
+        message.timestamp = time.time()
+        message.metadata = metadata or _EMPTY_METADATA
+        return message
+        
     def get_conversation_history(self, session_id: str, limit: int = 10) -> List[Dict[str, str]]:
         """
         获取对话历史
@@ -156,22 +287,29 @@ class SessionManager:
         Returns:
             List[Dict[str, str]]: 对话历史
         """
-        session = self.get_session(session_id)
-        if not session:
-            return []
-            
-        # 获取最近的消息
-        recent_messages = session.messages[-limit:] if limit > 0 else session.messages
-        
-        # 转换为对话历史格式
-        history = []
-        for message in recent_messages:
-            history.append({
-                message.role: message.content,
-                "timestamp": message.timestamp
-            })
+        with self._lock:
+            session = self.get_session(session_id)
+            if not session:
+                return []
+            recent_messages = self._get_recent_messages(session, limit)
             
-        return history
+        return self._format_history(recent_messages)
+        
+    @staticmethod
+    def _get_recent_messages(session: Session, limit: int) -> List[Message]:
+        """获取会话最近的原始消息对象"""
+        messages = session.messages
+        start = max(0, len(messages) - limit) if limit > 0 else 0
+        return list(islice(messages, start, None))
+        
+    @staticmethod
+    def _format_history(messages: List[Message]) -> List[Dict[str, str]]:
+        """将消息转换为对话历史格式"""
+        fromtimestamp = datetime.fromtimestamp
+        return [
+            {message.role: message.content, "timestamp": fromtimestamp(message.timestamp).isoformat()}
+            for message in messages
+        ]
         
     def get_context_for_question(self, session_id: str, question: str) -> Dict[str, Any]:
         """
@@ -184,28 +322,31 @@ class SessionManager:
         Returns:
             Dict[str, Any]: 上下文信息
         """
-        session = self.get_session(session_id)
-        if not session:
-            return {}
+        with self._lock:
+            session = self.get_session(session_id)
+            if not session:
+                return {}
+                
+            # 获取对话历史
+            recent_messages = self._get_recent_messages(session, limit=6)  # 最近3轮对话
+            message_count = len(session.messages)
             
-        # 获取对话历史
-        history = self.get_conversation_history(session_id, limit=6)  # 最近3轮对话
-        
         # 构建上下文
         context = {
             "session_id": session_id,
             "user_id": session.user_id,
-            "conversation_history": history,
-            "session_context": session.context.copy(),
-            "message_count": len(session.messages)
+            "conversation_history": self._format_history(recent_messages),
+            # 只读视图，修改需通过 update_session_context
+            "session_context": MappingProxyType(session.context),
+            "message_count": message_count
         }
         
         # 分析问题中的上下文线索
-        context["question_analysis"] = self._analyze_question_context(question, history)
+        context["question_analysis"] = self._analyze_question_context(question, recent_messages)
         
         return context
         
-    def _analyze_question_context(self, question: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+    def _analyze_question_context(self, question: str, recent_messages: List[Message]) -> Dict[str, Any]:
         """分析问题的上下文线索"""
         analysis = {
             "has_reference": False,
@@ -214,27 +355,20 @@ class SessionManager:
         }
         
         # 检查问题中的指代词
-        reference_words = ["它", "这个", "那个", "刚才", "上面", "前面", "这", "那", "这些", "那些"]
-        if any(word in question for word in reference_words):
+        if not _REFERENCE_CHARS.isdisjoint(question) or _REFERENCE_RE.search(question):
             analysis["has_reference"] = True
             analysis["reference_type"] = "pronoun"
             
         # 检查问题中的"继续"、"详细"等词
-        continuation_words = ["继续", "详细", "更多", "进一步", "具体", "比如", "例如"]
-        if any(word in question for word in continuation_words):
+        if _CONTINUATION_RE.search(question):
             analysis["has_reference"] = True
             analysis["reference_type"] = "continuation"
             
-        # 从历史中提取相关主题
-        if history:
-            last_messages = history[-2:]  # 最近一轮对话
-            for msg in last_messages:
-                if 'assistant' in msg:
-                    # 简单的主题提取（可以用更复杂的NLP方法）
-                    content = msg['assistant']
-                    # 提取可能的主题词（这里简化处理）
-                    if len(content) > 50:
-                        analysis["related_topics"].append(content[:100])
+        # 从历史中提取相关主题（最近一轮对话）
+        for msg in recent_messages[-2:]:
+            # 简单的主题提取（可以用更复杂的NLP方法，这里简化处理）
+            if msg.role == 'assistant' and len(msg.content) > 50:
+                analysis["related_topics"].append(msg.content[:100])
                         
         return analysis
         
@@ -250,42 +384,50 @@ class SessionManager:
         Returns:
             bool: 是否成功更新
         """
-        session = self.get_session(session_id)
-        if not session:
-            return False
+        with self._lock:
+            session = self.get_session(session_id)
+            if not session:
+                return False
             
-        session.context[key] = value
-        session.last_active = datetime.now().isoformat()
-        return True
+            session.context[key] = value
+            if self._db:
+                self._persist_session(session)
+            return True
         
     def _cleanup_expired_sessions(self):
         """清理过期会话"""
-        current_time = datetime.now()
-        expired_sessions = []
-        
-        for session_id, session in self.sessions.items():
-            last_active = datetime.fromisoformat(session.last_active)
-            if current_time - last_active > self.session_timeout:
-                expired_sessions.append(session_id)
-                
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
-            self.logger.info(f"清理过期会话: {session_id}")
+        # 最后活跃时间早于该时刻的会话视为过期
+        cutoff = time.time() - self.session_timeout
+        
+        # 会话按最后活跃时间有序，遇到第一个未过期的会话即可停止
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_active >= cutoff:
+                break
+            self._remove_session(session_id)
+            self._delete_persisted(session_id)
+            self.logger.info("清理过期会话: %s", session_id)
             
-        # 如果会话数量过多，删除最旧的会话
-        if len(self.sessions) > self.max_sessions:
-            # 按最后活跃时间排序
-            sorted_sessions = sorted(
-                self.sessions.items(),
-                key=lambda x: x[1].last_active
-            )
+        if self._db:
+            # 清理磁盘上已过期的冷会话（内存中的热会话以内存状态为准）
+            rows = self._db.execute(
+                "SELECT session_id FROM sessions WHERE last_active < ?",
+                (cutoff,)
+            ).fetchall()
+            for (session_id,) in rows:
+                if session_id not in self.sessions:
+                    self._delete_persisted(session_id)
+                    self.logger.info("清理过期会话: %s", session_id)
             
-            # 删除最旧的会话
-            sessions_to_remove = len(self.sessions) - self.max_sessions
-            for i in range(sessions_to_remove):
-                session_id = sorted_sessions[i][0]
-                del self.sessions[session_id]
-                self.logger.info(f"清理旧会话: {session_id}")
+        # 如果会话数量过多，删除最旧的会话（LRU队首）；
+        # 启用持久化时只是移出内存，数据仍保留在磁盘上
+        while len(self.sessions) > self.max_sessions:
+            session_id = next(iter(self.sessions))
+            session = self._remove_session(session_id)
+            if self._db:
+                self._persist_session(session)
+            else:
+                self.logger.info("清理旧会话: %s", session_id)
                 
     def get_user_sessions(self, user_id: str) -> List[Session]:
         """
@@ -297,14 +439,24 @@ class SessionManager:
         Returns:
             List[Session]: 用户会话列表
         """
-        user_sessions = []
-        for session in self.sessions.values():
-            if session.user_id == user_id:
-                user_sessions.append(session)
+        with self._lock:
+            session_ids = self._user_index.get(user_id, ())
+            user_sessions = [self.sessions[session_id] for session_id in session_ids]
+            
+            if self._db:
+                # 补充仅存在于磁盘上的会话（不加载进内存缓存）
+                rows = self._db.execute(
+                    "SELECT session_id FROM sessions WHERE user_id = ?", (user_id,)
+                ).fetchall()
+                for (session_id,) in rows:
+                    if session_id not in self.sessions:
+                        session = self._load_session(session_id)
+                        if session:
+                            user_sessions.append(session)
                 
-        # 按最后活跃时间排序
-        user_sessions.sort(key=lambda x: x.last_active, reverse=True)
-        return user_sessions
+            # 按最后活跃时间排序
+            user_sessions.sort(key=lambda x: x.last_active, reverse=True)
+            return user_sessions
         
     def delete_session(self, session_id: str) -> bool:
         """
@@ -316,31 +468,108 @@ class SessionManager:
         Returns:
             bool: 是否成功删除
         """
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            self.logger.info(f"删除会话: {session_id}")
-            return True
-        return False
+        with self._lock:
+            removed = session_id in self.sessions
+            if removed:
+                self._remove_session(session_id)
+            if self._db:
+                removed = self._delete_persisted(session_id) or removed
+                
+        if removed:
+            self.logger.info("删除会话: %s", session_id)
+        return removed
+        
+    def _remove_session(self, session_id: str) -> Session:
+        """从会话表及用户索引中移除会话"""
+        session = self.sessions.pop(session_id)
+        self._total_messages -= len(session.messages)
+        user_sessions = self._user_index.get(session.user_id)
+        if user_sessions is not None:
+            user_sessions.discard(session_id)
+            if not user_sessions:
+                del self._user_index[session.user_id]
+        return session
         
-    def get_statistics(self) -> Dict[str, Any]:
-        """获取统计信息"""
-        active_sessions = len(self.sessions)
+    def _cache_session(self, session: Session):
+        """将会话放入内存缓存（LRU队尾）"""
+        self.sessions[session.session_id] = session
+        self._user_index[session.user_id].add(session.session_id)
+        self._total_messages += len(session.messages)
+        self._cleanup_expired_sessions()
+        
+    def _load_session(self, session_id: str) -> Optional[Session]:
+        """从持久化存储加载会话及其最近的消息"""
+        row = self._db.execute(
+            "SELECT user_id, created_at, last_active, context FROM sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+        if not row:
+            return None
+            
+        user_id, created_at, last_active, context = row
+        rows = self._db.execute(
+            "SELECT role, content, ts, metadata FROM messages WHERE session_id = ? "
+            "ORDER BY ts DESC LIMIT ?",
+            (session_id, self.max_history)
+        ).fetchall()
+        messages = deque(
+            (Message(role, content, ts, json.loads(metadata)) for role, content, ts, metadata in reversed(rows)),
+            maxlen=self.max_history
+        )
+        return Session(
+            session_id=session_id,
+            user_id=user_id,
+            created_at=created_at,
+            last_active=last_active,
+            messages=messages,
+            context=json.loads(context)
+        )
         
-        # 统计用户分布
-        user_counts = {}
-        total_messages = 0
+    def _persist_session(self, session: Session):
+        """将会话的活跃时间和上下文写回持久化存储"""
+        with self._db:
+            self._db.execute(
+                "UPDATE sessions SET last_active = ?, context = ? WHERE session_id = ?",
+                (session.last_active, json.dumps(session.context, ensure_ascii=False, default=str),
+                 session.session_id)
+            )
+            
+    def _delete_persisted(self, session_id: str) -> bool:
+        """从持久化存储删除会话及其消息"""
+        if not self._db:
+            return False
+        with self._db:
+            self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            cursor = self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+        
+    def close(self):
+        """将内存中的会话状态写回持久化存储并关闭连接"""
+        with self._lock:
+            if not self._db:
+                return
+            for session in self.sessions.values():
+                self._persist_session(session)
+            self._db.close()
+            self._db = None
         
-        for session in self.sessions.values():
-            user_id = session.user_id
-            user_counts[user_id] = user_counts.get(user_id, 0) + 1
-            total_messages += len(session.messages)
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            active_sessions = len(self.sessions)
+            total_messages = self._total_messages
             
-        return {
-            "active_sessions": active_sessions,
-            "total_users": len(user_counts),
-            "total_messages": total_messages,
-            "average_messages_per_session": total_messages / max(active_sessions, 1)
-        }
+            stats = {
+                "active_sessions": active_sessions,
+                "total_users": len(self._user_index),
+                "total_messages": total_messages,
+                "average_messages_per_session": total_messages / max(active_sessions, 1)
+            }
+            if self._db:
+                stats["persisted_sessions"] = self._db.execute(
+                    "SELECT COUNT(*) FROM sessions"
+                ).fetchone()[0]
+            return stats
 
 # 全局会话管理器实例
 global_session_manager = SessionManager()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+智能行业知识问答系统 - API服务简单测试
+验证统计缓存、按用户限流和ETag条件请求
+"""
+
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('SimpleAPIServerTest')
+
+def make_request(if_none_match: str = None):
+    """构造带If-None-Match请求头的请求"""
+    from starlette.requests import Request
+    
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+async def run_tests():
+    """执行测试，返回 (通过数, 总数)"""
+    tests_passed = 0
+    total_tests = 0
+    
+    from fastapi import HTTPException
+    from web_interface.api_server import (
+        TTLCache, RateLimiter, conditional_json_response, static_page_response
+    )
+    
+    # 测试1: 并发刷新合并为一次计算，失效或过期后重新计算
+    total_tests += 1
+    try:
+        logger.info("1. 测试统计缓存...")
+        
+        calls = 0
+        
+        async def factory():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"calls": calls}
+        
+        cache = TTLCache(ttl_seconds=0.1)
+        concurrent = await asyncio.gather(*(cache.get_or_set("stats", factory) for _ in range(10)))
+        calls_after_concurrent = calls
+        cache.invalidate("stats")
+        after_invalidate = await cache.get_or_set("stats", factory)
+        await asyncio.sleep(0.15)
+        after_expiry = await cache.get_or_set("stats", factory)
+        
+        if (calls_after_concurrent == 1 and all(value == {"calls": 1} for value in concurrent)
+                and after_invalidate == {"calls": 2} and after_expiry == {"calls": 3}):
+            logger.info("✓ 统计缓存正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 统计缓存不正确: calls={calls}")
+    except Exception as e:
+        logger.error(f"✗ 统计缓存测试失败: {e!r}")
+    
+    # 测试2: 令牌耗尽后返回429和Retry-After，不同用户互不影响
+    total_tests += 1
+    try:
+        logger.info("2. 测试按用户限流...")
+        
+        limiter = RateLimiter("3/minute", max_keys=2)
+        for _ in range(3):
+            limiter.check("user_a")
+        try:
+            limiter.check("user_a")
+            rejected = None
+        except HTTPException as e:
+            rejected = e
+        limiter.check("user_b")
+        limiter.check("user_c")
+        
+        if (rejected is not None and rejected.status_code == 429 and int(rejected.headers["Retry-After"]) >= 1
+                and list(limiter._buckets) == ["user_b", "user_c"]):
+            logger.info("✓ 按用户限流正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 按用户限流不正确: rejected={rejected}, keys={list(limiter._buckets)}")
+    except Exception as e:
+        logger.error(f"✗ 按用户限流测试失败: {e!r}")
+    
+    # 测试3: 内容未变化时返回304，内容变化后ETag随之变化
+    total_tests += 1
+    try:
+        logger.info("3. 测试ETag条件请求...")
+        
+        body = '{"supported_domains": ["医疗健康"]}'.encode()
+        first = conditional_json_response(make_request(), body)
+        etag = first.headers["etag"]
+        not_modified = conditional_json_response(make_request(f'"other", W/{etag}'), body)
+        changed = conditional_json_response(make_request(etag), body + b" ")
+        
+        with tempfile.TemporaryDirectory() as workdir:
+            page = Path(workdir) / "simple.html"
+            page.write_text("<html></html>", encoding="utf-8")
+            page_etag = static_page_response(make_request(), page).headers["etag"]
+            page_not_modified = static_page_response(make_request(page_etag), page)
+            page.write_text("<html>updated</html>", encoding="utf-8")
+            page_changed = static_page_response(make_request(page_etag), page)
+            missing = static_page_response(make_request(), Path(workdir) / "index.html")
+        
+        if (first.status_code == 200 and first.body == body and not_modified.status_code == 304
+                and changed.status_code == 200 and changed.headers["etag"] != etag
+                and page_not_modified.status_code == 304 and page_changed.status_code == 200
+                and page_changed.headers["etag"] != page_etag and missing is None):
+            logger.info("✓ ETag条件请求正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ ETag条件请求不正确: {not_modified.status_code}, {page_not_modified.status_code}")
+    except Exception as e:
+        logger.error(f"✗ ETag条件请求测试失败: {e!r}")
+    
+    return tests_passed, total_tests
+
+def main():
+    """主测试函数"""
+    logger.info("=== API服务简单测试 ===")
+    
+    tests_passed, total_tests = asyncio.run(run_tests())
+    
+    # 显示测试结果
+    logger.info("=== 测试结果 ===")
+    logger.info(f"总测试数: {total_tests}")
+    logger.info(f"通过数: {tests_passed}")
+    logger.info(f"失败数: {total_tests - tests_passed}")
+    
+    if tests_passed == total_tests:
+        logger.info("🎉 API服务测试全部通过！")
+        return True
+    else:
+        logger.warning(f"⚠️ {total_tests - tests_passed} 个测试失败")
+        return False
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        logger.info("测试被用户中断")
+        exit(1)
+    except Exception as e:
+        logger.error(f"测试执行异常: {e}")
+        exit(1)
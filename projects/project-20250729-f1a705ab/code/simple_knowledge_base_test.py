@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+智能行业知识问答系统 - 知识库简单测试
+验证FAISS索引的增删改查、并发检索、索引持久化和跨worker的文档列表
+（使用确定性的哈希嵌入代替真实模型，测试不需要下载模型）
+"""
+
+import asyncio
+import hashlib
+import logging
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('SimpleKnowledgeBaseTest')
+
+TEST_EMBEDDING_MODEL = "test-hash-embedding"
+
+class HashEmbedding:
+    """按文本哈希生成固定向量的嵌入模型（相同文本得到相同向量）"""
+    
+    dimension = 32
+    
+    def encode(self, texts, **kwargs):
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.md5(text.encode()).digest()[:4], "little")
+            vectors.append(np.random.default_rng(seed).standard_normal(self.dimension))
+        return np.asarray(vectors, dtype=np.float32)
+
+class SlowHashEmbedding(HashEmbedding):
+    """每次计算耗时固定的哈希嵌入模型，记录每批的文本数"""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.batch_sizes = []
+        
+    def encode(self, texts, **kwargs):
+        self.batch_sizes.append(len(texts))
+        time.sleep(self.delay)
+        return super().encode(texts, **kwargs)
+
+def chunk_text(document_id: str, index: int) -> str:
+    """测试知识块内容"""
+    return f"知识块内容 {document_id} 第{index}段，用于检索测试的文本"
+
+def make_document(document_id: str, chunk_count: int):
+    """构造文档解析结果"""
+    from knowledge_ingestion.document_parser import DocumentParseResult, DocumentMetadata, ExtractedContent
+    
+    metadata = DocumentMetadata(
+        file_path=f"{document_id}.txt",
+        file_name=f"{document_id}.txt",
+        file_type=".txt",
+        file_size=0,
+        created_at="",
+        modified_at="",
+        title=document_id
+    )
+    contents = [
+        ExtractedContent(content_id=f"{document_id}_{i}", content_type="text", content=chunk_text(document_id, i))
+        for i in range(chunk_count)
+    ]
+    return DocumentParseResult(document_id=document_id, metadata=metadata, extracted_contents=contents)
+
+async def run_tests():
+    """执行测试，返回 (通过数, 总数)"""
+    tests_passed = 0
+    total_tests = 0
+    
+    from knowledge_base import vector_store
+    from knowledge_base.vector_store import SearchQuery
+    from knowledge_base.faiss_store import FaissVectorStore
+    
+    vector_store._EMBEDDING_MODELS[TEST_EMBEDDING_MODEL] = HashEmbedding()
+    workdir = tempfile.mkdtemp(prefix="kb_test_")
+    
+    # nlist=4 时积累120个向量即训练索引
+    store = FaissVectorStore(
+        persist_directory=f"{workdir}/faiss",
+        embedding_model=TEST_EMBEDDING_MODEL,
+        nlist=4,
+        nprobe=4,
+        save_every=50
+    )
+    
+    # 测试1: 向量数达到训练要求后构建索引并可检索
+    total_tests += 1
+    try:
+        logger.info("1. 测试FAISS索引构建和检索...")
+        
+        added = await store.add_document(make_document("doc_a", 130))
+        results = await store.search(SearchQuery(query_text=chunk_text("doc_a", 7), top_k=3))
+        
+        if (added == 130 and store.faiss_index is not None and store.faiss_index.ntotal == 130
+                and results and results[0].chunk.metadata["chunk_index"] == 7):
+            logger.info("✓ FAISS索引构建和检索正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ FAISS检索不正确: added={added}, results={[r.chunk.chunk_id for r in results]}")
+    except Exception as e:
+        logger.error(f"✗ FAISS索引构建和检索测试失败: {e!r}")
+    
+    # 测试2: 索引变更按批持久化，关闭时写回剩余变更；重新打开时直接加载而不重建
+    total_tests += 1
+    try:
+        logger.info("2. 测试索引批量持久化...")
+        
+        saved_mtime = store._index_path.stat().st_mtime_ns
+        await store.add_document(make_document("doc_b", 10))
+        unsaved = store._unsaved_changes
+        unchanged_on_disk = store._index_path.stat().st_mtime_ns == saved_mtime
+        
+        await store.close()
+        
+        import faiss
+        on_disk = faiss.read_index(str(store._index_path)).ntotal
+        
+        # 重建会重新写入索引文件
+        closed_mtime = store._index_path.stat().st_mtime_ns
+        reopened = FaissVectorStore(
+            persist_directory=f"{workdir}/faiss",
+            embedding_model=TEST_EMBEDDING_MODEL,
+            nlist=4,
+            nprobe=4
+        )
+        loaded = (reopened.faiss_index is not None and reopened.faiss_index.ntotal == 140
+                  and reopened._index_path.stat().st_mtime_ns == closed_mtime)
+        await reopened.close()
+        
+        if unsaved == 10 and unchanged_on_disk and store._unsaved_changes == 0 and on_disk == 140 and loaded:
+            logger.info("✓ 索引批量持久化正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 索引持久化不正确: unsaved={unsaved}, on_disk={on_disk}, loaded={loaded}")
+    except Exception as e:
+        logger.error(f"✗ 索引批量持久化测试失败: {e!r}")
+    
+    # 测试3: 更新、增删与检索并发执行时，检索不出错且不会漏掉正在更新的知识块
+    total_tests += 1
+    try:
+        logger.info("3. 测试并发检索与索引修改...")
+        
+        target_id = (await store.search(SearchQuery(query_text=chunk_text("doc_a", 7), top_k=1)))[0].chunk.chunk_id
+        new_content = "更新后的知识块内容，用于验证更新期间仍可检索"
+        missed = 0
+        
+        async def search_loop():
+            nonlocal missed
+            for _ in range(30):
+                # top_k大于向量总数，结果应包含索引中的全部知识块
+                results = await store.search(SearchQuery(query_text=new_content, top_k=200))
+                if target_id not in {r.chunk.chunk_id for r in results}:
+                    missed += 1
+        
+        async def write_loop():
+            for i in range(5):
+                await store.add_document(make_document(f"doc_c{i}", 5))
+                await store.update_chunk(target_id, content=new_content if i % 2 == 0 else chunk_text("doc_a", 7))
+                await store.delete_document(f"doc_c{i}")
+        
+        await asyncio.gather(search_loop(), search_loop(), write_loop())
+        
+        if missed == 0 and store.faiss_index.ntotal == 140 and len(store._faiss_ids) == 140:
+            logger.info("✓ 并发检索与索引修改正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 并发检索不正确: missed={missed}, ntotal={store.faiss_index.ntotal}")
+    except Exception as e:
+        logger.error(f"✗ 并发检索与索引修改测试失败: {e!r}")
+    
+    await store.close()
+    
+    # 测试4: 多个worker进程共享持久化目录时，文档列表反映其他进程的写入
+    total_tests += 1
+    try:
+        logger.info("4. 测试跨worker文档列表...")
+        
+        from knowledge_base.vector_store import VectorStore
+        
+        worker_a = VectorStore(persist_directory=f"{workdir}/shared", embedding_model=TEST_EMBEDDING_MODEL)
+        worker_b = VectorStore(persist_directory=f"{workdir}/shared", embedding_model=TEST_EMBEDDING_MODEL)
+        
+        await worker_a.add_document(make_document("doc_x", 3))
+        await worker_a.add_document(make_document("doc_y", 2))
+        listed_by_b = {doc["document_id"]: doc["chunk_count"] for doc in await worker_b.list_documents()}
+        
+        # 版本文件未变化时不重复读取，也不重建文档索引
+        version_reads = 0
+        read_data_version = worker_b._read_data_version
+        
+        def counting_read():
+            nonlocal version_reads
+            version_reads += 1
+            return read_data_version()
+            
+        worker_b._read_data_version = counting_read
+        for _ in range(5):
+            await worker_b.list_documents()
+        del worker_b._read_data_version
+        
+        await worker_b.delete_document("doc_x")
+        listed_by_a = {doc["document_id"] for doc in await worker_a.list_documents()}
+        
+        # 本进程写入后文档索引同步更新，无需重建
+        a_in_sync = worker_a._doc_index_version == worker_a._read_data_version()
+        await worker_a.add_document(make_document("doc_z", 1))
+        a_still_in_sync = worker_a._doc_index_version == worker_a._read_data_version()
+        
+        await worker_a.reset_database()
+        listed_after_reset = await worker_a.list_documents()
+        
+        if (listed_by_b == {"doc_x": 3, "doc_y": 2} and version_reads == 0 and listed_by_a == {"doc_y"}
+                and a_in_sync and a_still_in_sync and listed_after_reset == []):
+            logger.info("✓ 跨worker文档列表正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 跨worker文档列表不正确: b={listed_by_b}, reads={version_reads}, "
+                         f"a={listed_by_a}, after_reset={listed_after_reset}")
+        
+        await worker_a.close()
+        await worker_b.close()
+    except Exception as e:
+        logger.error(f"✗ 跨worker文档列表测试失败: {e!r}")
+    
+    # 测试5: 并发查询合批计算嵌入；停止后排队和计算中的请求以异常结束而不是一直等待
+    total_tests += 1
+    try:
+        logger.info("5. 测试查询嵌入微批处理...")
+        
+        from knowledge_base.vector_store import EmbedBatcher
+        
+        model = SlowHashEmbedding(delay=0.01)
+        batcher = EmbedBatcher(model, max_batch_size=8, max_wait_ms=20)
+        embeddings = await batcher.embed_many([f"查询{i}" for i in range(8)])
+        batched_ok = model.batch_sizes == [8] and embeddings[3] == HashEmbedding().encode(["查询3"])[0].tolist()
+        await batcher.stop()
+        
+        model = SlowHashEmbedding(delay=0.3)
+        batcher = EmbedBatcher(model, max_batch_size=1, max_wait_ms=0)
+        tasks = [asyncio.create_task(batcher.embed(f"查询{i}")) for i in range(3)]
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        outcomes = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=1)
+        
+        if batched_ok and all(isinstance(outcome, RuntimeError) for outcome in outcomes):
+            logger.info("✓ 查询嵌入微批处理正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 查询嵌入微批处理不正确: batches={model.batch_sizes}, outcomes={outcomes}")
+    except Exception as e:
+        logger.error(f"✗ 查询嵌入微批处理测试失败: {e!r}")
+    
+    # 测试6: 其他worker持有写锁时，写入等待锁期间事件循环仍可处理其他请求
+    total_tests += 1
+    try:
+        logger.info("6. 测试等待写锁时不阻塞事件循环...")
+        
+        import fcntl
+        import threading
+        from knowledge_base.vector_store import VectorStore
+        
+        writer = VectorStore(persist_directory=f"{workdir}/locked", embedding_model=TEST_EMBEDDING_MODEL)
+        await writer.add_document(make_document("doc_lock", 1))
+        chunk_id = writer.collection.get(include=[])['ids'][0]
+        
+        def hold_lock(seconds: float):
+            """模拟另一个worker进程持有写锁"""
+            with open(writer._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                time.sleep(seconds)
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                
+        ticks = []
+        for write in (lambda: writer.add_document(make_document("doc_wait", 2)),
+                      lambda: writer.update_chunk(chunk_id, content="等待写锁后更新的内容")):
+            holder = threading.Thread(target=hold_lock, args=(0.3,))
+            holder.start()
+            await asyncio.sleep(0.05)
+            
+            task = asyncio.create_task(write())
+            count = 0
+            while not task.done():
+                count += 1
+                await asyncio.sleep(0.01)
+            ticks.append(count)
+            await task
+            holder.join()
+            
+        documents = {doc["document_id"] for doc in await writer.list_documents()}
+        updated = (await writer.get_chunk_by_id(chunk_id)).content
+        await writer.close()
+        
+        if all(count >= 10 for count in ticks) and "doc_wait" in documents and updated == "等待写锁后更新的内容":
+            logger.info("✓ 等待写锁时事件循环未被阻塞")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 等待写锁时事件循环被阻塞: ticks={ticks}, documents={documents}")
+    except Exception as e:
+        logger.error(f"✗ 写锁等待测试失败: {e!r}")
+    
+    # 测试7: 多个worker使用FAISS时，检索能看到其他进程的写入，落后的索引不会覆盖已持久化的索引
+    total_tests += 1
+    try:
+        logger.info("7. 测试跨worker的FAISS索引同步...")
+        
+        def open_worker():
+            return FaissVectorStore(
+                persist_directory=f"{workdir}/shared_faiss",
+                embedding_model=TEST_EMBEDDING_MODEL,
+                nlist=4,
+                nprobe=4
+            )
+            
+        worker_a = open_worker()
+        worker_b = open_worker()
+        
+        await worker_a.add_document(make_document("doc_p", 130))
+        found_by_b = await worker_b.search(SearchQuery(query_text=chunk_text("doc_p", 5), top_k=1))
+        b_indexed = worker_b.faiss_index.ntotal if worker_b.faiss_index is not None else 0
+        
+        await worker_b.add_document(make_document("doc_q", 10))
+        await worker_b.close()
+        # worker_a 的索引落后于共享数据，关闭时不能覆盖 worker_b 持久化的索引
+        await worker_a.close()
+        
+        worker_c = open_worker()
+        loaded_version = worker_c._read_index_version()
+        found_by_c = await worker_c.search(SearchQuery(query_text=chunk_text("doc_q", 3), top_k=1))
+        c_indexed = worker_c.faiss_index.ntotal
+        await worker_c.close()
+        
+        if (found_by_b and found_by_b[0].chunk.metadata["chunk_index"] == 5 and b_indexed == 130
+                and loaded_version == worker_c._read_data_version() and c_indexed == 140
+                and found_by_c and found_by_c[0].chunk.metadata["document_id"] == "doc_q"):
+            logger.info("✓ 跨worker的FAISS索引同步正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 跨worker的FAISS索引同步不正确: b_indexed={b_indexed}, c_indexed={c_indexed}, "
+                         f"found_by_b={[r.chunk.chunk_id for r in found_by_b]}")
+    except Exception as e:
+        logger.error(f"✗ 跨worker的FAISS索引同步测试失败: {e!r}")
+    
+    shutil.rmtree(workdir, ignore_errors=True)
+    return tests_passed, total_tests
+
+def main():
+    """主测试函数"""
+    logger.info("=== 知识库简单测试 ===")
+    
+    tests_passed, total_tests = asyncio.run(run_tests())
+    
+    # 显示测试结果
+    logger.info("=== 测试结果 ===")
+    logger.info(f"总测试数: {total_tests}")
+    logger.info(f"通过数: {tests_passed}")
+    logger.info(f"失败数: {total_tests - tests_passed}")
+    
+    if tests_passed == total_tests:
+        logger.info("🎉 知识库测试全部通过！")
+        return True
+    else:
+        logger.warning(f"⚠️ {total_tests - tests_passed} 个测试失败")
+        return False
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        logger.info("测试被用户中断")
+        exit(1)
+    except Exception as e:
+        logger.error(f"测试执行异常: {e}")
+        exit(1)
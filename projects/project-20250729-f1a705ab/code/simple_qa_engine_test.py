@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+智能行业知识问答系统 - 问答引擎简单测试
+验证并发问答请求的微批处理和大模型并发上限
+（使用记录调用情况的模拟大模型客户端和向量库，测试不需要API密钥）
+"""
+
+import asyncio
+import logging
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('SimpleQAEngineTest')
+
+class RecordingLLMClient:
+    """记录同时进行的调用数的模拟大模型客户端"""
+    
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.calls = 0
+        self.inflight = 0
+        self.max_inflight = 0
+    
+    async def chat_completion(self, messages, config=None):
+        from llm_integration.deepseek_client import ChatResponse
+        
+        self.calls += 1
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.inflight -= 1
+        return ChatResponse(
+            content=f"回答: {messages[-1].content[-20:]}",
+            model="test-model",
+            usage={},
+            finish_reason="stop",
+            response_time=self.delay
+        )
+
+class EmptyVectorStore:
+    """不返回任何知识的模拟向量库，记录批量检索的批次大小"""
+    
+    def __init__(self):
+        self.batch_sizes = []
+    
+    async def search_batch(self, queries):
+        self.batch_sizes.append(len(queries))
+        return [[] for _ in queries]
+
+def make_context(index: int):
+    """构造问题上下文"""
+    from qa_engine.answer_generator import QuestionContext
+    
+    return QuestionContext(question=f"测试问题 {index}", user_id="test_user")
+
+async def run_tests():
+    """执行测试，返回 (通过数, 总数)"""
+    tests_passed = 0
+    total_tests = 0
+    
+    from qa_engine.answer_generator import AnswerGenerator, BatchedAnswerRunner
+    
+    # 测试1: 大模型并发上限不限制排队的请求数，批次可以达到最大批大小
+    total_tests += 1
+    try:
+        logger.info("1. 测试微批处理与大模型并发上限...")
+        
+        llm_client = RecordingLLMClient()
+        vector_store = EmptyVectorStore()
+        runner = BatchedAnswerRunner(
+            AnswerGenerator(llm_client, vector_store),
+            max_batch_size=16,
+            max_wait_ms=20,
+            llm_semaphore=asyncio.Semaphore(8)
+        )
+        runner.start()
+        results = await asyncio.gather(*(runner.submit(make_context(i)) for i in range(16)))
+        await runner.stop()
+        
+        if (vector_store.batch_sizes == [16] and llm_client.calls == 16 and llm_client.max_inflight == 8
+                and all(result.answer.startswith("回答") for result in results)):
+            logger.info("✓ 微批处理与大模型并发上限正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 微批处理不正确: batches={vector_store.batch_sizes}, "
+                         f"max_inflight={llm_client.max_inflight}")
+    except Exception as e:
+        logger.error(f"✗ 微批处理测试失败: {e!r}")
+    
+    # 测试2: 停止时已分发的批次正常完成，尚未分发的请求以异常结束而不是一直等待
+    total_tests += 1
+    try:
+        logger.info("2. 测试停止微批处理器...")
+        
+        llm_client = RecordingLLMClient(delay=0.3)
+        runner = BatchedAnswerRunner(AnswerGenerator(llm_client, EmptyVectorStore()), max_batch_size=2, max_wait_ms=20)
+        runner.start()
+        dispatched = [asyncio.create_task(runner.submit(make_context(i))) for i in range(2)]
+        await asyncio.sleep(0.05)
+        queued = [asyncio.create_task(runner.submit(make_context(i))) for i in range(2, 5)]
+        await asyncio.sleep(0.01)
+        await runner.stop()
+        outcomes = await asyncio.wait_for(asyncio.gather(*dispatched, *queued, return_exceptions=True), timeout=2)
+        
+        if (all(result.answer.startswith("回答") for result in outcomes[:2])
+                and all(isinstance(outcome, RuntimeError) for outcome in outcomes[2:])):
+            logger.info("✓ 停止微批处理器正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 停止微批处理器不正确: outcomes={outcomes}")
+    except Exception as e:
+        logger.error(f"✗ 停止微批处理器测试失败: {e!r}")
+    
+    return tests_passed, total_tests
+
+def main():
+    """主测试函数"""
+    logger.info("=== 问答引擎简单测试 ===")
+    
+    tests_passed, total_tests = asyncio.run(run_tests())
+    
+    # 显示测试结果
+    logger.info("=== 测试结果 ===")
+    logger.info(f"总测试数: {total_tests}")
+    logger.info(f"通过数: {tests_passed}")
+    logger.info(f"失败数: {total_tests - tests_passed}")
+    
+    if tests_passed == total_tests:
+        logger.info("🎉 问答引擎测试全部通过！")
+        return True
+    else:
+        logger.warning(f"⚠️ {total_tests - tests_passed} 个测试失败")
+        return False
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        logger.info("测试被用户中断")
+        exit(1)
+    except Exception as e:
+        logger.error(f"测试执行异常: {e}")
+        exit(1)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+智能行业知识问答系统 - 会话管理器简单测试
+验证会话的SQLite持久化、冷会话加载和过期清理
+"""
+
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('SimpleSessionTest')
+
+def main():
+    """主测试函数"""
+    logger.info("=== 会话管理器简单测试 ===")
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    from session_manager import SessionManager
+    
+    workdir = tempfile.mkdtemp(prefix="session_test_")
+    db_path = os.path.join(workdir, "sessions.db")
+    
+    # 测试1: 会话和消息持久化后可由新的管理器加载
+    total_tests += 1
+    try:
+        logger.info("1. 测试会话持久化...")
+        
+        manager = SessionManager(persist_path=db_path)
+        session_id = manager.create_session("user_1")
+        manager.add_message(session_id, "user", "什么是机器学习？")
+        manager.add_message(session_id, "assistant", "机器学习是人工智能的一个分支。")
+        manager.update_session_context(session_id, "domain", "人工智能")
+        manager.close()
+        
+        manager = SessionManager(persist_path=db_path)
+        history = manager.get_conversation_history(session_id)
+        session = manager.get_session(session_id)
+        stats = manager.get_statistics()
+        manager.close()
+        
+        if (len(history) == 2 and history[0]["user"] == "什么是机器学习？"
+                and session.context.get("domain") == "人工智能"
+                and stats["active_sessions"] == 1 and stats["total_messages"] == 2):
+            logger.info("✓ 会话持久化正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 会话持久化不正确: history={history}, stats={stats}")
+    except Exception as e:
+        logger.error(f"✗ 会话持久化测试失败: {e}")
+    
+    # 测试2: 已过期的冷会话返回None并删除磁盘记录（回归：曾抛出KeyError）
+    total_tests += 1
+    try:
+        logger.info("2. 测试过期冷会话...")
+        
+        manager = SessionManager(session_timeout_hours=1, persist_path=db_path)
+        expired_id = manager.create_session("user_2")
+        manager.add_message(expired_id, "user", "你好")
+        manager.close()
+        
+        db = sqlite3.connect(db_path)
+        with db:
+            db.execute("UPDATE sessions SET last_active = ? WHERE session_id = ?",
+                       (time.time() - 7200, expired_id))
+        db.close()
+        
+        manager = SessionManager(session_timeout_hours=1, persist_path=db_path)
+        session = manager.get_session(expired_id)
+        stats = manager.get_statistics()
+        manager.close()
+        
+        if session is None and stats["active_sessions"] == 0 and stats["total_messages"] == 0 \
+                and stats["persisted_sessions"] == 1:
+            logger.info("✓ 过期冷会话已清理")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 过期冷会话处理不正确: session={session}, stats={stats}")
+    except Exception as e:
+        logger.error(f"✗ 过期冷会话测试失败: {e!r}")
+    
+    # 测试3: 超出内存容量的会话移出内存但保留在磁盘上
+    total_tests += 1
+    try:
+        logger.info("3. 测试LRU移出...")
+        
+        manager = SessionManager(max_sessions=2, persist_path=db_path)
+        ids = [manager.create_session("user_3") for _ in range(3)]
+        manager.add_message(ids[0], "user", "第一个会话")
+        in_memory = len(manager.sessions)
+        user_sessions = manager.get_user_sessions("user_3")
+        manager.close()
+        
+        if in_memory == 2 and len(user_sessions) == 3:
+            logger.info("✓ LRU移出正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ LRU移出不正确: in_memory={in_memory}, user_sessions={len(user_sessions)}")
+    except Exception as e:
+        logger.error(f"✗ LRU移出测试失败: {e}")
+    
+    # 测试4: 删除会话同时删除磁盘记录
+    total_tests += 1
+    try:
+        logger.info("4. 测试删除会话...")
+        
+        manager = SessionManager(persist_path=db_path)
+        session_id = manager.create_session("user_4")
+        deleted = manager.delete_session(session_id)
+        deleted_again = manager.delete_session(session_id)
+        session = manager.get_session(session_id)
+        manager.close()
+        
+        if deleted and not deleted_again and session is None:
+            logger.info("✓ 删除会话正确")
+            tests_passed += 1
+        else:
+            logger.error("✗ 删除会话不正确")
+    except Exception as e:
+        logger.error(f"✗ 删除会话测试失败: {e}")
+    
+    shutil.rmtree(workdir, ignore_errors=True)
+    
+    # 显示测试结果
+    logger.info("=== 测试结果 ===")
+    logger.info(f"总测试数: {total_tests}")
+    logger.info(f"通过数: {tests_passed}")
+    logger.info(f"失败数: {total_tests - tests_passed}")
+    
+    if tests_passed == total_tests:
+        logger.info("🎉 会话管理器测试全部通过！")
+        return True
+    else:
+        logger.warning(f"⚠️ {total_tests - tests_passed} 个测试失败")
+        return False
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        logger.info("测试被用户中断")
+        exit(1)
+    except Exception as e:
+        logger.error(f"测试执行异常: {e}")
+        exit(1)
@@ -5,52 +5,63 @@
 """
 
 import os
+import time
+import hashlib
 import asyncio
 import json
-import traceback
-from typing import Dict, List, Any, Optional, Union
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Union, Callable, Awaitable, Tuple
 from datetime import datetime
 from pathlib import Path
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
 # FastAPI
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 import uvicorn
+import aiofiles
+import orjson
 
 # 本地模块
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
-
 from knowledge_ingestion.document_parser import DocumentParser, DocumentParseResult
 from knowledge_ingestion.web_crawler import WebCrawler, CrawlConfig, CrawlTask
-from knowledge_base.vector_store import VectorStore, SearchQuery, KnowledgeChunk
+from knowledge_base.vector_store import VectorStore, SearchQuery, load_embedding_model, KnowledgeChunk
 from llm_integration.deepseek_client import DeepSeekClient, GenerationConfig
-from qa_engine.answer_generator import AnswerGenerator, QuestionContext, AnswerResult, QAConfig
+from qa_engine.answer_generator import AnswerGenerator, BatchedAnswerRunner, QuestionContext, AnswerResult, QAConfig
 from domain_adapters.medical_adapter import MedicalAdapter
 from session_manager import SessionManager, get_session_manager
 
 # API模型定义
+# 请求模型统一配置：忽略多余字段，跳过不需要的字符串预处理
+REQUEST_MODEL_CONFIG = ConfigDict(extra="ignore", str_strip_whitespace=False, arbitrary_types_allowed=False)
+
 class QuestionRequest(BaseModel):
     """问题请求模型"""
-    question: str = Field(..., description="用户问题")
+    model_config = REQUEST_MODEL_CONFIG
+    
+    question: str = Field(..., min_length=1, max_length=4000, description="用户问题")
     domain: str = Field("", description="专业领域")
     user_id: str = Field("", description="用户ID")
     session_id: str = Field("", description="会话ID")
-    conversation_history: List[Dict[str, str]] = Field(default=[], description="对话历史")
-    additional_context: Dict[str, Any] = Field(default={}, description="额外上下文")
+    conversation_history: List[Dict[str, str]] = Field(default_factory=list, description="对话历史")
+    additional_context: Dict[str, Any] = Field(default_factory=dict, description="额外上下文")
 
 class QuestionResponse(BaseModel):
     """问题回答模型"""
     answer: str = Field(..., description="回答内容")
     confidence: float = Field(..., description="置信度")
     sources: List[Dict[str, Any]] = Field(..., description="信息来源")
-    reasoning_steps: List[str] = Field(default=[], description="推理步骤")
-    related_questions: List[str] = Field(default=[], description="相关问题")
+    reasoning_steps: List[str] = Field(default_factory=list, description="推理步骤")
+    related_questions: List[str] = Field(default_factory=list, description="相关问题")
     generated_at: str = Field(..., description="生成时间")
     session_id: str = Field("", description="会话ID")
 
@@ -63,17 +74,21 @@ class DocumentUploadResponse(BaseModel):
 
 class CrawlTaskRequest(BaseModel):
     """爬取任务请求模型"""
+    model_config = REQUEST_MODEL_CONFIG
+    
     domain: str = Field(..., description="领域名称")
     urls: List[str] = Field(..., description="种子URL列表")
     schedule: str = Field("daily", description="调度频率")
-    config: Dict[str, Any] = Field(default={}, description="爬取配置")
+    config: Dict[str, Any] = Field(default_factory=dict, description="爬取配置")
 
 class SearchRequest(BaseModel):
     """搜索请求模型"""
-    query: str = Field(..., description="搜索查询")
+    model_config = REQUEST_MODEL_CONFIG
+    
+    query: str = Field(..., min_length=1, max_length=4000, description="搜索查询")
     domain: str = Field("", description="限定领域")
-    top_k: int = Field(10, description="返回结果数量")
-    similarity_threshold: float = Field(0.3, description="相似度阈值")
+    top_k: int = Field(10, ge=1, le=100, description="返回结果数量")
+    similarity_threshold: float = Field(0.3, ge=0.0, le=1.0, description="相似度阈值")
 
 class SystemStatus(BaseModel):
     """系统状态模型"""
@@ -88,7 +103,9 @@ class SystemStatus(BaseModel):
 app = FastAPI(
     title="智能行业知识问答系统",
     description="基于DeepSeek大模型的多领域智能知识问答API",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson序列化更快，且直接输出UTF-8（中文不转义）
+    default_response_class=ORJSONResponse
 )
 
 # CORS配置
@@ -100,6 +117,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip压缩中间件，跳过流式(SSE)、文件下载等不宜缓冲压缩的路径"""
+    
+    def __init__(self, app,
+                 exclude_paths: Tuple[str, ...] = (),
+                 exclude_suffixes: Tuple[str, ...] = (),
+                 **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = frozenset(exclude_paths)
+        self.exclude_suffixes = exclude_suffixes
+        
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and (
+            scope["path"] in self.exclude_paths or
+            scope["path"].endswith(self.exclude_suffixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# 压缩超过1KB的响应（搜索结果、文档详情等大块中文JSON）
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    exclude_paths=("/ask/stream",),
+    exclude_suffixes=("/download",)
+)
+
 # 静态文件服务
 static_dir = Path(__file__).parent / "static"
 static_dir.mkdir(exist_ok=True)
@@ -113,30 +159,275 @@ document_parser: Optional[DocumentParser] = None
 vector_store: Optional[VectorStore] = None
 llm_client: Optional[DeepSeekClient] = None
 answer_generator: Optional[AnswerGenerator] = None
+answer_runner: Optional[BatchedAnswerRunner] = None
 web_crawler: Optional[WebCrawler] = None
+
+# 嵌入模型名称
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# 默认支持的领域
+DEFAULT_DOMAINS = ("通用", "人工智能", "计算机科学", "医疗健康", "法律", "教育", "金融")
+
+# /domains 响应缓存，仅在注册领域适配器时重建
+_domains_cache: Dict[str, Any] = {
+    "supported_domains": list(DEFAULT_DOMAINS),
+    "registered_adapters": [],
+    "total_count": len(DEFAULT_DOMAINS)
+}
+_domains_body: bytes = orjson.dumps(_domains_cache)
 session_manager: SessionManager = get_session_manager()
 
 # 系统状态
 system_start_time = datetime.now()
+# 运行时间基于单调时钟计算，启动时间字符串只生成一次
+SYSTEM_START_MONO = time.monotonic()
+SYSTEM_START_ISO = system_start_time.isoformat()
+
+# 上传文件分块大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 流式问答的分片合并配置：首帧尽快发出，之后批量逐步增大到上限，
+# 超过刷新间隔也会立即发出，以降低每个token一帧的序列化和发送开销
+STREAM_MIN_BATCH_SIZE = int(os.getenv("STREAM_MIN_BATCH_SIZE", "1"))
+STREAM_MAX_BATCH_SIZE = int(os.getenv("STREAM_MAX_BATCH_SIZE", "25"))
+STREAM_BATCH_GROWTH_FACTOR = float(os.getenv("STREAM_BATCH_GROWTH_FACTOR", "2"))
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", "0.05"))
+
+# Chroma的查询是同步阻塞调用，放到有界线程池中执行，避免阻塞事件循环
+CHROMA_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CHROMA_MAX_WORKERS", "8")),
+    thread_name_prefix="chroma"
+)
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """在Chroma线程池中执行阻塞调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(CHROMA_EXECUTOR, partial(func, *args, **kwargs))
+
+class TTLCache:
+    """短期响应缓存：过期前直接返回缓存值，并发的刷新请求合并为一次计算"""
+    
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        
+    async def get_or_set(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """获取缓存值，过期或不存在时调用factory刷新"""
+        entry = self._entries.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+            
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # 等待锁期间可能已被其他请求刷新
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+                
+            value = await factory()
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            return value
+            
+    def invalidate(self, *keys: str):
+        """使指定缓存失效，未指定时清空全部"""
+        if not keys:
+            self._entries.clear()
+        for key in keys:
+            self._entries.pop(key, None)
+
+def content_etag(body: bytes) -> str:
+    """根据响应内容计算ETag"""
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """客户端缓存的ETag是否与当前一致"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return any(
+        tag.strip().removeprefix("W/") in (etag, "*")
+        for tag in if_none_match.split(",")
+    )
+
+def conditional_json_response(request: Request, body: bytes) -> Response:
+    """带ETag的JSON响应，内容未变化时返回304"""
+    etag = content_etag(body)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# 统计类接口的缓存（监控面板通常高频轮询）
+stats_cache = TTLCache(float(os.getenv("STATS_CACHE_TTL", "2")))
+
+class RateLimiter:
+    """按用户的令牌桶限流器"""
+    
+    UNITS = {"second": 1, "minute": 60, "hour": 3600}
+    
+    def __init__(self, limit: str, max_keys: int = 10000):
+        """
+        初始化限流器
+        
+        Args:
+            limit: 限流规则，如 "30/minute"
+            max_keys: 最多跟踪的用户数，超出时淘汰最久未访问的
+        """
+        count, unit = limit.split("/")
+        self.capacity = float(count)
+        self.refill_rate = self.capacity / self.UNITS[unit.strip()]
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        
+    def check(self, key: str):
+        """消耗一个令牌，令牌不足时抛出429"""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+        
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            retry_after = (1 - tokens) / self.refill_rate
+            raise HTTPException(
+                status_code=429,
+                detail="请求过于频繁，请稍后重试",
+                headers={"Retry-After": str(int(retry_after) + 1)}
+            )
+            
+        self._buckets[key] = (tokens - 1, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+ask_rate_limiter = RateLimiter(os.getenv("ASK_RATE_LIMIT", "30/minute"))
+upload_rate_limiter = RateLimiter(os.getenv("UPLOAD_RATE_LIMIT", "10/minute"))
+
+# 同时进行的大模型调用上限，避免突发流量耗尽内存和拖慢所有请求
+llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_INFLIGHT", "8")))
+
+def rate_limit_key(user_id: str, http_request: Request) -> str:
+    """限流键：优先用户ID，匿名用户按客户端地址区分"""
+    if user_id and user_id not in ("anonymous", "dev_user"):
+        return user_id
+    return http_request.client.host if http_request.client else "anonymous"
+
+async def get_vector_store_statistics() -> Dict[str, Any]:
+    """获取向量数据库统计（带缓存）"""
+    if not vector_store:
+        return {}
+        
+    async def collect():
+        return await run_blocking(vector_store.get_statistics)
+        
+    return await stats_cache.get_or_set("vector_store", collect)
+    
+async def get_qa_statistics() -> Dict[str, Any]:
+    """获取问答引擎统计（带缓存）"""
+    if not answer_generator:
+        return {}
+        
+    async def collect():
+        return answer_generator.get_statistics()
+        
+    return await stats_cache.get_or_set("qa_engine", collect)
+    
+async def get_llm_statistics() -> Dict[str, Any]:
+    """获取LLM请求统计（带缓存）"""
+    if not llm_client:
+        return {}
+        
+    async def collect():
+        return llm_client.get_request_statistics()
+        
+    return await stats_cache.get_or_set("llm_client", collect)
 logger = logging.getLogger(__name__)
 
+class DeferredQueueHandler(QueueHandler):
+    """只把日志记录放入队列，消息和异常堆栈的格式化交给监听线程"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+log_listener: Optional[QueueListener] = None
+
+def start_log_listener():
+    """将根日志器现有的输出handler移到后台线程，请求路径只做入队"""
+    global log_listener
+    
+    root_logger = logging.getLogger()
+    if log_listener is not None or not root_logger.handlers:
+        return
+        
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    root_logger.handlers = [DeferredQueueHandler(log_queue)]
+    log_listener.start()
+
+def stop_log_listener():
+    """停止后台日志线程并输出剩余日志"""
+    global log_listener
+    
+    if log_listener is not None:
+        log_listener.stop()
+        logging.getLogger().handlers = list(log_listener.handlers)
+        log_listener = None
+
 # 初始化函数
+def register_domain_adapter(domain: str, adapter):
+    """注册领域适配器并重建领域列表缓存"""
+    global _domains_cache, _domains_body
+    
+    answer_generator.register_domain_adapter(domain, adapter)
+    
+    registered = list(answer_generator.domain_adapters)
+    all_domains = list(dict.fromkeys(registered + list(DEFAULT_DOMAINS)))
+    _domains_cache = {
+        "supported_domains": all_domains,
+        "registered_adapters": registered,
+        "total_count": len(all_domains)
+    }
+    _domains_body = orjson.dumps(_domains_cache)
+
+def init_shared():
+    """
+    初始化可在worker间共享的只读组件（文档解析器、嵌入模型）
+    
+    使用 gunicorn --preload 并设置 PRELOAD_SHARED=true 时在fork前执行，
+    各worker通过写时复制共享同一份模型内存。重复调用不会重新加载。
+    """
+    global document_parser
+    
+    if document_parser is None:
+        document_parser = DocumentParser()
+        logger.info("文档解析器初始化完成")
+        
+    load_embedding_model(EMBEDDING_MODEL)
+
 async def initialize_system():
     """初始化系统组件"""
-    global document_parser, vector_store, llm_client, answer_generator, web_crawler
+    global vector_store, llm_client, answer_generator, answer_runner, web_crawler
     
     try:
         logger.info("开始初始化系统组件...")
         
-        # 1. 初始化文档解析器
-        document_parser = DocumentParser()
-        logger.info("文档解析器初始化完成")
+        # 1. 共享组件（预加载时已在父进程完成）
+        init_shared()
         
-        # 2. 初始化向量数据库
-        vector_store = VectorStore(
-            persist_directory="knowledge_db",
-            collection_name="knowledge_base"
-        )
+        # 2. 初始化向量数据库（每个worker各自打开ChromaDB连接）
+        # VECTOR_BACKEND=faiss 时使用FAISS IVF-PQ索引检索
+        if os.getenv("VECTOR_BACKEND", "chroma").lower() == "faiss":
+            from knowledge_base.faiss_store import FaissVectorStore
+            vector_store = FaissVectorStore(
+                persist_directory="knowledge_db",
+                collection_name="knowledge_base",
+                embedding_model=EMBEDDING_MODEL,
+                quantizer=os.getenv("FAISS_QUANTIZER", "sq8")
+            )
+        else:
+            vector_store = VectorStore(
+                persist_directory="knowledge_db",
+                collection_name="knowledge_base",
+                embedding_model=EMBEDDING_MODEL
+            )
         logger.info("向量数据库初始化完成")
         
         # 3. 初始化LLM客户端
@@ -157,7 +448,16 @@ async def initialize_system():
         
         # 注册领域适配器
         medical_adapter = MedicalAdapter()
-        answer_generator.register_domain_adapter("医疗健康", medical_adapter)
+        register_domain_adapter("医疗健康", medical_adapter)
+        
+        # 并发问答请求的微批处理
+        answer_runner = BatchedAnswerRunner(
+            answer_generator,
+            max_batch_size=int(os.getenv("ASK_MAX_BATCH_SIZE", "16")),
+            max_wait_ms=float(os.getenv("ASK_BATCH_WAIT_MS", "10")),
+            llm_semaphore=llm_semaphore
+        )
+        answer_runner.start()
         
         logger.info("答案生成器初始化完成")
         
@@ -174,7 +474,7 @@ async def initialize_system():
         logger.info("系统组件初始化完成！")
         
     except Exception as e:
-        logger.error(f"系统初始化失败: {e}")
+        logger.error("系统初始化失败: %s", e)
         raise
 
 # 依赖注入
@@ -200,31 +500,55 @@ def require_write_permission(user: dict = Depends(get_current_user)):
 
 # API路由
 
+# gunicorn --preload 时在父进程加载共享组件
+if os.getenv("PRELOAD_SHARED", "false").lower() == "true":
+    init_shared()
+
 @app.on_event("startup")
 async def startup_event():
     """启动事件"""
+    start_log_listener()
     await initialize_system()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭事件"""
+    if answer_runner:
+        await answer_runner.stop()
+    if vector_store:
+        await vector_store.close()
+    if llm_client:
+        await llm_client.close()
+    stop_log_listener()
+
+def static_page_response(request: Request, file_path: Path) -> Optional[Response]:
+    """返回静态页面，文件未修改时返回304；文件不存在返回None"""
+    try:
+        stat_result = file_path.stat()
+    except FileNotFoundError:
+        return None
+        
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(str(file_path), stat_result=stat_result, headers={"etag": etag})
+
 @app.get("/")
-async def root():
+async def root(request: Request):
     """根路径 - 返回Web界面"""
-    # 首先尝试简化版本
-    simple_file = static_dir / "simple.html"
-    if simple_file.exists():
-        return FileResponse(str(simple_file))
-    
-    # 备选原版本
-    index_file = static_dir / "index.html"
-    if index_file.exists():
-        return FileResponse(str(index_file))
-    else:
-        return {
-            "name": "智能行业知识问答系统",
-            "version": "1.0.0",
-            "status": "运行中",
-            "description": "基于DeepSeek大模型的多领域智能知识问答API",
-            "note": "Web界面文件不存在，请检查 static/simple.html"
-        }
+    # 首先尝试简化版本，备选原版本
+    for page in ("simple.html", "index.html"):
+        response = static_page_response(request, static_dir / page)
+        if response is not None:
+            return response
+            
+    return {
+        "name": "智能行业知识问答系统",
+        "version": "1.0.0",
+        "status": "运行中",
+        "description": "基于DeepSeek大模型的多领域智能知识问答API",
+        "note": "Web界面文件不存在，请检查 static/simple.html"
+    }
 
 @app.get("/api")
 async def api_info():
@@ -275,11 +599,11 @@ async def health_check():
 async def get_system_status():
     """获取系统状态"""
     try:
-        uptime = (datetime.now() - system_start_time).total_seconds()
+        uptime = time.monotonic() - SYSTEM_START_MONO
         
         # 获取统计信息
-        vector_stats = vector_store.get_statistics() if vector_store else {}
-        qa_stats = answer_generator.get_statistics() if answer_generator else {}
+        vector_stats = await get_vector_store_statistics()
+        qa_stats = await get_qa_statistics()
         
         return SystemStatus(
             status="运行中",
@@ -294,8 +618,10 @@ async def get_system_status():
         raise HTTPException(status_code=500, detail=f"获取系统状态失败: {str(e)}")
 
 @app.post("/ask", response_model=QuestionResponse)
-async def ask_question(request: QuestionRequest):
+async def ask_question(request: QuestionRequest, http_request: Request):
     """问答接口 - 支持会话记忆"""
+    ask_rate_limiter.check(rate_limit_key(request.user_id, http_request))
+    
     try:
         if not answer_generator:
             raise HTTPException(status_code=503, detail="答案生成器未初始化")
@@ -334,8 +660,8 @@ async def ask_question(request: QuestionRequest):
             }
         )
         
-        # 生成答案
-        result = await answer_generator.generate_answer(context)
+        # 生成答案（与并发请求合批处理）
+        result = await answer_runner.submit(context)
         
         # 添加AI回答到会话
         session_manager.add_message(session_id, "assistant", result.answer, {
@@ -360,12 +686,14 @@ async def ask_question(request: QuestionRequest):
         )
         
     except Exception as e:
-        logger.error(f"问答处理失败: {e}\n{traceback.format_exc()}")
+        logger.exception("问答处理失败: %s", e)
         raise HTTPException(status_code=500, detail=f"问答处理失败: {str(e)}")
 
 @app.post("/ask/stream")
-async def ask_question_stream(request: QuestionRequest):
+async def ask_question_stream(request: QuestionRequest, http_request: Request):
     """流式问答接口"""
+    ask_rate_limiter.check(rate_limit_key(request.user_id, http_request))
+    
     try:
         if not llm_client:
             raise HTTPException(status_code=503, detail="LLM客户端未初始化")
@@ -380,11 +708,25 @@ async def ask_question_stream(request: QuestionRequest):
         
         # 流式生成
         async def generate_stream():
+            buffer: List[str] = []
+            batch_size = STREAM_MIN_BATCH_SIZE
+            last_flush = time.monotonic()
             try:
-                async for chunk in llm_client.chat_completion_stream(messages):
-                    yield f"data: {json.dumps({'content': chunk}, ensure_ascii=False)}\n\n"
+                async with llm_semaphore:
+                    async for chunk in llm_client.chat_completion_stream(messages):
+                        buffer.append(chunk)
+                        now = time.monotonic()
+                        if len(buffer) >= batch_size or now - last_flush >= STREAM_FLUSH_INTERVAL:
+                            yield f"data: {json.dumps({'content': ''.join(buffer)}, ensure_ascii=False)}\n\n"
+                            buffer.clear()
+                            last_flush = now
+                            batch_size = min(STREAM_MAX_BATCH_SIZE, max(batch_size + 1, int(batch_size * STREAM_BATCH_GROWTH_FACTOR)))
+                if buffer:
+                    yield f"data: {json.dumps({'content': ''.join(buffer)}, ensure_ascii=False)}\n\n"
                 yield f"data: {json.dumps({'done': True}, ensure_ascii=False)}\n\n"
             except Exception as e:
+                if buffer:
+                    yield f"data: {json.dumps({'content': ''.join(buffer)}, ensure_ascii=False)}\n\n"
                 yield f"data: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
                 
         return StreamingResponse(
@@ -398,11 +740,14 @@ async def ask_question_stream(request: QuestionRequest):
 
 @app.post("/documents/upload", response_model=DocumentUploadResponse)
 async def upload_document(
+    http_request: Request,
     file: UploadFile = File(...),
     domain: str = Form(""),
     user: dict = Depends(require_write_permission)
 ):
     """上传文档接口"""
+    upload_rate_limiter.check(rate_limit_key(user.get("user_id", ""), http_request))
+    
     try:
         if not document_parser or not vector_store:
             raise HTTPException(status_code=503, detail="文档处理组件未初始化")
@@ -411,11 +756,13 @@ async def upload_document(
         upload_dir = Path("uploads")
         upload_dir.mkdir(exist_ok=True)
         
-        file_path = upload_dir / file.filename
-        content = await file.read()
+        # 只保留文件名部分，防止路径穿越
+        file_path = upload_dir / Path(file.filename).name
         
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # 分块流式写入，避免整文件读入内存和阻塞事件循环
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
             
         # 解析文档
         parse_result = await document_parser.parse_document(str(file_path))
@@ -432,6 +779,7 @@ async def upload_document(
             
         # 添加到向量数据库
         chunks_added = await vector_store.add_document(parse_result)
+        stats_cache.invalidate("vector_store")
         
         # 保留原始文件以供下载和预览
         # file_path.unlink(missing_ok=True)  # 不删除文件
@@ -444,7 +792,7 @@ async def upload_document(
         )
         
     except Exception as e:
-        logger.error(f"文档上传失败: {e}\n{traceback.format_exc()}")
+        logger.exception("文档上传失败: %s", e)
         raise HTTPException(status_code=500, detail=f"文档上传失败: {str(e)}")
 
 @app.post("/search")
@@ -522,39 +870,20 @@ async def execute_crawl_task_background(task_id: str):
     try:
         # 这里需要从存储中加载任务
         # 简化实现，实际应该有任务存储机制
-        logger.info(f"开始执行后台爬取任务: {task_id}")
+        logger.info("开始执行后台爬取任务: %s", task_id)
         
         # 执行爬取逻辑...
         # 将结果添加到知识库...
         
-        logger.info(f"后台爬取任务完成: {task_id}")
+        logger.info("后台爬取任务完成: %s", task_id)
         
     except Exception as e:
-        logger.error(f"后台爬取任务失败: {task_id}, 错误: {e}")
+        logger.error("后台爬取任务失败: %s, 错误: %s", task_id, e)
 
 @app.get("/domains")
-async def get_supported_domains():
+async def get_supported_domains(request: Request):
     """获取支持的领域列表"""
-    try:
-        domains = []
-        
-        if answer_generator:
-            stats = answer_generator.get_statistics()
-            domains = stats.get("registered_domains", [])
-            
-        # 添加默认领域
-        default_domains = ["通用", "人工智能", "计算机科学", "医疗健康", "法律", "教育", "金融"]
-        
-        all_domains = list(set(domains + default_domains))
-        
-        return {
-            "supported_domains": all_domains,
-            "registered_adapters": domains,
-            "total_count": len(all_domains)
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取领域列表失败: {str(e)}")
+    return conditional_json_response(request, _domains_body)
 
 @app.delete("/documents/{document_id}")
 async def delete_document(
@@ -567,6 +896,7 @@ async def delete_document(
             raise HTTPException(status_code=503, detail="向量数据库未初始化")
             
         deleted_count = await vector_store.delete_document(document_id)
+        stats_cache.invalidate("vector_store")
         
         if deleted_count == 0:
             raise HTTPException(status_code=404, detail="文档不存在")
@@ -590,20 +920,20 @@ async def get_statistics():
         
         # 向量数据库统计
         if vector_store:
-            stats["vector_store"] = vector_store.get_statistics()
+            stats["vector_store"] = await get_vector_store_statistics()
             
         # 问答统计
         if answer_generator:
-            stats["qa_engine"] = answer_generator.get_statistics()
+            stats["qa_engine"] = await get_qa_statistics()
             
         # LLM统计
         if llm_client:
-            stats["llm_client"] = llm_client.get_request_statistics()
+            stats["llm_client"] = await get_llm_statistics()
             
         # 系统统计
         stats["system"] = {
-            "uptime_seconds": (datetime.now() - system_start_time).total_seconds(),
-            "start_time": system_start_time.isoformat()
+            "uptime_seconds": time.monotonic() - SYSTEM_START_MONO,
+            "start_time": SYSTEM_START_ISO
         }
         
         return stats
@@ -613,43 +943,23 @@ async def get_statistics():
 
 # 错误处理
 @app.get("/documents")
-async def list_documents():
+async def list_documents(request: Request):
     """获取已上传的文档列表"""
     try:
         if not vector_store:
             raise HTTPException(status_code=503, detail="向量数据库未初始化")
             
-        # 从向量数据库获取所有文档的元数据
-        all_chunks = vector_store.collection.get()
-        
-        # 按文档ID分组，提取文档信息
-        documents = {}
-        for i, chunk_id in enumerate(all_chunks['ids']):
-            metadata = all_chunks['metadatas'][i]
-            doc_id = metadata.get('document_id')
-            
-            if doc_id and doc_id not in documents:
-                documents[doc_id] = {
-                    'document_id': doc_id,
-                    'source_file': metadata.get('source_file', 'Unknown'),
-                    'file_type': metadata.get('file_type', 'Unknown'),
-                    'document_title': metadata.get('document_title', ''),
-                    'created_at': metadata.get('created_at', ''),
-                    'keywords': metadata.get('keywords', ''),
-                    'topics': metadata.get('topics', ''),
-                    'chunk_count': 0
-                }
-            
-            if doc_id in documents:
-                documents[doc_id]['chunk_count'] += 1
+        # 使用向量数据库维护的文档索引，无需扫描所有知识块（其他worker写入后在线程中重建）
+        documents = await vector_store.list_documents()
         
-        return {
+        # 内容未变化时返回304，前端轮询无需重复传输
+        return conditional_json_response(request, orjson.dumps({
             "total_documents": len(documents),
-            "documents": list(documents.values())
-        }
+            "documents": documents
+        }))
         
     except Exception as e:
-        logger.error(f"获取文档列表失败: {e}")
+        logger.error("获取文档列表失败: %s", e)
         raise HTTPException(status_code=500, detail=f"获取文档列表失败: {str(e)}")
 
 @app.get("/documents/{document_id}/download")
@@ -660,9 +970,11 @@ async def download_document(document_id: str):
             raise HTTPException(status_code=503, detail="向量数据库未初始化")
             
         # 从数据库获取文档信息
-        results = vector_store.collection.get(
+        results = await run_blocking(
+            vector_store.collection.get,
             where={"document_id": document_id},
-            limit=1
+            limit=1,
+            include=["metadatas"]
         )
         
         if not results['ids']:
@@ -675,19 +987,23 @@ async def download_document(document_id: str):
         upload_dir = Path("uploads")
         file_path = upload_dir / source_file
         
-        if not file_path.exists():
+        # stat放到线程中执行，并传给FileResponse以免其再次阻塞stat
+        try:
+            stat_result = await asyncio.to_thread(file_path.stat)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="文件不存在")
             
         return FileResponse(
             path=str(file_path),
             filename=source_file,
-            media_type='application/octet-stream'
+            media_type='application/octet-stream',
+            stat_result=stat_result
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"下载文档失败: {e}")
+        logger.error("下载文档失败: %s", e)
         raise HTTPException(status_code=500, detail=f"下载文档失败: {str(e)}")
 
 @app.get("/documents/{document_id}")
@@ -698,7 +1014,8 @@ async def get_document_info(document_id: str):
             raise HTTPException(status_code=503, detail="向量数据库未初始化")
             
         # 从数据库获取所有相关的知识块
-        results = vector_store.collection.get(
+        results = await run_blocking(
+            vector_store.collection.get,
             where={"document_id": document_id}
         )
         
@@ -731,7 +1048,7 @@ async def get_document_info(document_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"获取文档信息失败: {e}")
+        logger.error("获取文档信息失败: %s", e)
         raise HTTPException(status_code=500, detail=f"获取文档信息失败: {str(e)}")
 
 # 会话管理API
@@ -759,8 +1076,8 @@ async def get_session(session_id: str):
         return {
             "session_id": session.session_id,
             "user_id": session.user_id,
-            "created_at": session.created_at,
-            "last_active": session.last_active,
+            "created_at": datetime.fromtimestamp(session.created_at).isoformat(),
+            "last_active": datetime.fromtimestamp(session.last_active).isoformat(),
             "message_count": len(session.messages)
         }
     except HTTPException:
@@ -807,8 +1124,8 @@ async def get_session_stats():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """全局异常处理"""
-    logger.error(f"全局异常: {exc}\n{traceback.format_exc()}")
-    return JSONResponse(
+    logger.error("全局异常: %s", exc, exc_info=exc)
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "内部服务器错误",
@@ -838,11 +1155,13 @@ def main():
     
     # 启动服务器
     uvicorn.run(
-        "api_server:app",
+        "web_interface.api_server:app",
         host=args.host,
         port=args.port,
         reload=args.reload,
-        workers=args.workers
+        workers=args.workers,
+        loop="uvloop",
+        http="httptools"
     )
 
 if __name__ == "__main__":
@@ -5,10 +5,14 @@ AI自主开发系统 - 基础角色类
 """
 
 import asyncio
+import functools
+import heapq
+import itertools
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple, ClassVar, Set, Mapping
 from datetime import datetime
+from types import MappingProxyType
 from enum import Enum
 import uuid
 
@@ -19,6 +23,50 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from communication import Message, MessageBuilder, MessageType, Priority
 
 
+class _TickClock:
+    """
+    按事件循环轮次缓存的当前时间
+    
+    同一轮次内的多次取时共享一个datetime和ISO字符串，轮次结束时通过
+    loop.call_soon失效；没有运行中的事件循环时不缓存。
+    """
+    
+    __slots__ = ('now', 'iso', 'loop')
+    
+    def __init__(self):
+        self.now: Optional[datetime] = None
+        self.iso: Optional[str] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        
+    def get(self) -> datetime:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return datetime.now()
+            
+        if self.now is None or self.loop is not loop:
+            self.now = datetime.now()
+            self.iso = None
+            self.loop = loop
+            loop.call_soon(self._invalidate)
+        return self.now
+        
+    def isoformat(self, dt: datetime) -> str:
+        """格式化时间，当前轮次的时间复用已生成的字符串"""
+        if dt is not self.now:
+            return dt.isoformat()
+        if self.iso is None:
+            self.iso = dt.isoformat()
+        return self.iso
+        
+    def _invalidate(self):
+        self.now = None
+        self.iso = None
+
+
+_clock = _TickClock()
+
+
 class RoleState(Enum):
     """角色状态枚举"""
     INITIALIZING = "initializing"
@@ -38,39 +86,108 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
 
 
+# 任务状态的原始值，热路径上直接比较字符串，避免枚举属性访问
+_PENDING = TaskStatus.PENDING.value
+_IN_PROGRESS = TaskStatus.IN_PROGRESS.value
+_COMPLETED = TaskStatus.COMPLETED.value
+_FAILED = TaskStatus.FAILED.value
+_CANCELLED = TaskStatus.CANCELLED.value
+_STATUS_BY_VALUE = {status.value: status for status in TaskStatus}
+
+# 任务状态更新批量发送参数
+STATUS_BATCH_SIZE = 32
+STATUS_FLUSH_INTERVAL = 0.01
+
+# 任务堆排序键中序号占用的位数
+_HEAP_SEQ_BITS = 48
+
+
 class Task:
     """任务类"""
     
+    __slots__ = (
+        'task_id', 'task_type', 'data', 'priority', '_status',
+        'created_at', 'started_at', 'completed_at', 'result',
+        'error_message', 'progress', '_priority_value', '_static_dict'
+    )
+    
+    # 空闲任务对象池，减少高频提交时的对象分配
+    _pool: ClassVar[List['Task']] = []
+    _POOL_MAX_SIZE: ClassVar[int] = 1024
+    
     def __init__(self, task_id: str, task_type: str, data: Dict[str, Any], 
                  priority: Priority = Priority.NORMAL):
+        self.reset(task_id, task_type, data, priority)
+        
+    def reset(self, task_id: str, task_type: str, data: Dict[str, Any],
+              priority: Priority = Priority.NORMAL):
+        """重置为新任务"""
         self.task_id = task_id
         self.task_type = task_type
         self.data = data
         self.priority = priority
-        self.status = TaskStatus.PENDING
-        self.created_at = datetime.now()
+        self._status = _PENDING
+        self.created_at = _clock.get()
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
         self.result: Optional[Dict[str, Any]] = None
         self.error_message: Optional[str] = None
         self.progress = 0.0  # 0.0 - 1.0
         
+        # to_dict中创建后不再变化的部分
+        self._priority_value = priority.value
+        self._static_dict = {
+            'task_id': task_id,
+            'task_type': task_type,
+            'data': data,
+            'priority': self._priority_value,
+            'created_at': _clock.isoformat(self.created_at)
+        }
+        
+    @classmethod
+    def acquire(cls, task_id: str, task_type: str, data: Dict[str, Any],
+                priority: Priority = Priority.NORMAL) -> 'Task':
+        """从对象池获取任务，池为空时新建"""
+        if cls._pool:
+            task = cls._pool.pop()
+            task.reset(task_id, task_type, data, priority)
+            return task
+        return cls(task_id, task_type, data, priority)
+        
+    def release(self):
+        """任务结束后归还对象池，调用后不应再持有该任务"""
+        self.data = None
+        self.result = None
+        self.error_message = None
+        self._static_dict = None
+        if len(self._pool) < self._POOL_MAX_SIZE:
+            self._pool.append(self)
+            
+    @property
+    def status(self) -> TaskStatus:
+        """任务状态（内部以原始值保存）"""
+        return _STATUS_BY_VALUE[self._status]
+        
+    @status.setter
+    def status(self, status: TaskStatus):
+        self._status = status.value if isinstance(status, TaskStatus) else TaskStatus(status).value
+        
     def start(self):
         """开始任务"""
-        self.status = TaskStatus.IN_PROGRESS
-        self.started_at = datetime.now()
+        self._status = _IN_PROGRESS
+        self.started_at = _clock.get()
         
     def complete(self, result: Dict[str, Any] = None):
         """完成任务"""
-        self.status = TaskStatus.COMPLETED
-        self.completed_at = datetime.now()
+        self._status = _COMPLETED
+        self.completed_at = _clock.get()
         self.result = result or {}
         self.progress = 1.0
         
     def fail(self, error_message: str):
         """任务失败"""
-        self.status = TaskStatus.FAILED
-        self.completed_at = datetime.now()
+        self._status = _FAILED
+        self.completed_at = _clock.get()
         self.error_message = error_message
         
     def update_progress(self, progress: float):
@@ -79,24 +196,52 @@ class Task:
         
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'task_id': self.task_id,
-            'task_type': self.task_type,
-            'data': self.data,
-            'priority': self.priority.value,
-            'status': self.status.value,
-            'created_at': self.created_at.isoformat(),
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'result': self.result,
-            'error_message': self.error_message,
-            'progress': self.progress
-        }
+        result = self._static_dict.copy()
+        result['status'] = self._status
+        result['started_at'] = _clock.isoformat(self.started_at) if self.started_at else None
+        result['completed_at'] = _clock.isoformat(self.completed_at) if self.completed_at else None
+        result['result'] = self.result
+        result['error_message'] = self.error_message
+        result['progress'] = self.progress
+        return result
 
 
 class BaseRole(ABC):
     """基础角色抽象类"""
     
+    # 按类名共享的日志器，子类定义时创建
+    logger: ClassVar[logging.Logger] = logging.getLogger('BaseRole')
+    
+    # 基础消息处理器: 动作 -> 处理方法名，分发时再绑定到实例
+    _BASE_HANDLERS: ClassVar[Dict[str, str]] = {
+        'health_check': '_handle_health_check',
+        'status_query': '_handle_status_query',
+        'task_assign': '_handle_task_assignment',
+        'task_cancel': '_handle_task_cancellation',
+        'shutdown': '_handle_shutdown'
+    }
+    # 子类专用消息处理器，子类定义时与父类的表合并
+    _CUSTOM_HANDLERS: ClassVar[Dict[str, str]] = {}
+    # 合并后的分发表及其查找函数（dict.get，不会绑定到实例）
+    _HANDLER_NAMES: ClassVar[Dict[str, str]] = dict(_BASE_HANDLERS)
+    _handler_name: ClassVar[Callable[[str], Optional[str]]] = _HANDLER_NAMES.get
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.logger = logging.getLogger(cls.__name__)
+        
+        handlers: Dict[str, str] = {}
+        for klass in reversed(cls.__mro__):
+            handlers.update(klass.__dict__.get('_CUSTOM_HANDLERS', {}))
+        cls._CUSTOM_HANDLERS = handlers
+        cls._rebuild_dispatch()
+        
+    @classmethod
+    def _rebuild_dispatch(cls):
+        """重建分发表，运行时修改 _CUSTOM_HANDLERS 后需调用"""
+        cls._HANDLER_NAMES = {**cls._BASE_HANDLERS, **cls._CUSTOM_HANDLERS}
+        cls._handler_name = cls._HANDLER_NAMES.get
+        
     def __init__(self, role_id: str, role_name: str, config: Dict[str, Any] = None):
         self.role_id = role_id
         self.role_name = role_name
@@ -105,40 +250,81 @@ class BaseRole(ABC):
         
         # 任务管理
         self.current_tasks: Dict[str, Task] = {}
-        self.task_queue = asyncio.PriorityQueue()
+        # 任务堆: 存放整数排序键 (负优先级 << 48) | 序号，堆内只做整数比较；
+        # 序号保证同优先级先进先出，键到任务的映射保存在 _heap_tasks 中
+        self._heap: List[int] = []
+        self._heap_tasks: Dict[int, Task] = {}
+        self._heap_event = asyncio.Event()
+        self._heap_counter = itertools.count()
+        # 任务ID: 角色ID + 实例标识 + 自增序号（实例标识避免角色重启后ID重复）
+        self._task_id_prefix = f"{role_id}:{uuid.uuid4().hex[:8]}:"
+        self._task_counter = itertools.count()
         self.max_concurrent_tasks = self.config.get('max_concurrent_tasks', 3)
         
         # 通信相关
         self.message_bus: Optional[Any] = None
-        self.message_handlers: Dict[str, Callable] = {}
-        
-        # 日志和统计
-        self.logger = logging.getLogger(f'{self.__class__.__name__}')
-        self.stats = {
-            'tasks_completed': 0,
-            'tasks_failed': 0,
-            'messages_sent': 0,
-            'messages_received': 0,
-            'uptime_start': datetime.now()
+        
+        # 预绑定每个角色/调用点固定不变的消息构建参数
+        self._build_request = functools.partial(MessageBuilder.create_request, self.role_id)
+        self._build_ok_response = functools.partial(MessageBuilder.create_response, success=True)
+        self._build_err_response = functools.partial(MessageBuilder.create_response, success=False)
+        
+        # get_status 返回的只读视图，底层字典在查询时原地刷新
+        self._status_backing: Dict[str, Any] = {
+            'role_id': role_id,
+            'role_name': role_name,
+            'state': None,
+            'last_activity': None,
+            'current_tasks_count': 0,
+            'task_queue_size': 0,
+            'stats': None
         }
+        self._status_view = MappingProxyType(self._status_backing)
+        
+        # 状态更新消息模板，发送时复制后填充变化字段
+        self._status_envelope_template = {
+            'event': None,
+            'role_id': self.role_id,
+            'timestamp': None,
+            'data': None
+        }
+        
+        # 统计计数器，热路径上直接累加，读取stats时再组装
+        self._n_completed = 0
+        self._n_failed = 0
+        self._n_sent = 0
+        self._n_received = 0
+        self._uptime_start = datetime.now()
         
         # 内部状态
         self.last_activity = datetime.now()
         self.worker_tasks: List[asyncio.Task] = []
+        self._running_tasks: Set[asyncio.Task] = set()
         self.running = False
         
-        # 注册基础消息处理器
-        self._register_base_handlers()
+        # 任务状态更新批量发送：攒满一批或定时刷新
+        self._pending_updates: List[Dict[str, Any]] = []
+        self._flush_event = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
         
-    def _register_base_handlers(self):
-        """注册基础消息处理器"""
-        self.message_handlers.update({
-            'health_check': self._handle_health_check,
-            'status_query': self._handle_status_query,
-            'task_assign': self._handle_task_assignment,
-            'task_cancel': self._handle_task_cancellation,
-            'shutdown': self._handle_shutdown
-        })
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """统计信息快照"""
+        return {
+            'tasks_completed': self._n_completed,
+            'tasks_failed': self._n_failed,
+            'messages_sent': self._n_sent,
+            'messages_received': self._n_received,
+            'uptime_start': self._uptime_start
+        }
+        
+    @property
+    def message_handlers(self) -> Dict[str, Callable]:
+        """已注册的消息处理器（动作 -> 绑定方法），供查看使用"""
+        return {
+            action: getattr(self, name)
+            for action, name in self._HANDLER_NAMES.items()
+        }
         
     async def initialize(self, message_bus: Any):
         """初始化角色"""
@@ -155,6 +341,9 @@ class BaseRole(ABC):
             self.state = RoleState.ACTIVE
             self.running = True
             
+            # 启动状态更新刷新器
+            self._flush_task = asyncio.create_task(self._flush_updates())
+            
             # 发送初始化完成消息
             await self._send_status_update("initialized")
             
@@ -172,17 +361,31 @@ class BaseRole(ABC):
             self.running = False
             self.state = RoleState.SHUTDOWN
             
-            # 停止任务处理器
-            for task in self.worker_tasks:
+            # 停止任务分发器和执行中的任务
+            workers = [*self.worker_tasks, *self._running_tasks]
+            for task in workers:
                 task.cancel()
                 
-            await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+            # 只等待取消完成，不收集结果；超时未结束的任务不再等待
+            shutdown_timeout = self.config.get('shutdown_timeout', 5.0)
+            if workers:
+                _, pending = await asyncio.wait(workers, timeout=shutdown_timeout)
+                if pending:
+                    self.logger.warning("%d 个任务在关闭超时后仍未结束", len(pending))
             self.worker_tasks.clear()
+            self._running_tasks.clear()
+            
+            # 停止刷新器并发出剩余的状态更新
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+                await asyncio.wait((self._flush_task,), timeout=shutdown_timeout)
+                self._flush_task = None
+            await self._send_pending_updates()
             
             # 取消所有进行中的任务
             for task in self.current_tasks.values():
-                if task.status == TaskStatus.IN_PROGRESS:
-                    task.status = TaskStatus.CANCELLED
+                if task._status == _IN_PROGRESS:
+                    task._status = _CANCELLED
                     
             # 执行具体角色的清理
             await self._cleanup_role()
@@ -194,74 +397,82 @@ class BaseRole(ABC):
             
     async def handle_message(self, message: Message):
         """处理接收到的消息"""
+        self._n_received += 1
+        self.last_activity = _clock.get()
+        
+        # 只有请求消息需要在出错时回复，单向消息走不带回复的分支
+        if message.header.message_type is MessageType.REQUEST:
+            await self._dispatch_request(message)
+        else:
+            await self._dispatch_oneway(message)
+            
+    async def _dispatch_request(self, message: Message):
+        """分发请求消息，出错时发送错误响应"""
         try:
-            self.stats['messages_received'] += 1
-            self.last_activity = datetime.now()
-            
-            action = message.body.action
+            await self._dispatch(message)
+        except Exception as e:
+            self.logger.error("处理消息时发生错误: %s", e)
+            await self._send_error_response(message, str(e))
             
-            # 查找处理器
-            handler = self.message_handlers.get(action)
-            if handler:
-                await handler(message)
-            else:
-                # 交给具体角色处理
-                await self._handle_custom_message(message)
-                
+    async def _dispatch_oneway(self, message: Message):
+        """分发单向消息（通知等），出错时只记录日志"""
+        try:
+            await self._dispatch(message)
         except Exception as e:
-            self.logger.error(f"处理消息时发生错误: {e}")
+            self.logger.error("处理消息时发生错误: %s", e)
+            
+    async def _dispatch(self, message: Message):
+        """查找并调用消息处理器"""
+        name = self._handler_name(message.body.action)
+        handler = getattr(self, name, None) if name else None
+        if handler:
+            await handler(message)
+        else:
+            # 交给具体角色处理
+            await self._handle_custom_message(message)
             
-            # 发送错误响应
-            if message.header.message_type == MessageType.REQUEST:
-                await self._send_error_response(message, str(e))
-                
     async def send_message(self, to_role: str, action: str, data: Dict[str, Any] = None,
                           message_type: MessageType = MessageType.REQUEST,
                           priority: Priority = Priority.NORMAL) -> str:
         """发送消息"""
         try:
-            message = MessageBuilder.create_request(
-                from_role=self.role_id,
-                to_role=to_role,
-                action=action,
-                data=data or {},
-                priority=priority
-            )
+            # create_request 内部会为空数据创建新字典
+            message = self._build_request(to_role, action, data, priority)
             message.header.message_type = message_type
             
             message_id = await self.message_bus.send_message(message)
-            self.stats['messages_sent'] += 1
+            self._n_sent += 1
             
             return message_id
             
         except Exception as e:
-            self.logger.error(f"发送消息失败: {e}")
+            self.logger.error("发送消息失败: %s", e)
             raise
             
     async def add_task(self, task_type: str, data: Dict[str, Any], 
                       priority: Priority = Priority.NORMAL) -> str:
         """添加任务到队列"""
-        task_id = str(uuid.uuid4())
-        task = Task(task_id, task_type, data, priority)
+        task_id = f"{self._task_id_prefix}{next(self._task_counter):x}"
+        task = Task.acquire(task_id, task_type, data, priority)
         
-        # 使用负优先级值，因为PriorityQueue是最小堆
-        priority_value = -priority.value
-        await self.task_queue.put((priority_value, task))
+        # 使用负优先级值，因为heapq是最小堆
+        key = (-priority.value << _HEAP_SEQ_BITS) | next(self._heap_counter)
+        self._heap_tasks[key] = task
+        heapq.heappush(self._heap, key)
+        self._heap_event.set()
         
-        self.logger.info(f"添加任务 {task_id}: {task_type}")
+        self.logger.info("添加任务 %s: %s", task_id, task_type)
         return task_id
         
-    def get_status(self) -> Dict[str, Any]:
-        """获取角色状态"""
-        return {
-            'role_id': self.role_id,
-            'role_name': self.role_name,
-            'state': self.state.value,
-            'last_activity': self.last_activity.isoformat(),
-            'current_tasks_count': len(self.current_tasks),
-            'task_queue_size': self.task_queue.qsize(),
-            'stats': self.stats.copy()
-        }
+    def get_status(self) -> Mapping[str, Any]:
+        """获取角色状态（只读视图，下次调用时会被刷新；需要保留时请用 dict() 复制）"""
+        backing = self._status_backing
+        backing['state'] = self.state.value
+        backing['last_activity'] = _clock.isoformat(self.last_activity)
+        backing['current_tasks_count'] = len(self.current_tasks)
+        backing['task_queue_size'] = len(self._heap)
+        backing['stats'] = self.stats
+        return self._status_view
         
     # 基础消息处理器
     async def _handle_health_check(self, message: Message):
@@ -269,15 +480,16 @@ class BaseRole(ABC):
         response_data = {
             'status': 'healthy',
             'state': self.state.value,
-            'last_activity': self.last_activity.isoformat(),
-            'uptime': (datetime.now() - self.stats['uptime_start']).total_seconds()
+            'last_activity': _clock.isoformat(self.last_activity),
+            'uptime': (_clock.get() - self._uptime_start).total_seconds()
         }
         
         await self._send_response(message, response_data)
         
     async def _handle_status_query(self, message: Message):
         """处理状态查询"""
-        status = self.get_status()
+        # 响应数据会被补充success字段并随消息发送，需要独立的字典
+        status = dict(self.get_status())
         await self._send_response(message, status)
         
     async def _handle_task_assignment(self, message: Message):
@@ -307,7 +519,7 @@ class BaseRole(ABC):
             
             if task_id in self.current_tasks:
                 task = self.current_tasks[task_id]
-                task.status = TaskStatus.CANCELLED
+                task._status = _CANCELLED
                 del self.current_tasks[task_id]
                 
                 response_data = {'status': 'cancelled'}
@@ -326,26 +538,20 @@ class BaseRole(ABC):
         
     async def _send_response(self, request_message: Message, data: Dict[str, Any]):
         """发送响应消息"""
-        response = MessageBuilder.create_response(request_message, data, success=True)
+        response = self._build_ok_response(request_message, data)
         await self.message_bus.send_message(response)
         
     async def _send_error_response(self, request_message: Message, error_message: str):
         """发送错误响应"""
-        response = MessageBuilder.create_response(
-            request_message, 
-            {'error': error_message}, 
-            success=False
-        )
+        response = self._build_err_response(request_message, {'error': error_message})
         await self.message_bus.send_message(response)
         
     async def _send_status_update(self, event: str, data: Dict[str, Any] = None):
         """发送状态更新"""
-        update_data = {
-            'event': event,
-            'role_id': self.role_id,
-            'timestamp': datetime.now().isoformat(),
-            'data': data or {}
-        }
+        update_data = self._status_envelope_template.copy()
+        update_data['event'] = event
+        update_data['timestamp'] = _clock.isoformat(_clock.get())
+        update_data['data'] = data or {}
         
         await self.send_message(
             to_role="status_monitor",
@@ -355,44 +561,51 @@ class BaseRole(ABC):
         )
         
     async def _start_task_workers(self):
-        """启动任务处理工作者"""
-        for i in range(self.max_concurrent_tasks):
-            task = asyncio.create_task(self._task_worker(f"worker-{i}"))
-            self.worker_tasks.append(task)
-            
-    async def _task_worker(self, worker_name: str):
-        """任务处理工作者"""
-        self.logger.debug(f"任务工作者 {worker_name} 启动")
+        """启动任务分发器"""
+        self._task_semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        self.worker_tasks.append(asyncio.create_task(self._dispatch_loop()))
+        
+    async def _dispatch_loop(self):
+        """任务分发器：按优先级取出任务，在并发上限内为每个任务创建协程执行"""
+        self.logger.debug("任务分发器启动")
         
         while self.running:
             try:
-                # 从队列获取任务
-                priority_value, task = await asyncio.wait_for(
-                    self.task_queue.get(), timeout=1.0
-                )
-                
-                # 检查并发任务数量限制
-                if len(self.current_tasks) >= self.max_concurrent_tasks:
-                    # 重新放回队列
-                    await self.task_queue.put((priority_value, task))
-                    await asyncio.sleep(0.1)
+                # 队列为空时等待新任务
+                if not self._heap:
+                    self._heap_event.clear()
+                    await self._heap_event.wait()
+                    continue
+                    
+                # 先占用并发名额再出队，等待期间到达的高优先级任务仍会优先执行
+                await self._task_semaphore.acquire()
+                if not self._heap:
+                    self._task_semaphore.release()
                     continue
                     
-                # 执行任务
+                task = self._heap_tasks.pop(heapq.heappop(self._heap))
                 self.current_tasks[task.task_id] = task
-                await self._execute_task(task)
                 
-            except asyncio.TimeoutError:
-                continue
+                runner = asyncio.create_task(self._run_task(task))
+                self._running_tasks.add(runner)
+                runner.add_done_callback(self._running_tasks.discard)
+                
             except Exception as e:
-                self.logger.error(f"工作者 {worker_name} 处理任务时发生错误: {e}")
+                self.logger.error("任务分发器发生错误: %s", e)
                 
-        self.logger.debug(f"任务工作者 {worker_name} 停止")
+        self.logger.debug("任务分发器停止")
         
+    async def _run_task(self, task: Task):
+        """执行任务并释放并发名额"""
+        try:
+            await self._execute_task(task)
+        finally:
+            self._task_semaphore.release()
+            
     async def _execute_task(self, task: Task):
         """执行单个任务"""
         try:
-            self.logger.info(f"开始执行任务 {task.task_id}: {task.task_type}")
+            self.logger.info("开始执行任务 %s: %s", task.task_id, task.task_type)
             task.start()
             
             # 调用具体角色的任务处理方法
@@ -400,27 +613,65 @@ class BaseRole(ABC):
             
             # 任务完成
             task.complete(result)
-            self.stats['tasks_completed'] += 1
+            self._n_completed += 1
             
-            self.logger.info(f"任务 {task.task_id} 完成")
+            self.logger.info("任务 %s 完成", task.task_id)
             
         except Exception as e:
             # 任务失败
             task.fail(str(e))
-            self.stats['tasks_failed'] += 1
+            self._n_failed += 1
             
-            self.logger.error(f"任务 {task.task_id} 失败: {e}")
+            self.logger.error("任务 %s 失败: %s", task.task_id, e)
             
         finally:
             # 从当前任务列表中移除
             self.current_tasks.pop(task.task_id, None)
             
-            # 发送任务状态更新
+            # 发送任务状态更新（to_dict快照在归还前生成）
             await self._send_task_status_update(task)
             
+            # 归还任务对象
+            task.release()
+            
     async def _send_task_status_update(self, task: Task):
-        """发送任务状态更新"""
-        await self._send_status_update("task_update", task.to_dict())
+        """发送任务状态更新（加入待发送批次，由刷新器合并发送）"""
+        self._pending_updates.append(task.to_dict())
+        if len(self._pending_updates) >= STATUS_BATCH_SIZE:
+            self._flush_event.set()
+            
+    async def _flush_updates(self):
+        """状态更新刷新器：每隔固定间隔或批次攒满时发送一次"""
+        while self.running:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), STATUS_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            
+            try:
+                await self._send_pending_updates()
+            except Exception as e:
+                self.logger.error("发送状态更新批次失败: %s", e)
+                
+    async def _send_pending_updates(self):
+        """发送当前累积的任务状态更新"""
+        if not self._pending_updates:
+            return
+            
+        batch = self._pending_updates
+        self._pending_updates = []
+        
+        await self.send_message(
+            to_role="status_monitor",
+            action="status_update_batch",
+            data={
+                'role_id': self.role_id,
+                'timestamp': _clock.isoformat(_clock.get()),
+                'events': batch
+            },
+            message_type=MessageType.NOTIFICATION
+        )
         
     # 抽象方法 - 需要具体角色实现
     @abstractmethod
@@ -5,10 +5,17 @@ AI自主开发系统 - DevOps工程师
 """
 
 import asyncio
+import hashlib
+import heapq
 import json
 import os
+import re
 import subprocess
-from typing import Dict, Any, List, Optional, Union
+import time
+from array import array
+from collections import deque
+from itertools import chain
+from typing import Dict, Any, List, Optional, Union, Deque, Tuple, Sequence, Callable
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
@@ -21,6 +28,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from roles.base_role import BaseRole, Task, TaskStatus, RoleState
 from communication import Message, MessageBuilder, MessageType, Priority
 
+# 资源数量: 整数 + 可选单位（如 16、32Gi、512Mi、500m）
+_RES_RE = re.compile(r'^(\d+)(Gi|Mi|m)?$')
+
 
 class DeploymentStrategy(Enum):
     """部署策略枚举"""
@@ -71,6 +81,7 @@ class DeploymentRecord:
     success: bool = False
     rollback: bool = False
     notes: str = ""
+    duration: float = 0.0  # 秒，按单调时钟计算
 
 
 @dataclass
@@ -84,25 +95,273 @@ class MonitoringMetric:
     unit: str = ""
 
 
+@dataclass(slots=True)
+class Alert:
+    """指标告警"""
+    metric: str
+    value: float
+    threshold: float
+    severity: str
+    message: str
+    environment: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为消息数据"""
+        data = {
+            'metric': self.metric,
+            'value': self.value,
+            'threshold': self.threshold,
+            'severity': self.severity,
+            'message': self.message
+        }
+        if self.environment is not None:
+            data['environment'] = self.environment
+        return data
+
+
+class AlertThrottle:
+    """告警限流去重 - 同一指纹在去重窗口内只发送一次，并限制每分钟的发送总数（高影响告警不受总数限制）"""
+    
+    def __init__(self, dedup_window: float = 300.0, max_per_minute: int = 30):
+        self.dedup_window = dedup_window
+        self.max_per_minute = max_per_minute
+        self._last_sent: Dict[Any, float] = {}
+        self._send_times: Deque[float] = deque()
+        
+    def allow(self, key: Any, high_impact: bool = False) -> bool:
+        """判断告警是否应发送，允许时记录本次发送"""
+        now = time.monotonic()
+        
+        last = self._last_sent.get(key)
+        if last is not None and now - last < self.dedup_window:
+            return False
+            
+        send_times = self._send_times
+        while send_times and send_times[0] <= now - 60:
+            send_times.popleft()
+        if not high_impact and len(send_times) >= self.max_per_minute:
+            return False
+            
+        send_times.append(now)
+        self._last_sent[key] = now
+        if len(self._last_sent) > 1024:
+            self._prune(now)
+        return True
+        
+    def _prune(self, now: float):
+        """清理已超出去重窗口的指纹"""
+        cutoff = now - self.dedup_window
+        self._last_sent = {key: ts for key, ts in self._last_sent.items() if ts > cutoff}
+
+
+class MetricStore:
+    """指标时间序列存储 - 按列保存（值/时间戳/指标序号），按需增长，写满后覆盖最旧的数据"""
+    
+    # 指标序号列为 unsigned short，序列数不能超过其取值范围
+    MAX_SERIES = 65536
+    
+    def __init__(self, capacity: int = 100000, max_series: int = 1024):
+        self.capacity = capacity
+        self.max_series = min(max_series, self.MAX_SERIES)
+        self.values = array('d')
+        self.timestamps = array('d')
+        self.name_idx = array('H')
+        self.names: List[str] = []
+        self._name_to_idx: Dict[str, int] = {}
+        self.size = 0
+        self._next = 0
+        
+    def _index_of(self, name: str) -> Optional[int]:
+        """获取指标序号，新指标自动分配；序列数已达上限时返回None"""
+        idx = self._name_to_idx.get(name)
+        if idx is None:
+            if len(self.names) >= self.max_series:
+                return None
+            idx = self._name_to_idx[name] = len(self.names)
+            self.names.append(name)
+        return idx
+        
+    def record(self, name: str, value: float, timestamp: Optional[float] = None) -> bool:
+        """记录一个指标采样；序列数已达上限且为新序列时不记录，返回False"""
+        idx = self._index_of(name)
+        if idx is None:
+            return False
+        if timestamp is None:
+            timestamp = time.time()
+        pos = self._next
+        if self.size < self.capacity:
+            self.values.append(value)
+            self.timestamps.append(timestamp)
+            self.name_idx.append(idx)
+            self.size += 1
+        else:
+            self.values[pos] = value
+            self.timestamps[pos] = timestamp
+            self.name_idx[pos] = idx
+        self._next = (pos + 1) % self.capacity
+        return True
+        
+    def summarize(self, names: Sequence[str], since: float,
+                  thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        汇总各指标在 since 之后的采样：采样数、平均值、最大值，给定阈值时附带超过阈值的采样数
+        
+        采样按时间顺序写入，从最新的采样向前扫描，遇到早于 since 的采样即停止；没有采样的指标不出现在结果中
+        """
+        thresholds = thresholds or {}
+        # 指标序号 -> [采样数, 总和, 最大值, 超过阈值的采样数, 阈值]
+        wanted = {}
+        for name in names:
+            idx = self._name_to_idx.get(name)
+            if idx is not None:
+                wanted[idx] = [0, 0.0, float('-inf'), 0, thresholds.get(name)]
+        if not wanted:
+            return {}
+        
+        values, timestamps, name_idx = self.values, self.timestamps, self.name_idx
+        newest_first = chain(range(self._next - 1, -1, -1), range(self.size - 1, self._next - 1, -1))
+        for pos in newest_first:
+            if timestamps[pos] < since:
+                break
+            acc = wanted.get(name_idx[pos])
+            if acc is None:
+                continue
+            value = values[pos]
+            acc[0] += 1
+            acc[1] += value
+            if value > acc[2]:
+                acc[2] = value
+            if acc[4] is not None and value > acc[4]:
+                acc[3] += 1
+        
+        summary = {}
+        for idx, (count, total, maximum, above, threshold) in wanted.items():
+            if not count:
+                continue
+            summary[self.names[idx]] = entry = {'samples': count, 'average': total / count, 'max': maximum}
+            if threshold is not None:
+                entry['above_threshold'] = above
+        return summary
+
+
 class DevOpsEngineer(BaseRole):
     """DevOps工程师 - 负责部署运维的专家角色"""
     
+    # 专用消息处理器: 动作 -> 处理方法名
+    _CUSTOM_HANDLERS = {
+        'setup_environment': '_handle_setup_environment',
+        'deploy_application': '_handle_deploy_application',
+        'setup_cicd_pipeline': '_handle_setup_cicd_pipeline',
+        'monitor_system': '_handle_monitor_system',
+        'handle_incident': '_handle_incident',
+        'rollback_deployment': '_handle_rollback_deployment',
+        'security_scan': '_handle_security_scan',
+        'environment_health_check': '_handle_environment_health_check',
+        'scale_resources': '_handle_scale_resources'
+    }
+    
+    # 枚举值 -> 成员查找表；未命中时再调用枚举构造函数，保持非法值报错
+    _ENV_TYPE_MAP = {member.value: member for member in EnvironmentType}
+    _STRATEGY_MAP = {member.value: member for member in DeploymentStrategy}
+    _INCIDENT_LEVEL_MAP = {member.value: member for member in IncidentLevel}
+    
+    # 需要立即处理的告警/风险等级，以及故障等级对应的通知优先级（默认HIGH）
+    _HIGH_SEVERITIES = frozenset(('critical', 'high'))
+    _INCIDENT_PRIORITY = {
+        IncidentLevel.P0_CRITICAL.value: Priority.CRITICAL,
+        IncidentLevel.P1_HIGH.value: Priority.CRITICAL,
+    }
+    
+    # 关键告警合并发送的间隔（秒）
+    _ALERT_FLUSH_INTERVAL = 0.5
+    
+    # 定期任务: 名称 -> (方法名, 间隔秒数)
+    _PERIODIC_JOBS = {
+        'health_check': ('_health_check_tick', 300),     # 每5分钟检查一次
+        'monitoring': ('_monitoring_tick', 60),          # 每分钟检查一次
+        'security_scan': ('_security_scan_tick', 3600),  # 每小时扫描一次
+    }
+    
+    # 初始化时建立的基础监控指标
+    _BASE_METRICS = ('cpu', 'memory', 'disk', 'network', 'response_time', 'error_rate')
+    
+    # 默认采集的监控指标
+    _DEFAULT_METRICS = ('cpu', 'memory', 'response_time')
+    
+    # 指标单位
+    _METRIC_UNITS = {
+        'cpu': '%',
+        'memory': '%',
+        'response_time': 'ms',
+        'throughput': 'rps',
+        'error_rate': '%'
+    }
+    
+    # 写入时间序列的已知指标
+    _KNOWN_METRICS = frozenset(_BASE_METRICS) | frozenset(_METRIC_UNITS)
+    
+    # 部署/故障/回滚ID中的时间戳格式
+    _TS_FMT = '%Y%m%d_%H%M%S'
+    
+    # 指标告警表: 指标名 -> (告警规则, 阈值倍数, 告警消息格式化函数)
+    _ALERT_TABLE = {
+        'cpu': ('high_cpu', 1, "CPU使用率过高: {}%".format),
+        'memory': ('high_memory', 1, "内存使用率过高: {}%".format),
+        'response_time': ('slow_response', 1000, "响应时间过长: {}ms".format)
+    }
+    
+    # 模拟安全扫描结果模板（每次扫描返回副本，调用方修改结果不会影响模板）
+    _MOCK_VULNERABILITIES = (
+        {
+            'id': 'CVE-2023-1234',
+            'severity': 'medium',
+            'description': '依赖库存在已知漏洞',
+            'component': 'nginx:1.18'
+        },
+    )
+    _MOCK_RECOMMENDATIONS = (
+        '升级nginx到最新版本',
+        '定期更新依赖库',
+        '配置安全headers'
+    )
+    
     def __init__(self, role_id: str = "devops_engineer", config: Dict[str, Any] = None):
         super().__init__(role_id, "DevOps工程师", config)
         
+        # 历史记录保留上限，超出后丢弃最旧的记录
+        history_cap = self.config.get('history_cap', 10000)
+        
         # 环境管理
         self.environments: Dict[str, Environment] = {}
-        self.deployment_history: List[DeploymentRecord] = []
+        self.deployment_history: Deque[DeploymentRecord] = deque(maxlen=history_cap)
+        # 每个环境最近一次成功的非回滚部署，回滚时直接查找
+        self._last_success_by_env: Dict[str, DeploymentRecord] = {}
         self.current_deployments: Dict[str, DeploymentRecord] = {}
         
         # CI/CD配置
         self.pipeline_configs: Dict[str, Dict[str, Any]] = {}
-        self.build_history: List[Dict[str, Any]] = []
+        self.build_history: Deque[Dict[str, Any]] = deque(maxlen=history_cap)
         
         # 监控和告警
-        self.monitoring_metrics: Dict[str, MonitoringMetric] = {}
+        self.monitoring_metrics: Dict[str, MonitoringMetric] = {}  # 各指标最新值
+        self.metric_store = MetricStore(
+            self.config.get('metric_store_capacity', 100000),
+            self.config.get('metric_store_max_series', 1024)
+        )
         self.alert_rules: Dict[str, Dict[str, Any]] = {}
         self.active_incidents: Dict[str, Dict[str, Any]] = {}
+        # 待发送的关键告警，由刷新任务定期合并发送
+        self._alert_buffer: List[Alert] = []
+        self._alert_flush_task: Optional[asyncio.Task] = None
+        self._alert_throttle = AlertThrottle(
+            self.config.get('alert_dedup_window', 300.0),
+            self.config.get('alert_max_per_minute', 30)
+        )
+        # 定期任务调度器和正在执行的tick
+        self._periodic_task: Optional[asyncio.Task] = None
+        self._periodic_runs: Dict[str, asyncio.Task] = {}
+        # 上一次定期安全扫描结果的指纹，结果未变化时不重复告警
+        self._last_scan_fingerprint: Optional[str] = None
         
         # 基础设施配置
         self.infrastructure_configs: Dict[str, Any] = {}
@@ -111,19 +370,6 @@ class DevOpsEngineer(BaseRole):
         # 工具和服务状态
         self.service_status: Dict[str, str] = {}
         
-        # 注册专用消息处理器
-        self.message_handlers.update({
-            'setup_environment': self._handle_setup_environment,
-            'deploy_application': self._handle_deploy_application,
-            'setup_cicd_pipeline': self._handle_setup_cicd_pipeline,
-            'monitor_system': self._handle_monitor_system,
-            'handle_incident': self._handle_incident,
-            'rollback_deployment': self._handle_rollback_deployment,
-            'security_scan': self._handle_security_scan,
-            'environment_health_check': self._handle_environment_health_check,
-            'scale_resources': self._handle_scale_resources
-        })
-        
         # 初始化默认配置
         self._initialize_default_configs()
         
@@ -187,18 +433,36 @@ class DevOpsEngineer(BaseRole):
         # 初始化环境监控
         await self._initialize_monitoring()
         
-        # 启动定期任务
-        asyncio.create_task(self._periodic_health_check())
-        asyncio.create_task(self._periodic_monitoring())
-        asyncio.create_task(self._periodic_security_scan())
+        # 启动定期任务调度器
+        self._periodic_task = asyncio.create_task(self._periodic_scheduler())
+        self._alert_flush_task = asyncio.create_task(self._flush_alerts())
         
     async def _cleanup_role(self):
         """清理DevOps工程师"""
         self.logger.info("清理DevOps工程师资源")
         
+        # 停止定期任务
+        if self._periodic_task is not None:
+            self._periodic_task.cancel()
+            await asyncio.wait((self._periodic_task,))
+            self._periodic_task = None
+        runs = list(self._periodic_runs.values())
+        self._periodic_runs.clear()
+        for run in runs:
+            run.cancel()
+        if runs:
+            await asyncio.wait(runs)
+            
+        # 停止告警刷新任务并发出剩余告警
+        if self._alert_flush_task is not None:
+            self._alert_flush_task.cancel()
+            await asyncio.wait((self._alert_flush_task,))
+            self._alert_flush_task = None
+        await self._send_alert_batch()
+        
     async def _handle_custom_message(self, message: Message):
         """处理自定义消息"""
-        self.logger.warning(f"收到未知消息类型: {message.body.action}")
+        self.logger.warning("收到未知消息类型: %s", message.body.action)
         
     async def _process_task(self, task: Task) -> Dict[str, Any]:
         """处理任务"""
@@ -222,11 +486,12 @@ class DevOpsEngineer(BaseRole):
         try:
             env_data = message.body.data
             env_name = env_data.get('environment_name')
-            env_type = EnvironmentType(env_data.get('environment_type', 'development'))
+            env_type_value = env_data.get('environment_type', 'development')
+            env_type = self._ENV_TYPE_MAP.get(env_type_value) or EnvironmentType(env_type_value)
             resources = env_data.get('resources', {})
             config = env_data.get('config', {})
             
-            self.logger.info(f"设置环境: {env_name} ({env_type.value})")
+            self.logger.info("设置环境: %s (%s)", env_name, env_type.value)
             
             # 创建环境
             environment = Environment(
@@ -269,19 +534,22 @@ class DevOpsEngineer(BaseRole):
             deploy_data = message.body.data
             environment = deploy_data.get('environment', 'staging')
             version = deploy_data.get('version', 'latest')
-            strategy = DeploymentStrategy(deploy_data.get('strategy', 'rolling'))
+            strategy_value = deploy_data.get('strategy', 'rolling')
+            strategy = self._STRATEGY_MAP.get(strategy_value) or DeploymentStrategy(strategy_value)
             
-            self.logger.info(f"部署应用到 {environment}: 版本 {version}, 策略 {strategy.value}")
+            self.logger.info("部署应用到 %s: 版本 %s, 策略 %s", environment, version, strategy.value)
             
             # 创建部署记录
-            deployment_id = f"deploy_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            now = datetime.now()
+            mono_start = time.monotonic()
+            deployment_id = f"deploy_{now.strftime(self._TS_FMT)}"
             deployment = DeploymentRecord(
                 deployment_id=deployment_id,
                 environment=environment,
                 version=version,
                 strategy=strategy,
                 status="in_progress",
-                start_time=datetime.now()
+                start_time=now
             )
             
             self.current_deployments[deployment_id] = deployment
@@ -291,13 +559,16 @@ class DevOpsEngineer(BaseRole):
             
             # 更新部署记录
             deployment.end_time = datetime.now()
+            deployment.duration = time.monotonic() - mono_start
             deployment.success = deploy_result['success']
             deployment.status = "completed" if deploy_result['success'] else "failed"
             deployment.notes = deploy_result.get('notes', '')
             
             # 移动到历史记录
             self.deployment_history.append(deployment)
-            del self.current_deployments[deployment_id]
+            self.current_deployments.pop(deployment_id, None)
+            if deployment.success:
+                self._last_success_by_env[environment] = deployment
             
             # 更新环境状态
             if environment in self.environments:
@@ -313,7 +584,7 @@ class DevOpsEngineer(BaseRole):
                 'status': 'success' if deploy_result['success'] else 'failed',
                 'environment': environment,
                 'version': version,
-                'duration': (deployment.end_time - deployment.start_time).total_seconds(),
+                'duration': deployment.duration,
                 'notes': deployment.notes
             }
             
@@ -333,7 +604,7 @@ class DevOpsEngineer(BaseRole):
             repo_url = pipeline_data.get('repository_url')
             build_config = pipeline_data.get('build_config', {})
             
-            self.logger.info(f"设置CI/CD流水线: {project_name}")
+            self.logger.info("设置CI/CD流水线: %s", project_name)
             
             # 创建流水线配置
             pipeline_config = {
@@ -384,13 +655,15 @@ class DevOpsEngineer(BaseRole):
         try:
             monitor_data = message.body.data
             target = monitor_data.get('target', 'all')
-            metrics = monitor_data.get('metrics', ['cpu', 'memory', 'response_time'])
+            metrics = monitor_data.get('metrics', self._DEFAULT_METRICS)
             
-            self.logger.info(f"监控系统: {target}")
+            self.logger.info("监控系统: %s", target)
             
             # 收集监控指标
             monitoring_result = await self._collect_monitoring_metrics(target, metrics)
-            
+            if not monitoring_result['success']:
+                raise Exception(monitoring_result['error'])
+                
             # 分析指标并生成告警
             alerts = await self._analyze_metrics_and_alert(monitoring_result['metrics'])
             
@@ -398,8 +671,9 @@ class DevOpsEngineer(BaseRole):
                 'status': 'success',
                 'target': target,
                 'metrics': monitoring_result['metrics'],
-                'alerts': alerts,
-                'timestamp': datetime.now().isoformat()
+                'alerts': [alert.to_dict() for alert in alerts],
+                'summary': self._summarize_metrics(target, metrics),
+                'timestamp': monitoring_result['timestamp']
             }
             
             await self._send_response(message, response_data)
@@ -411,12 +685,14 @@ class DevOpsEngineer(BaseRole):
         """处理故障事件"""
         try:
             incident_data = message.body.data
-            incident_id = incident_data.get('incident_id', f"inc_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-            severity = IncidentLevel(incident_data.get('severity', 'p2_medium'))
+            now = datetime.now()
+            incident_id = incident_data.get('incident_id') or f"inc_{now.strftime(self._TS_FMT)}"
+            severity_value = incident_data.get('severity', 'p2_medium')
+            severity = self._INCIDENT_LEVEL_MAP.get(severity_value) or IncidentLevel(severity_value)
             description = incident_data.get('description', '')
             affected_services = incident_data.get('affected_services', [])
             
-            self.logger.warning(f"处理故障事件: {incident_id} ({severity.value})")
+            self.logger.warning("处理故障事件: %s (%s)", incident_id, severity.value)
             
             # 记录故障事件
             incident = {
@@ -425,7 +701,7 @@ class DevOpsEngineer(BaseRole):
                 'description': description,
                 'affected_services': affected_services,
                 'status': 'investigating',
-                'start_time': datetime.now(),
+                'start_time': now,
                 'timeline': [],
                 'resolution': None
             }
@@ -458,7 +734,7 @@ class DevOpsEngineer(BaseRole):
             environment = rollback_data.get('environment')
             target_version = rollback_data.get('target_version', 'previous')
             
-            self.logger.info(f"回滚部署: {environment} -> {target_version}")
+            self.logger.info("回滚部署: %s -> %s", environment, target_version)
             
             # 查找目标版本
             if target_version == 'previous':
@@ -468,14 +744,16 @@ class DevOpsEngineer(BaseRole):
                 target_version = target_deployment.version
                 
             # 创建回滚部署记录
-            rollback_id = f"rollback_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            now = datetime.now()
+            mono_start = time.monotonic()
+            rollback_id = f"rollback_{now.strftime(self._TS_FMT)}"
             rollback_deployment = DeploymentRecord(
                 deployment_id=rollback_id,
                 environment=environment,
                 version=target_version,
                 strategy=DeploymentStrategy.BLUE_GREEN,  # 回滚使用蓝绿部署
                 status="in_progress",
-                start_time=datetime.now(),
+                start_time=now,
                 rollback=True
             )
             
@@ -483,6 +761,7 @@ class DevOpsEngineer(BaseRole):
             rollback_result = await self._execute_rollback(rollback_deployment)
             
             rollback_deployment.end_time = datetime.now()
+            rollback_deployment.duration = time.monotonic() - mono_start
             rollback_deployment.success = rollback_result['success']
             rollback_deployment.status = "completed" if rollback_result['success'] else "failed"
             
@@ -493,7 +772,7 @@ class DevOpsEngineer(BaseRole):
                 'status': 'success' if rollback_result['success'] else 'failed',
                 'environment': environment,
                 'target_version': target_version,
-                'duration': (rollback_deployment.end_time - rollback_deployment.start_time).total_seconds()
+                'duration': rollback_deployment.duration
             }
             
             await self._send_response(message, response_data)
@@ -507,21 +786,22 @@ class DevOpsEngineer(BaseRole):
             check_data = message.body.data
             environment = check_data.get('environment', 'all')
             
-            self.logger.info(f"环境健康检查: {environment}")
+            self.logger.info("环境健康检查: %s", environment)
+            
+            # 本次检查的所有结果共用一个时间戳
+            now_iso = datetime.now().isoformat()
             
             if environment == 'all':
-                health_results = {}
-                for env_name, env in self.environments.items():
-                    health_results[env_name] = await self._check_environment_health(env)
+                health_results = await self._check_all_environments_health(now_iso)
             else:
                 if environment not in self.environments:
                     raise Exception(f"环境不存在: {environment}")
-                health_results = {environment: await self._check_environment_health(self.environments[environment])}
+                health_results = {environment: await self._check_environment_health(self.environments[environment], now_iso)}
                 
             response_data = {
                 'status': 'success',
                 'health_results': health_results,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso
             }
             
             await self._send_response(message, response_data)
@@ -536,7 +816,7 @@ class DevOpsEngineer(BaseRole):
             scan_type = scan_data.get('scan_type', 'full')
             target = scan_data.get('target', 'application')
             
-            self.logger.info(f"安全扫描: {scan_type} - {target}")
+            self.logger.info("安全扫描: %s - %s", scan_type, target)
             
             # 执行安全扫描
             scan_result = await self._execute_security_scan(scan_type, target)
@@ -553,7 +833,7 @@ class DevOpsEngineer(BaseRole):
             await self._send_response(message, response_data)
             
             # 如果发现高风险漏洞，发送告警
-            if scan_result['risk_level'] in ['high', 'critical']:
+            if scan_result['risk_level'] in self._HIGH_SEVERITIES:
                 await self._send_security_alert(scan_result)
                 
         except Exception as e:
@@ -567,7 +847,7 @@ class DevOpsEngineer(BaseRole):
             action = scale_data.get('action', 'scale_up')  # scale_up, scale_down, auto_scale
             resources = scale_data.get('resources', {})
             
-            self.logger.info(f"资源扩缩容: {environment} - {action}")
+            self.logger.info("资源扩缩容: %s - %s", environment, action)
             
             if environment not in self.environments:
                 raise Exception(f"环境不存在: {environment}")
@@ -579,7 +859,7 @@ class DevOpsEngineer(BaseRole):
             
             # 更新环境资源配置
             if scale_result['success']:
-                env.resources.update(scale_result['new_resources'])
+                env.resources.update(scale_result['changed'])
                 
             response_data = {
                 'status': 'success' if scale_result['success'] else 'failed',
@@ -599,7 +879,7 @@ class DevOpsEngineer(BaseRole):
         """创建环境"""
         try:
             # 模拟环境创建过程
-            self.logger.info(f"创建环境: {environment.name}")
+            self.logger.info("创建环境: %s", environment.name)
             
             # 模拟资源分配
             await asyncio.sleep(1)  # 模拟创建时间
@@ -616,20 +896,17 @@ class DevOpsEngineer(BaseRole):
     async def _execute_deployment(self, deployment: DeploymentRecord) -> Dict[str, Any]:
         """执行部署"""
         try:
-            self.logger.info(f"执行部署: {deployment.deployment_id}")
-            
-            # 模拟部署过程
-            steps = [
-                "下载镜像",
-                "健康检查",
-                "流量切换",
-                "验证部署"
-            ]
-            
-            for step in steps:
-                self.logger.info(f"部署步骤: {step}")
-                await asyncio.sleep(0.5)  # 模拟每个步骤的时间
-                
+            self.logger.info("执行部署: %s", deployment.deployment_id)
+            
+            # 下载镜像与目标环境健康检查互不依赖，并行执行；
+            # 流量切换需要两者都完成，验证部署在切换之后进行
+            await asyncio.gather(
+                self._run_deployment_step(deployment, "下载镜像"),
+                self._run_deployment_step(deployment, "健康检查")
+            )
+            await self._run_deployment_step(deployment, "流量切换")
+            await self._run_deployment_step(deployment, "验证部署")
+            
             return {
                 'success': True,
                 'notes': f"使用{deployment.strategy.value}策略成功部署到{deployment.environment}"
@@ -638,10 +915,30 @@ class DevOpsEngineer(BaseRole):
         except Exception as e:
             return {'success': False, 'notes': f"部署失败: {e}"}
             
+    async def _run_deployment_step(self, deployment: DeploymentRecord, step: str):
+        """执行单个部署步骤"""
+        self.logger.info("部署步骤 %s: %s", deployment.deployment_id, step)
+        await asyncio.sleep(0.5)  # 模拟步骤的时间
+        
+    async def _run_command(self, cmd: List[str], timeout: float = 60) -> Tuple[int, bytes, bytes]:
+        """异步执行外部命令（kubectl/helm/docker等），超时后终止子进程并抛出TimeoutError"""
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        return proc.returncode, stdout, stderr
+        
     async def _create_cicd_pipeline(self, pipeline_config: Dict[str, Any]) -> Dict[str, Any]:
         """创建CI/CD流水线"""
         try:
-            self.logger.info(f"创建CI/CD流水线: {pipeline_config['project_name']}")
+            self.logger.info("创建CI/CD流水线: %s", pipeline_config['project_name'])
             
             # 模拟流水线创建
             await asyncio.sleep(1)
@@ -655,82 +952,125 @@ class DevOpsEngineer(BaseRole):
         except Exception as e:
             return {'success': False, 'error': str(e)}
             
-    async def _collect_monitoring_metrics(self, target: str, metrics: List[str]) -> Dict[str, Any]:
+    async def _collect_monitoring_metrics(self, target: str, metrics: Sequence[str]) -> Dict[str, Any]:
         """收集监控指标"""
         try:
             collected_metrics = {}
+            now = datetime.now()
+            now_iso = now.isoformat()
             
-            for metric in metrics:
-                if metric == 'cpu':
-                    value = 45.2  # 模拟CPU使用率
-                elif metric == 'memory':
-                    value = 67.8  # 模拟内存使用率
-                elif metric == 'response_time':
-                    value = 250.5  # 模拟响应时间(ms)
-                else:
-                    value = 0.0
-                    
+            for metric, value in self._sample_metrics(target, metrics, now):
                 collected_metrics[metric] = {
                     'value': value,
                     'unit': self._get_metric_unit(metric),
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': now_iso
                 }
                 
-            return {'success': True, 'metrics': collected_metrics}
+            return {'success': True, 'metrics': collected_metrics, 'timestamp': now_iso}
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
             
+    async def _collect_and_analyze(self, target: str, metrics: Sequence[str]) -> List[Alert]:
+        """采集指标并在同一遍中生成告警（不构建中间指标字典）"""
+        thresholds = self._alert_thresholds()
+        alerts = []
+        for metric, value in self._sample_metrics(target, metrics, datetime.now()):
+            alert = self._make_alert(thresholds, metric, value, environment=target)
+            if alert is not None:
+                alerts.append(alert)
+        return alerts
+        
+    def _sample_metrics(self, target: str, metrics: Sequence[str], now: datetime):
+        """采样指标：写入时间序列并刷新最新值，逐个产出 (指标名, 数值)"""
+        now_ts = now.timestamp()
+        for metric in metrics:
+            if metric == 'cpu':
+                value = 45.2  # 模拟CPU使用率
+            elif metric == 'memory':
+                value = 67.8  # 模拟内存使用率
+            elif metric == 'response_time':
+                value = 250.5  # 模拟响应时间(ms)
+            else:
+                value = 0.0
+                
+            # 只为已知环境和已知指标写入时间序列（目标和指标名来自请求数据，避免序列无限增长）
+            if metric in self._KNOWN_METRICS and (target == 'all' or target in self.environments):
+                series = self._series_name(target, metric)
+                if not self.metric_store.record(series, value, now_ts):
+                    self.logger.warning("指标序列数已达上限，未记录: %s", series)
+            latest = self.monitoring_metrics.get(metric)
+            if latest is not None:
+                latest.value = value
+                latest.timestamp = now
+                
+            yield metric, value
+            
+    def _series_name(self, target: str, metric: str) -> str:
+        """指标在时间序列存储中的名称"""
+        return metric if target == 'all' else f"{target}/{metric}"
+        
+    def _summarize_metrics(self, target: str, metrics: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """汇总最近一个时间窗口内的指标序列（平均值、最大值、超过告警阈值的采样数）"""
+        window = self.config.get('metric_summary_window', 3600)
+        thresholds = self._alert_thresholds()
+        series = {metric: self._series_name(target, metric) for metric in metrics}
+        summary = self.metric_store.summarize(
+            list(series.values()),
+            datetime.now().timestamp() - window,
+            {series[metric]: thresholds[metric][0] for metric in series if metric in thresholds}
+        )
+        return {metric: summary[name] for metric, name in series.items() if name in summary}
+        
     def _get_metric_unit(self, metric: str) -> str:
         """获取指标单位"""
-        units = {
-            'cpu': '%',
-            'memory': '%',
-            'response_time': 'ms',
-            'throughput': 'rps',
-            'error_rate': '%'
-        }
-        return units.get(metric, '')
+        return self._METRIC_UNITS.get(metric, '')
         
-    async def _analyze_metrics_and_alert(self, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _alert_thresholds(self) -> Dict[str, Tuple[float, str, Callable[[float], str]]]:
+        """按当前告警规则生成 指标名 -> (阈值, 严重级别, 消息格式化函数)"""
+        alert_rules = self.alert_rules
+        thresholds = {}
+        for metric_name, (rule_key, scale, format_message) in self._ALERT_TABLE.items():
+            rule = alert_rules[rule_key]
+            thresholds[metric_name] = (rule['threshold'] * scale, rule['severity'], format_message)
+        return thresholds
+        
+    def _make_alert(self, thresholds: Dict[str, Tuple[float, str, Callable[[float], str]]], metric: str,
+                    value: float, environment: Optional[str] = None) -> Optional[Alert]:
+        """指标超过阈值时生成告警，否则返回None"""
+        rule = thresholds.get(metric)
+        if rule is None or value <= rule[0]:
+            return None
+        threshold, severity, format_message = rule
+        return Alert(
+            metric=metric,
+            value=value,
+            threshold=threshold,
+            severity=severity,
+            message=format_message(value),
+            environment=environment
+        )
+        
+    async def _analyze_metrics_and_alert(self, metrics: Dict[str, Any],
+                                         environment: Optional[str] = None) -> List[Alert]:
         """分析指标并生成告警"""
+        # 没有指标或没有任何受告警规则约束的指标时直接返回
+        if self._ALERT_TABLE.keys().isdisjoint(metrics):
+            return []
+            
+        thresholds = self._alert_thresholds()
         alerts = []
-        
         for metric_name, metric_data in metrics.items():
-            value = metric_data['value']
-            
-            # 检查告警规则
-            if metric_name == 'cpu' and value > self.alert_rules['high_cpu']['threshold']:
-                alerts.append({
-                    'metric': metric_name,
-                    'value': value,
-                    'threshold': self.alert_rules['high_cpu']['threshold'],
-                    'severity': self.alert_rules['high_cpu']['severity'],
-                    'message': f"CPU使用率过高: {value}%"
-                })
-            elif metric_name == 'memory' and value > self.alert_rules['high_memory']['threshold']:
-                alerts.append({
-                    'metric': metric_name,
-                    'value': value,
-                    'threshold': self.alert_rules['high_memory']['threshold'],
-                    'severity': self.alert_rules['high_memory']['severity'],
-                    'message': f"内存使用率过高: {value}%"
-                })
-            elif metric_name == 'response_time' and value > self.alert_rules['slow_response']['threshold'] * 1000:
-                alerts.append({
-                    'metric': metric_name,
-                    'value': value,
-                    'threshold': self.alert_rules['slow_response']['threshold'] * 1000,
-                    'severity': self.alert_rules['slow_response']['severity'],
-                    'message': f"响应时间过长: {value}ms"
-                })
+            alert = self._make_alert(thresholds, metric_name, metric_data['value'], environment)
+            if alert is not None:
+                alerts.append(alert)
                 
         return alerts
         
     async def _execute_incident_response(self, incident: Dict[str, Any]) -> List[str]:
         """执行故障响应"""
         actions = []
-        severity = IncidentLevel(incident['severity'])
+        severity = self._INCIDENT_LEVEL_MAP[incident['severity']]
         
         if severity == IncidentLevel.P0_CRITICAL:
             actions.extend([
@@ -774,7 +1114,7 @@ class DevOpsEngineer(BaseRole):
     async def _execute_rollback(self, rollback_deployment: DeploymentRecord) -> Dict[str, Any]:
         """执行回滚"""
         try:
-            self.logger.info(f"执行回滚: {rollback_deployment.deployment_id}")
+            self.logger.info("执行回滚: %s", rollback_deployment.deployment_id)
             
             # 模拟回滚过程
             await asyncio.sleep(1)
@@ -789,14 +1129,10 @@ class DevOpsEngineer(BaseRole):
             
     def _find_previous_successful_deployment(self, environment: str) -> Optional[DeploymentRecord]:
         """查找上一个成功的部署"""
-        for deployment in reversed(self.deployment_history):
-            if (deployment.environment == environment and 
-                deployment.success and 
-                not deployment.rollback):
-                return deployment
-        return None
+        return self._last_success_by_env.get(environment)
         
-    async def _check_environment_health(self, environment: Environment) -> Dict[str, Any]:
+    async def _check_environment_health(self, environment: Environment,
+                                        now_iso: Optional[str] = None) -> Dict[str, Any]:
         """检查环境健康状态"""
         health_checks = {
             'service_status': 'healthy',
@@ -806,7 +1142,7 @@ class DevOpsEngineer(BaseRole):
                 'storage': 23.5
             },
             'connectivity': 'ok',
-            'last_deployment': environment.last_deployment.isoformat() if environment.last_deployment else None,
+            'last_deployment': environment.last_deployment,
             'uptime': '99.9%'
         }
         
@@ -818,130 +1154,219 @@ class DevOpsEngineer(BaseRole):
         return {
             'overall_health': overall_health,
             'checks': health_checks,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso or datetime.now().isoformat()
         }
         
+    async def _check_all_environments_health(self, now_iso: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """并发检查所有环境的健康状态，单个环境检查失败时记为error"""
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
+        env_names = list(self.environments)
+        results = await asyncio.gather(
+            *(self._check_environment_health(self.environments[name], now_iso) for name in env_names),
+            return_exceptions=True
+        )
+        
+        health_results = {}
+        for env_name, result in zip(env_names, results):
+            if isinstance(result, Exception):
+                result = {
+                    'overall_health': 'error',
+                    'error': str(result),
+                    'timestamp': now_iso
+                }
+            health_results[env_name] = result
+        return health_results
+        
     async def _execute_security_scan(self, scan_type: str, target: str) -> Dict[str, Any]:
         """执行安全扫描"""
         # 模拟安全扫描结果
-        vulnerabilities = [
-            {
-                'id': 'CVE-2023-1234',
-                'severity': 'medium',
-                'description': '依赖库存在已知漏洞',
-                'component': 'nginx:1.18'
-            }
-        ]
-        
-        risk_level = 'medium'
-        recommendations = [
-            '升级nginx到最新版本',
-            '定期更新依赖库',
-            '配置安全headers'
-        ]
-        
         return {
-            'vulnerabilities': vulnerabilities,
-            'risk_level': risk_level,
-            'recommendations': recommendations
+            'vulnerabilities': [dict(vulnerability) for vulnerability in self._MOCK_VULNERABILITIES],
+            'risk_level': 'medium',
+            'recommendations': list(self._MOCK_RECOMMENDATIONS)
         }
         
     async def _execute_scaling(self, environment: Environment, action: str, resources: Dict[str, Any]) -> Dict[str, Any]:
         """执行扩缩容"""
-        old_resources = environment.resources.copy()
-        new_resources = old_resources.copy()
+        current = environment.resources
+        changed: Dict[str, str] = {}  # 只记录发生变化的资源
         
-        if action == 'scale_up':
-            # 扩容逻辑
+        if action in ('scale_up', 'scale_down'):
+            sign = 1 if action == 'scale_up' else -1
             for resource, value in resources.items():
-                if resource in new_resources:
-                    if resource in ['cpu', 'memory']:
-                        # 对于CPU和内存，增加指定数量
-                        current_value = int(new_resources[resource].replace('Gi', '').replace('m', ''))
-                        new_value = current_value + int(value.replace('Gi', '').replace('m', ''))
-                        new_resources[resource] = f"{new_value}{'Gi' if 'Gi' in value else 'm' if 'm' in value else ''}"
-                        
-        elif action == 'scale_down':
-            # 缩容逻辑
-            for resource, value in resources.items():
-                if resource in new_resources:
-                    if resource in ['cpu', 'memory']:
-                        current_value = int(new_resources[resource].replace('Gi', '').replace('m', ''))
-                        new_value = max(1, current_value - int(value.replace('Gi', '').replace('m', '')))
-                        new_resources[resource] = f"{new_value}{'Gi' if 'Gi' in value else 'm' if 'm' in value else ''}"
-                        
+                # 只调整CPU和内存，增加/减少指定数量
+                if resource not in current or resource not in ('cpu', 'memory'):
+                    continue
+                    
+                current_match = _RES_RE.match(str(current[resource]))
+                delta_match = _RES_RE.match(str(value))
+                if current_match is None or delta_match is None:
+                    raise ValueError(f"无法解析资源数量: {resource}={value}")
+                    
+                unit = current_match.group(2) or ''
+                delta_unit = delta_match.group(2)
+                if delta_unit and delta_unit != unit:
+                    raise ValueError(f"资源单位不一致: {resource} 当前为 {current[resource]}, 调整量为 {value}")
+                    
+                new_value = max(1, int(current_match.group(1)) + sign * int(delta_match.group(1)))
+                changed[resource] = f"{new_value}{unit}"
+                
+        old_resources = dict(current)
         return {
             'success': True,
             'old_resources': old_resources,
-            'new_resources': new_resources
+            'new_resources': {**old_resources, **changed},
+            'changed': changed
         }
         
     # 定期任务
-    async def _periodic_health_check(self):
-        """定期健康检查"""
-        while self.running:
-            try:
-                await asyncio.sleep(300)  # 每5分钟检查一次
+    async def _periodic_scheduler(self):
+        """定期任务调度器：用截止时间最小堆驱动所有定期任务，同一时刻只有一个定时唤醒"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        heap = [(now + interval, name) for name, (_, interval) in self._PERIODIC_JOBS.items()]
+        heapq.heapify(heap)
+        
+        while heap:
+            deadline, name = heapq.heappop(heap)
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            if not self.running:
+                break
                 
-                for env_name, env in self.environments.items():
-                    health = await self._check_environment_health(env)
-                    if health['overall_health'] != 'healthy':
-                        self.logger.warning(f"环境 {env_name} 健康状态异常: {health['overall_health']}")
-                        
-            except Exception as e:
-                self.logger.error(f"定期健康检查失败: {e}")
+            # 各任务在独立的Task中执行，慢任务不会推迟其他任务
+            if name in self._periodic_runs:
+                self.logger.warning("定期任务 %s 上一次尚未完成，跳过本次", name)
+            else:
+                self._periodic_runs[name] = asyncio.create_task(self._run_periodic(name))
                 
-    async def _periodic_monitoring(self):
+            # 按固定截止时间安排下一次（执行耗时不累积漂移），错过的周期直接跳过
+            interval = self._PERIODIC_JOBS[name][1]
+            next_deadline = deadline + interval
+            now = loop.time()
+            if next_deadline <= now:
+                next_deadline += ((now - next_deadline) // interval + 1) * interval
+            heapq.heappush(heap, (next_deadline, name))
+            
+    async def _run_periodic(self, name: str):
+        """执行一次定期任务"""
+        try:
+            await getattr(self, self._PERIODIC_JOBS[name][0])()
+        finally:
+            self._periodic_runs.pop(name, None)
+            
+    async def _health_check_tick(self):
+        """定期健康检查"""
+        if not self.environments:
+            return
+            
+        try:
+            health_results = await self._check_all_environments_health()
+            for env_name, health in health_results.items():
+                overall_health = health['overall_health']
+                if overall_health == 'error':
+                    self.logger.error("环境 %s 健康检查失败: %s", env_name, health['error'])
+                elif overall_health != 'healthy':
+                    self.logger.warning("环境 %s 健康状态异常: %s", env_name, overall_health)
+                    
+        except Exception as e:
+            self.logger.error("定期健康检查失败: %s", e)
+            
+    async def _monitoring_tick(self):
         """定期监控"""
-        while self.running:
-            try:
-                await asyncio.sleep(60)  # 每分钟检查一次
-                
-                # 收集关键指标
-                metrics_result = await self._collect_monitoring_metrics('all', ['cpu', 'memory', 'response_time'])
-                if metrics_result['success']:
-                    alerts = await self._analyze_metrics_and_alert(metrics_result['metrics'])
+        try:
+            # 并发收集各环境的关键指标，采集时直接生成告警
+            env_names = list(self.environments)
+            results = await asyncio.gather(*(
+                self._collect_and_analyze(env_name, self._DEFAULT_METRICS)
+                for env_name in env_names
+            ), return_exceptions=True)
+            
+            critical_alerts = []
+            for env_name, alerts in zip(env_names, results):
+                if isinstance(alerts, Exception):
+                    self.logger.warning("收集环境 %s 监控指标失败: %s", env_name, alerts)
+                    continue
+                critical_alerts.extend(alert for alert in alerts if alert.severity in self._HIGH_SEVERITIES)
+                        
+            # 并发发送关键告警，单个告警发送失败不影响其他告警
+            send_results = await asyncio.gather(
+                *(self._handle_critical_alert(alert) for alert in critical_alerts),
+                return_exceptions=True
+            )
+            for alert, result in zip(critical_alerts, send_results):
+                if isinstance(result, Exception):
+                    self.logger.error("发送关键告警失败 (%s/%s): %s", alert.environment, alert.metric, result)
                     
-                    # 处理告警
-                    for alert in alerts:
-                        if alert['severity'] in ['critical', 'high']:
-                            await self._handle_critical_alert(alert)
-                            
-            except Exception as e:
-                self.logger.error(f"定期监控失败: {e}")
-                
-    async def _periodic_security_scan(self):
+        except Exception as e:
+            self.logger.error("定期监控失败: %s", e)
+            
+    async def _security_scan_tick(self):
         """定期安全扫描"""
-        while self.running:
-            try:
-                await asyncio.sleep(3600)  # 每小时扫描一次
+        try:
+            scan_result = await self._execute_security_scan('quick', 'application')
+            fingerprint = hashlib.blake2b(
+                json.dumps(scan_result, sort_keys=True, default=str).encode(),
+                digest_size=16
+            ).hexdigest()
+            if fingerprint == self._last_scan_fingerprint:
+                self.logger.debug("安全扫描结果未变化，跳过告警")
+                return
+            self._last_scan_fingerprint = fingerprint
+            
+            if scan_result['risk_level'] in self._HIGH_SEVERITIES:
+                await self._send_security_alert(scan_result)
                 
-                scan_result = await self._execute_security_scan('quick', 'application')
-                if scan_result['risk_level'] in ['high', 'critical']:
-                    await self._send_security_alert(scan_result)
-                    
+        except Exception as e:
+            self.logger.error("定期安全扫描失败: %s", e)
+            
+    async def _handle_critical_alert(self, alert: Alert):
+        """处理关键告警（加入待发送批次，由刷新任务合并发送）"""
+        key = ('critical_alert', alert.environment, alert.metric, alert.severity)
+        if not self._alert_throttle.allow(key, high_impact=alert.severity == 'critical'):
+            self.logger.debug("关键告警已抑制: %s", alert.message)
+            return
+            
+        self.logger.warning("关键告警: %s", alert.message)
+        self._alert_buffer.append(alert)
+        
+    async def _flush_alerts(self):
+        """告警刷新任务：定期把缓冲的关键告警合并成一条消息发送"""
+        while True:
+            await asyncio.sleep(self._ALERT_FLUSH_INTERVAL)
+            try:
+                await self._send_alert_batch()
             except Exception as e:
-                self.logger.error(f"定期安全扫描失败: {e}")
+                self.logger.error("发送关键告警批次失败: %s", e)
                 
-    async def _handle_critical_alert(self, alert: Dict[str, Any]):
-        """处理关键告警"""
-        self.logger.warning(f"关键告警: {alert['message']}")
+    async def _send_alert_batch(self):
+        """发送当前缓冲的关键告警"""
+        if not self._alert_buffer:
+            return
+            
+        batch = self._alert_buffer
+        self._alert_buffer = []
         
-        # 发送告警通知
         await self.send_message(
             to_role="status_monitor",
-            action="critical_alert",
-            data=alert,
+            action="critical_alerts_batch",
+            data={'alerts': [alert.to_dict() for alert in batch]},
             priority=Priority.CRITICAL
         )
         
     async def _send_security_alert(self, scan_result: Dict[str, Any]):
         """发送安全告警"""
+        risk_level = scan_result['risk_level']
+        key = ('security_alert', risk_level, tuple(v['id'] for v in scan_result['vulnerabilities']))
+        if not self._alert_throttle.allow(key, high_impact=risk_level in self._HIGH_SEVERITIES):
+            self.logger.debug("安全告警已抑制: %s", risk_level)
+            return
+            
         await self.send_message(
             to_role="status_monitor",
             action="security_alert",
             data={
-                'risk_level': scan_result['risk_level'],
+                'risk_level': risk_level,
                 'vulnerabilities': scan_result['vulnerabilities'],
                 'recommendations': scan_result['recommendations']
             },
@@ -958,7 +1383,7 @@ class DevOpsEngineer(BaseRole):
                 'environment': deployment.environment,
                 'version': deployment.version,
                 'success': deployment.success,
-                'duration': (deployment.end_time - deployment.start_time).total_seconds()
+                'duration': deployment.duration
             },
             message_type=MessageType.NOTIFICATION
         )
@@ -969,24 +1394,28 @@ class DevOpsEngineer(BaseRole):
             to_role="status_monitor",
             action="incident_notification",
             data=incident,
-            priority=Priority.CRITICAL if incident['severity'] in ['p0_critical', 'p1_high'] else Priority.HIGH
+            priority=self._INCIDENT_PRIORITY.get(incident['severity'], Priority.HIGH)
         )
         
     async def _initialize_monitoring(self):
         """初始化监控系统"""
         self.logger.info("初始化监控系统")
         
-        # 初始化基础监控指标
-        base_metrics = ['cpu', 'memory', 'disk', 'network', 'response_time', 'error_rate']
-        for metric in base_metrics:
-            self.monitoring_metrics[metric] = MonitoringMetric(
+        # 初始化基础监控指标（阈值取自当前告警规则，所有指标共用同一时间戳）
+        now = datetime.now()
+        rule_for = self.alert_rules.get
+        unit_for = self._METRIC_UNITS.get
+        self.monitoring_metrics.update({
+            metric: MonitoringMetric(
                 name=metric,
                 value=0.0,
-                threshold=self.alert_rules.get(f"high_{metric}", {}).get('threshold', 100),
+                threshold=rule_for(f"high_{metric}", {}).get('threshold', 100),
                 status='ok',
-                timestamp=datetime.now(),
-                unit=self._get_metric_unit(metric)
+                timestamp=now,
+                unit=unit_for(metric, '')
             )
+            for metric in self._BASE_METRICS
+        })
             
     # 任务处理方法
     async def _deploy_task(self, task: Task) -> Dict[str, Any]:
@@ -1018,7 +1447,7 @@ class DevOpsEngineer(BaseRole):
             monitor_data = task.data
             target = monitor_data.get('target', 'all')
             
-            result = await self._collect_monitoring_metrics(target, ['cpu', 'memory', 'response_time'])
+            result = await self._collect_monitoring_metrics(target, self._DEFAULT_METRICS)
             return {'status': 'completed', 'metrics': result}
             
         except Exception as e:
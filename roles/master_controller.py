@@ -61,6 +61,16 @@ class ProjectContext:
 class MasterController(BaseRole):
     """项目总控制器 - 系统的核心决策和协调角色"""
     
+    # 专用消息处理器: 动作 -> 处理方法名
+    _CUSTOM_HANDLERS = {
+        'initialize_project': '_handle_project_initialization',
+        'process_user_request': '_handle_user_request',
+        'role_status_update': '_handle_role_status_update',
+        'request_decision': '_handle_decision_request',
+        'phase_completion': '_handle_phase_completion',
+        'emergency_escalation': '_handle_emergency_escalation'
+    }
+    
     def __init__(self, role_id: str = "master_controller", config: Dict[str, Any] = None):
         super().__init__(role_id, "项目总控制器", config)
         
@@ -76,16 +86,6 @@ class MasterController(BaseRole):
         self.role_status: Dict[str, Dict[str, Any]] = {}
         self.pending_responses: Dict[str, Dict[str, Any]] = {}
         
-        # 注册专用消息处理器
-        self.message_handlers.update({
-            'initialize_project': self._handle_project_initialization,
-            'process_user_request': self._handle_user_request,
-            'role_status_update': self._handle_role_status_update,
-            'request_decision': self._handle_decision_request,
-            'phase_completion': self._handle_phase_completion,
-            'emergency_escalation': self._handle_emergency_escalation
-        })
-        
     def _init_decision_rules(self) -> Dict[str, Any]:
         """初始化决策规则"""
         return {
@@ -55,6 +55,17 @@ class MemoryEntry:
 class MemoryManager(BaseRole):
     """记忆管理器 - 系统的记忆中心"""
     
+    # 专用消息处理器: 动作 -> 处理方法名
+    _CUSTOM_HANDLERS = {
+        'initialize_project_context': '_handle_initialize_project',
+        'store_data': '_handle_store_data',
+        'retrieve_data': '_handle_retrieve_data',
+        'query_history': '_handle_query_history',
+        'update_context': '_handle_update_context',
+        'create_snapshot': '_handle_create_snapshot',
+        'search_knowledge': '_handle_search_knowledge'
+    }
+    
     def __init__(self, role_id: str = "memory_manager", config: Dict[str, Any] = None):
         super().__init__(role_id, "记忆管理器", config)
         
@@ -83,17 +94,6 @@ class MemoryManager(BaseRole):
         # 搜索索引
         self.search_index: Dict[str, List[str]] = {}  # keyword -> entry_ids
         
-        # 注册专用消息处理器
-        self.message_handlers.update({
-            'initialize_project_context': self._handle_initialize_project,
-            'store_data': self._handle_store_data,
-            'retrieve_data': self._handle_retrieve_data,
-            'query_history': self._handle_query_history,
-            'update_context': self._handle_update_context,
-            'create_snapshot': self._handle_create_snapshot,
-            'search_knowledge': self._handle_search_knowledge
-        })
-        
     async def _initialize_role(self):
         """初始化记忆管理器"""
         self.logger.info("初始化记忆管理器")
@@ -149,6 +149,20 @@ class DesignSystemComponent:
 class ProductDesigner(BaseRole):
     """产品设计师 - 负责用户体验设计和界面设计"""
     
+    # 专用消息处理器: 动作 -> 处理方法名
+    _CUSTOM_HANDLERS = {
+        'analyze_user_requirements': '_handle_analyze_user_requirements',
+        'create_user_personas': '_handle_create_user_personas',
+        'design_user_journey': '_handle_design_user_journey',
+        'create_wireframes': '_handle_create_wireframes',
+        'design_interface': '_handle_design_interface',
+        'create_prototype': '_handle_create_prototype',
+        'conduct_usability_test': '_handle_conduct_usability_test',
+        'evaluate_design': '_handle_evaluate_design',
+        'create_design_system': '_handle_create_design_system',
+        'review_implementation': '_handle_review_implementation'
+    }
+    
     def __init__(self, config: Optional[Dict] = None):
         super().__init__(
             role_id="product_designer",
@@ -174,20 +188,6 @@ class ProductDesigner(BaseRole):
         # 当前设计项目
         self.current_projects: Dict[str, Dict[str, Any]] = {}
         
-        # 消息处理器映射
-        self.message_handlers.update({
-            'analyze_user_requirements': self._handle_analyze_user_requirements,
-            'create_user_personas': self._handle_create_user_personas,
-            'design_user_journey': self._handle_design_user_journey,
-            'create_wireframes': self._handle_create_wireframes,
-            'design_interface': self._handle_design_interface,
-            'create_prototype': self._handle_create_prototype,
-            'conduct_usability_test': self._handle_conduct_usability_test,
-            'evaluate_design': self._handle_evaluate_design,
-            'create_design_system': self._handle_create_design_system,
-            'review_implementation': self._handle_review_implementation
-        })
-        
         self.logger.info(f"{self.role_name} 初始化完成")
         
     def _init_design_tools(self) -> Dict[str, Any]:
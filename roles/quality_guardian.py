@@ -112,6 +112,18 @@ class TechDebt:
 class QualityGuardian(BaseRole):
     """质量守护者 - 负责代码质量控制和技术债务管理"""
     
+    # 专用消息处理器: 动作 -> 处理方法名
+    _CUSTOM_HANDLERS = {
+        'analyze_code': '_handle_analyze_code',
+        'check_quality_gates': '_handle_check_quality_gates',
+        'scan_security': '_handle_scan_security',
+        'detect_duplicates': '_handle_detect_duplicates',
+        'analyze_complexity': '_handle_analyze_complexity',
+        'manage_tech_debt': '_handle_manage_tech_debt',
+        'generate_quality_report': '_handle_generate_quality_report',
+        'update_quality_rules': '_handle_update_quality_rules'
+    }
+    
     def __init__(self, config: Optional[Dict] = None):
         super().__init__(
             role_id="quality_guardian",
@@ -136,18 +148,6 @@ class QualityGuardian(BaseRole):
         # 质量历史记录
         self.quality_history: List[Dict] = []
         
-        # 消息处理器映射
-        self.message_handlers.update({
-            'analyze_code': self._handle_analyze_code,
-            'check_quality_gates': self._handle_check_quality_gates,  
-            'scan_security': self._handle_scan_security,
-            'detect_duplicates': self._handle_detect_duplicates,
-            'analyze_complexity': self._handle_analyze_complexity,
-            'manage_tech_debt': self._handle_manage_tech_debt,
-            'generate_quality_report': self._handle_generate_quality_report,
-            'update_quality_rules': self._handle_update_quality_rules
-        })
-        
         self.logger.info(f"{self.role_name} 初始化完成")
         
     def _init_quality_rules(self) -> Dict[str, Any]:
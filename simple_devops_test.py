@@ -6,6 +6,7 @@ AI自主开发系统 - DevOps工程师简单测试
 
 import asyncio
 import logging
+import time
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -159,6 +160,157 @@ def main():
     except Exception as e:
         logger.error(f"✗ 枚举类型测试失败: {e}")
     
+    # 测试8: 指标时间序列存储
+    total_tests += 1
+    try:
+        logger.info("8. 测试指标时间序列存储...")
+        
+        from roles.devops_engineer import MetricStore
+        
+        store = MetricStore(capacity=4, max_series=2)
+        recorded = [store.record(name, float(i), 1000.0 + i) for i, name in enumerate(['cpu', 'memory', 'cpu', 'disk'])]
+        # 未写满前列按需增长，不预先分配整个容量
+        grown = len(store.values)
+        early = store.summarize(['cpu', 'memory', 'disk'], 0, {'cpu': 1.0})
+        for i in range(6):
+            store.record('cpu', 50.0 + i, 2000.0 + i)
+        # 写满后覆盖最旧的数据，汇总只统计时间窗口内的采样
+        recent = store.summarize(['cpu', 'memory'], 2003.0, {'cpu': 54.0})
+        
+        # 请求中的任意目标/指标名不会产生新的序列
+        names_before = list(devops.metric_store.names)
+        for i in range(100):
+            result = asyncio.run(devops._collect_monitoring_metrics(f"unknown_{i}", ['cpu', f"custom_{i}"]))
+            if not result['success']:
+                raise Exception(result['error'])
+        asyncio.run(devops._collect_monitoring_metrics('production', devops._DEFAULT_METRICS))
+        summary = devops._summarize_metrics('production', ['cpu', 'memory'])
+        new_names = devops.metric_store.names[len(names_before):]
+        
+        if (recorded == [True, True, True, False] and store.size == 4 and store.names == ['cpu', 'memory']
+                and grown == 3 and len(store.values) == 4
+                and early == {'cpu': {'samples': 2, 'average': 1.0, 'max': 2.0, 'above_threshold': 1},
+                              'memory': {'samples': 1, 'average': 1.0, 'max': 1.0}}
+                and recent == {'cpu': {'samples': 3, 'average': 54.0, 'max': 55.0, 'above_threshold': 1}}
+                and set(summary) == {'cpu', 'memory'} and summary['cpu']['samples'] >= 1
+                and all(name.startswith('production/') for name in new_names) and len(new_names) <= 3):
+            logger.info("✓ 指标时间序列存储正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 指标时间序列存储不正确: recorded={recorded}, new_names={new_names}")
+    except Exception as e:
+        logger.error(f"✗ 指标时间序列存储测试失败: {e}")
+    
+    # 测试9: 周期监控与监控请求生成相同的告警
+    total_tests += 1
+    try:
+        logger.info("9. 测试指标告警生成...")
+        
+        devops.alert_rules['high_cpu']['threshold'] = 40
+        periodic_alerts = asyncio.run(devops._collect_and_analyze('production', ['cpu', 'memory']))
+        collected = asyncio.run(devops._collect_monitoring_metrics('production', ['cpu', 'memory']))
+        request_alerts = asyncio.run(devops._analyze_metrics_and_alert(collected['metrics'], 'production'))
+        devops.alert_rules['high_cpu']['threshold'] = 80
+        
+        if (len(periodic_alerts) == 1 and periodic_alerts == request_alerts
+                and periodic_alerts[0].environment == 'production' and periodic_alerts[0].threshold == 40):
+            logger.info("✓ 指标告警生成一致")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 指标告警不一致: periodic={periodic_alerts}, request={request_alerts}")
+    except Exception as e:
+        logger.error(f"✗ 指标告警生成测试失败: {e}")
+    
+    # 测试10: 安全扫描结果互不影响
+    total_tests += 1
+    try:
+        logger.info("10. 测试安全扫描结果...")
+        
+        first = asyncio.run(devops._execute_security_scan('full', 'production'))
+        first['vulnerabilities'][0]['severity'] = 'low'
+        first['recommendations'].append('修改后的建议')
+        second = asyncio.run(devops._execute_security_scan('full', 'production'))
+        
+        if second['vulnerabilities'][0]['severity'] == 'medium' and len(second['recommendations']) == 3:
+            logger.info("✓ 安全扫描结果互不影响")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 安全扫描结果被修改: {second}")
+    except Exception as e:
+        logger.error(f"✗ 安全扫描结果测试失败: {e}")
+    
+    # 测试11: 告警去重和每分钟发送上限
+    total_tests += 1
+    try:
+        logger.info("11. 测试告警限流去重...")
+        
+        from roles.devops_engineer import AlertThrottle
+        
+        throttle = AlertThrottle(dedup_window=300, max_per_minute=2)
+        decisions = [
+            throttle.allow('cpu'),
+            throttle.allow('cpu'),                     # 去重窗口内重复
+            throttle.allow('memory'),
+            throttle.allow('disk'),                    # 超出每分钟上限
+            throttle.allow('outage', high_impact=True)  # 高影响告警不受上限限制
+        ]
+        
+        short_window = AlertThrottle(dedup_window=0.05)
+        first = short_window.allow('cpu')
+        time.sleep(0.06)
+        after_window = short_window.allow('cpu')
+        
+        if decisions == [True, False, True, False, True] and first and after_window:
+            logger.info("✓ 告警限流去重正确")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 告警限流去重不正确: {decisions}, after_window={after_window}")
+    except Exception as e:
+        logger.error(f"✗ 告警限流去重测试失败: {e}")
+    
+    # 测试12: 定期任务按固定周期执行，慢任务不推迟其他任务且不会重叠执行
+    total_tests += 1
+    try:
+        logger.info("12. 测试定期任务调度...")
+        
+        class ScheduledDevOps(DevOpsEngineer):
+            _PERIODIC_JOBS = {'fast': ('_fast_tick', 0.05), 'slow': ('_slow_tick', 0.05)}
+            
+            async def _fast_tick(self):
+                self.fast_runs += 1
+                
+            async def _slow_tick(self):
+                self.slow_running += 1
+                self.max_slow_running = max(self.max_slow_running, self.slow_running)
+                await asyncio.sleep(0.12)
+                self.slow_running -= 1
+                
+        class NullBus:
+            async def send_message(self, message):
+                return message.header.message_id
+                
+        async def run_scheduler():
+            scheduled = ScheduledDevOps()
+            scheduled.fast_runs = 0
+            scheduled.slow_running = 0
+            scheduled.max_slow_running = 0
+            await scheduled.initialize(NullBus())
+            await asyncio.sleep(0.33)
+            await scheduled.shutdown()
+            return scheduled
+            
+        scheduled = asyncio.run(run_scheduler())
+        
+        if (5 <= scheduled.fast_runs <= 7 and scheduled.max_slow_running == 1
+                and scheduled._periodic_task is None and not scheduled._periodic_runs):
+            logger.info(f"✓ 定期任务调度正确 (快速任务执行 {scheduled.fast_runs} 次)")
+            tests_passed += 1
+        else:
+            logger.error(f"✗ 定期任务调度不正确: fast_runs={scheduled.fast_runs}, "
+                         f"max_slow_running={scheduled.max_slow_running}")
+    except Exception as e:
+        logger.error(f"✗ 定期任务调度测试失败: {e}")
+    
     # 显示测试结果
     logger.info("=== 测试结果 ===")
     logger.info(f"总测试数: {total_tests}")
@@ -156,6 +156,89 @@ async def test_basic_message_bus():
         logger.error(f"消息总线测试失败: {e}")
         return False
 
+async def test_task_queue():
+    """测试角色任务队列"""
+    try:
+        logger.info("6. 测试任务优先级队列和任务对象池...")
+        
+        from communication import Priority
+        from roles.base_role import BaseRole, Task
+        
+        class RecordingRole(BaseRole):
+            """记录任务执行顺序的测试角色"""
+            
+            def __init__(self):
+                super().__init__("recording_role", "测试角色", {'max_concurrent_tasks': 1})
+                self.executed = []
+                
+            async def _initialize_role(self):
+                pass
+                
+            async def _cleanup_role(self):
+                pass
+                
+            async def _handle_custom_message(self, message):
+                pass
+                
+            async def _process_task(self, task):
+                self.executed.append(task.data['name'])
+                return {'name': task.data['name']}
+                
+        class RecordingBus:
+            """记录发送消息的测试消息总线"""
+            
+            def __init__(self):
+                self.messages = []
+                
+            async def send_message(self, message):
+                self.messages.append(message)
+                return message.header.message_id
+                
+        # 启动前入队，启动后按优先级从高到低、同优先级先进先出执行
+        role = RecordingRole()
+        for name, priority in [("low", Priority.LOW), ("high_1", Priority.HIGH), ("normal", Priority.NORMAL),
+                               ("high_2", Priority.HIGH), ("critical", Priority.CRITICAL)]:
+            await role.add_task("record", {'name': name}, priority)
+            
+        bus = RecordingBus()
+        await role.initialize(bus)
+        for _ in range(100):
+            if len(role.executed) == 5 and not role.current_tasks:
+                break
+            await asyncio.sleep(0.01)
+        await role.shutdown()
+        
+        if role.executed != ["critical", "high_1", "high_2", "normal", "low"]:
+            logger.error(f"任务执行顺序不正确: {role.executed}")
+            return False
+            
+        # 状态更新在任务归还对象池之前生成，内容不受对象复用影响
+        updates = [
+            update
+            for message in bus.messages if message.body.action == "status_update_batch"
+            for update in message.body.data['events']
+        ]
+        if [update['result'] for update in updates] != [{'name': name} for name in role.executed]:
+            logger.error(f"任务状态更新不正确: {updates}")
+            return False
+            
+        # 归还的任务对象已清空，再次获取时复用并重置
+        pooled = Task._pool[-1]
+        pooled_data = pooled.data
+        reused = Task.acquire("reused_task", "record", {'name': "reused"}, Priority.LOW)
+        if pooled_data is not None or reused is not pooled or reused.result is not None \
+                or reused.to_dict()['task_id'] != "reused_task":
+            logger.error("任务对象池复用不正确")
+            return False
+        reused.release()
+        
+        logger.info(f"✓ 任务执行顺序正确: {role.executed}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"任务队列测试失败: {e}")
+        return False
+
 async def run_all_tests():
     """运行所有测试"""
     try:
@@ -172,6 +255,7 @@ async def run_all_tests():
         # 异步测试
         results.append(await test_role_creation())
         results.append(await test_basic_message_bus())
+        results.append(await test_task_queue())
         
         # 统计结果
         passed = sum(results)
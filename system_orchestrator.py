@@ -389,6 +389,14 @@ class RolePlaceholder:
         """处理消息 - 占位符方法"""
         pass
 
+def run_event_loop(main_coro):
+    """运行系统主协程，安装了uvloop时使用uvloop事件循环"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main_coro)
+    return uvloop.run(main_coro)
+
 # 使用示例
 async def main():
     """主函数示例"""
@@ -422,4 +430,4 @@ async def main():
         await orchestrator.shutdown()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_event_loop(main())
\ No newline at end of file